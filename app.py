@@ -1,9 +1,18 @@
 import os
-import base64
+import math
 import streamlit as st
 import pandas as pd
 from PIL import Image
 
+import timing
+from data_layer import BRANDS, load_brand_view
+from embedding_index import load_index
+from ranking import weighted_score
+from results_table import SORT_COLUMNS, filter_rows, order_rows, page_bounds, to_html_table
+
+# Per-stage wall time / peak memory of this rerun (only when UTA_TIMING is set, see timing.py)
+timing.start_run("app")
+
 # --- Settings ---
 st.set_page_config(
     page_title="Influencer Analysis",
@@ -14,9 +23,7 @@ st.set_page_config(
 DATA_DIR = "./"  # Directory for CSV files
 IMAGE_DIR = "./top_100_images"  # Directory for images
 LOGO_PATH = os.path.join(DATA_DIR, "ADOASIS.png")  # Path for the logo image
-
-# List of available brands
-BRANDS = ['Lyft', 'Redbull', 'Kroger', 'Sephora', 'Nestle', 'Lululemon']
+PAGE_SIZES = [25, 50, 100]  # Rows per page options for the results table
 
 # --- Top Bar UI ---
 top_bar = st.container()
@@ -39,129 +46,77 @@ with top_bar:
 
 st.title(f"{selected_brand} Influencer Analysis")
 
-# --- Load CSV Files ---
-appearance_reasons_csv = f"top_100_{selected_brand}_appearance.csv"
-appearance_reasons_path = os.path.join(DATA_DIR, appearance_reasons_csv)
-
-meta_csv = "top_100.csv"
-meta_path = os.path.join(DATA_DIR, meta_csv)
-
-if not os.path.exists(appearance_reasons_path):
-    st.error(f"File not found: {appearance_reasons_csv}")
-    st.stop()
-
-if not os.path.exists(meta_path):
-    st.error(f"File not found: {meta_csv}")
+# --- Load Data ---
+# The influencer x brand table is built once per process (and rebuilt only when
+# a source CSV changes), so widget interactions just re-slice it in memory.
+try:
+    with timing.stage("load"):
+        df_merged = load_brand_view(selected_brand, DATA_DIR)
+except FileNotFoundError as e:
+    st.error(str(e))
     st.stop()
 
-df_appearance_reasons = pd.read_csv(appearance_reasons_path)
-df_meta = pd.read_csv(meta_path)
-
-# Merge appearance score/reason with metadata using "influencer" as the key
-df_app = pd.merge(df_appearance_reasons, df_meta, on="influencer", how="left")
-
-# Drop rows with missing Instagram link or follower information
-df_app = df_app[
-    df_app['instagram'].notna() & df_app['instagram'].astype(str).str.strip().ne("") &
-    df_app['last_followers'].notna() & df_app['last_followers'].astype(str).str.strip().ne("")
-]
-
-# Load Culture Fit CSV
-culture_csv = "ad_suitability_results.csv"
-culture_path = os.path.join(DATA_DIR, culture_csv)
-if not os.path.exists(culture_path):
-    st.error(f"File not found: {culture_csv}")
-    st.stop()
-
-df_culture = pd.read_csv(culture_path)
-df_culture = df_culture[df_culture['brand'].str.lower() == selected_brand.lower()]
-
-# Merge appearance data with culture fit data using "influencer" as the key
-df_merged = pd.merge(
-    df_app,
-    df_culture[['influencer', 'score', 'reason']],
-    on="influencer",
-    how="left",
-    suffixes=("_appearance", "_culture")
-)
-
-# Rename columns for clarity
-df_merged.rename(columns={
-    "score_appearance": "appearance_score",
-    "score_culture": "culture_fit_score",
-    "reason_appearance": "appearance_reason",
-    "reason_culture": "culture_fit_reason"
-}, inplace=True)
-
-# Convert followers to integer with comma formatting
-def to_int_str(x):
-    try:
-        return f"{int(float(x)):,}"
-    except Exception:
-        return "N/A"
-
-df_merged['Followers'] = df_merged['last_followers'].apply(to_int_str)
-
 # Calculate total score: total_score = slider_weight * appearance_score + (1 - slider_weight) * culture_fit_score
-df_merged['appearance_score'] = pd.to_numeric(df_merged['appearance_score'], errors='coerce')
-df_merged['culture_fit_score'] = pd.to_numeric(df_merged['culture_fit_score'], errors='coerce')
-df_merged['total_score'] = df_merged.apply(
-    lambda row: slider_weight * row['appearance_score'] + (1 - slider_weight) * row['culture_fit_score']
-    if pd.notna(row['appearance_score']) and pd.notna(row['culture_fit_score'])
-    else None, axis=1
-)
-
-# Sort by total_score in descending order
-df_merged.sort_values(by='total_score', ascending=False, inplace=True)
-
-# Format scores to three decimal places
-df_merged['appearance_score'] = df_merged['appearance_score'].apply(lambda x: f"{x:.3f}" if pd.notna(x) else "N/A")
-df_merged['culture_fit_score'] = df_merged['culture_fit_score'].apply(lambda x: f"{x:.3f}" if pd.notna(x) else "N/A")
-df_merged['total_score'] = df_merged['total_score'].apply(lambda x: f"{x:.3f}" if pd.notna(x) else "N/A")
-
-# Function to encode image to HTML <img> tag using base64
-def image_to_html(image_path, width=50):
-    if os.path.exists(image_path):
-        with open(image_path, "rb") as f:
-            data = f.read()
-        encoded = base64.b64encode(data).decode()
-        return f'<img src="data:image/jpeg;base64,{encoded}" style="width:{width}px;">'
-    else:
-        return "No Image"
-
-# Create Photo column (image width = 50px)
-df_merged['Photo'] = df_merged['influencer'].apply(
-    lambda name: image_to_html(os.path.join(IMAGE_DIR, f"{name}.jpg"), width=50)
-)
-
-# Add Instagram URL link to the influencer name
-df_merged['Influencer'] = df_merged.apply(
-    lambda row: f'<a href="{row["instagram"]}" target="_blank">{row["influencer"]}</a>',
-    axis=1
-)
-
-# Set final columns to display (including Category and the Reason columns)
-columns = ['Photo', 'Influencer', 'category', 'Followers', 'appearance_score', 'culture_fit_score', 'total_score', 'appearance_reason', 'culture_fit_reason']
-col_rename = {
-    'appearance_score': 'Appearance Score',
-    'culture_fit_score': 'Brand Fit Score',
-    'total_score': 'Total Score',
-    'category': 'Category',
-    'appearance_reason': 'Appearance Reason',
-    'culture_fit_reason': 'Brand Fit Reason'
-}
-
-df_display = df_merged[columns].rename(columns=col_rename)
-
-# Generate HTML table (with escape=False to render image HTML)
-html_table = df_display.to_html(escape=False, index=False)
-additional_css = """
-<style>
-    th {
-        text-align: center;
-    }
-</style>
-"""
-html_table = additional_css + html_table
-
-st.markdown(html_table, unsafe_allow_html=True)
\ No newline at end of file
+# (vectorized over the cached columns, see ranking.py)
+weights = {'appearance_score': slider_weight, 'culture_fit_score': 1 - slider_weight}
+with timing.stage("score"):
+    df_merged['total_score'] = weighted_score(df_merged, weights)
+
+# --- Results Table Controls ---
+col1, col2, col3, col4 = st.columns([3, 3, 2, 1])
+with col1:
+    name_query = st.text_input("Search Influencer")
+with col2:
+    categories = st.multiselect("Category", sorted(df_merged['category'].dropna().unique()))
+with col3:
+    sort_label = st.selectbox("Sort by", list(SORT_COLUMNS))
+with col4:
+    page_size = st.selectbox("Rows per page", PAGE_SIZES)
+descending = st.toggle("Descending", value=True)
+
+with timing.stage("filter"):
+    df_filtered = filter_rows(df_merged, name_query, categories)
+
+# Only the rows up to the end of the current page are sorted, and only the
+# visible page is formatted and sent to the browser.
+n_pages = max(1, math.ceil(len(df_filtered) / page_size))
+page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1, step=1)
+start, end, n_pages = page_bounds(len(df_filtered), page, page_size)
+with timing.stage("sort"):
+    df_page = order_rows(df_filtered, SORT_COLUMNS[sort_label], ascending=not descending, k=end).iloc[start:end]
+
+st.caption(f"Showing {start + 1 if end else 0}-{end} of {len(df_filtered)} influencers")
+
+# Generate HTML table for the visible page (photos and Instagram links included)
+static_images = st.get_option("server.enableStaticServing")
+with timing.stage("render"):
+    html_table = to_html_table(df_page, image_dir=IMAGE_DIR, static_images=static_images)
+    st.markdown(html_table, unsafe_allow_html=True)
+
+# --- Similar Influencers ---
+# Nearest neighbours in the saved embedding index (python embedding_index.py build);
+# the app only reads the file and never builds an index or downloads a model.
+with st.expander("Find similar influencers"):
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        anchor = st.selectbox("Influencer", sorted(df_merged['influencer']), index=None,
+                              placeholder="Choose an influencer")
+    with col2:
+        n_similar = st.number_input("Results", min_value=1, max_value=50, value=10, step=1)
+    if anchor:
+        with timing.stage("index"):
+            index = load_index(DATA_DIR)
+        if index is None:
+            st.info("No embedding index yet; build it with `python embedding_index.py build`")
+        elif anchor not in index:
+            st.info(f"{anchor} is not in the embedding index")
+        else:
+            # Neighbours that have a row for this brand, closest first
+            positions = pd.Series(range(len(df_merged)), index=df_merged['influencer'])
+            neighbours = [name for name, _ in index.similar(anchor, len(index)) if name in positions.index]
+            df_similar = df_merged.iloc[positions[neighbours[:int(n_similar)]].to_numpy()]
+            st.caption(f"Closest to {anchor} first ({index.embedder.name} embeddings)")
+            st.markdown(to_html_table(df_similar, image_dir=IMAGE_DIR, static_images=static_images),
+                        unsafe_allow_html=True)
+
+timing.finish_run(brand=selected_brand, rows=len(df_merged), page_rows=len(df_page))
@@ -0,0 +1,463 @@
+"""
+Appearance scoring of the influencer photos (moved out of check.ipynb).
+
+check.ipynb ran load_image/dynamic_preprocess again for every brand and
+called the model once per image and brand in a serial loop. Here:
+
+- Tiling + normalization run once per image, in a multiprocessing pool,
+  with numpy (same result as the torchvision transform in the notebook).
+  The pixel arrays are cached as .npy files keyed by image hash and
+  preprocessing parameters, and read back memory-mapped.
+- All brand prompts for one image are sent in one batched call through a
+  pluggable backend: "internvl" (InternVL2.5 batch_chat, needs a GPU and
+  pip install torch transformers) or "stub" (deterministic, CPU only).
+- Images/sec is reported separately for preprocessing and scoring.
+
+    python appearance_scoring.py                                  # InternVL, writes top_100_{Brand}_appearance.csv
+    python appearance_scoring.py --backend stub --output-dir /tmp/appearance
+"""
+import argparse
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import time
+from glob import glob
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+from data_layer import APPEARANCE_CSV, BRANDS
+from thumbnails import file_digest
+
+IMAGE_DIR = "./top_100_images"
+CACHE_DIR = "./appearance_cache"
+
+INPUT_SIZE = 448
+MAX_NUM = 12
+IMAGENET_MEAN = np.array((0.485, 0.456, 0.406), dtype=np.float32)
+IMAGENET_STD = np.array((0.229, 0.224, 0.225), dtype=np.float32)
+# The model runs in bfloat16, so float16 storage loses nothing and halves the cache
+CACHE_DTYPE = np.float16
+
+GENERATION_CONFIG = dict(max_new_tokens=1024, do_sample=True, pad_token_id=151645)
+
+# check.ipynb의 get_<brand>_score 프롬프트 (그대로 유지해야 기존 점수와 비교 가능)
+BRAND_PROMPTS = {
+    "Lyft": '''<image>
+    You MUST ONLY output a JSON object with exactly two keys: "score" and "reason".
+    - "score" must be a number between 0 and 1 with three decimal places (e.g., 0.234, 0.567, 0.891).
+    - "reason" must be a brief explanation (one or two sentences) describing how well this person's facial appearance aligns with Lyft's ad model criteria.
+
+    Rules:
+    1. Output format: A single JSON object like {"score": 0.XXX, "reason": "Your explanation here"}.
+    2. Do not include any additional keys or text outside the JSON object.
+    3. Ensure the "score" is exactly formatted as a float with three decimals.
+
+    Scoring reference:
+    1.000: Exceptionally appealing - exhibits a modern, friendly, and trustworthy look that perfectly embodies Lyft’s brand image
+    0.800: Very appealing - strongly aligns with Lyft’s aesthetic, conveying approachability and professionalism
+    0.500: Average - meets basic appearance standards but lacks standout qualities for Lyft’s campaigns
+    0.200: Below average - does not sufficiently project a friendly or professional demeanor
+    0.000: Significantly below average - falls short of Lyft’s advertising image requirements
+
+    Consider:
+    1. Approachability and a warm, inviting facial expression
+    2. Professional grooming paired with a modern, urban style
+    3. Facial symmetry and balance that convey reliability
+    4. A look that communicates trustworthiness, inclusivity, and energy
+
+    Rate the overall suitability score now:
+    ''',
+    "Redbull": '''<image>
+    You MUST ONLY output a JSON object with exactly two keys: "score" and "reason".
+    - "score" must be a number between 0 and 1 with three decimal places (e.g., 0.234, 0.567, 0.891).
+    - "reason" must be a brief explanation (one or two sentences) describing the evaluation of the overall physical appearance suitability as a potential RedBull ad model.
+
+    Rules:
+    1. Output format: A single JSON object like {"score": 0.XXX, "reason": "Your explanation here"}.
+    2. Do not include any additional keys or text outside the JSON object.
+    3. Ensure the "score" is exactly formatted as a float with three decimals.
+
+    Scoring reference:
+    1.000: Exceptionally suited - embodies peak athleticism, edgy energy, and a dynamic presence ideal for the RedBull brand
+    0.800: Very well-suited - exudes significant athleticism and vibrant, energetic appeal
+    0.500: Moderately suited - displays average physical traits and energy levels
+    0.200: Below average - lacks the distinctive athletic or dynamic qualities sought by RedBull
+    0.000: Not suited - does not align with the energetic, athletic image of RedBull
+
+    Consider:
+    1. Athletic physique and energy levels
+    2. Facial features that convey determination and dynamism
+    3. Skin condition and overall physical vitality
+    4. A vibrant, edgy presence that reflects the RedBull spirit
+
+    Rate the overall suitability score now:
+    ''',
+    "Kroger": '''<image>
+    You MUST ONLY output a JSON object with exactly two keys: "score" and "reason".
+    - "score" must be a number between 0 and 1 with three decimal places (e.g., 0.234, 0.567, 0.891).
+    - "reason" must be a brief explanation (one or two sentences) describing the evaluation of this person’s appearance suitability for Kroger’s ad model selection.
+
+    Rules:
+    1. Output format: A single JSON object like {"score": 0.XXX, "reason": "Your explanation here"}.
+    2. Do not include any additional keys or text outside the JSON object.
+    3. Ensure the "score" is exactly formatted as a float with three decimals.
+
+    Scoring reference:
+    1.000: Exceptionally suitable - embodies the warm, friendly, and vibrant image ideal for Kroger
+    0.800: Very suitable - strongly reflects the natural, approachable, and wholesome traits desired
+    0.500: Average suitability
+    0.200: Below average
+    0.000: Significantly below average
+
+    Consider:
+    1. Friendly and approachable demeanor
+    2. Natural, healthy skin and vibrant appearance
+    3. Facial symmetry and balanced features that convey authenticity
+    4. Overall facial structure that reflects a warm, trustworthy, and community-focused look
+
+    Rate the overall suitability score now:
+    ''',
+    "Sephora": '''<image>
+    You MUST ONLY output a JSON object with exactly two keys: "score" and "reason".
+    - "score" must be a number between 0 and 1 with three decimal places (e.g., 0.234, 0.567, 0.891).
+    - "reason" must be a brief explanation (one or two sentences) describing the evaluation of the physical appearance for Sephora’s ad model selection.
+
+    Rules:
+    1. Output format: A single JSON object like {"score": 0.XXX, "reason": "Your explanation here"}.
+    2. Do not include any additional keys or text outside the JSON object.
+    3. Ensure the "score" is exactly formatted as a float with three decimals.
+
+    Scoring reference:
+    1.000: Exceptionally striking – embodies the flawless, radiant, and modern beauty that Sephora champions
+    0.800: Very attractive – displays refined features, luminous skin, and a contemporary, confident allure
+    0.500: Average – meets standard beauty criteria with balanced features and decent skin quality
+    0.200: Below average – does not meet the idealized standards for dynamic, brand-forward aesthetics
+    0.000: Significantly below average – falls short in delivering the polished, vibrant look sought in Sephora’s campaigns
+
+    Consider:
+    1. Facial symmetry and proportion that contribute to a refined, polished look
+    2. Skin condition and complexion, emphasizing a healthy, radiant glow
+    3. Modern facial features with a touch of uniqueness that align with Sephora’s innovative and inclusive brand identity
+    4. Overall presence, including confidence and an effortlessly chic appeal
+
+    Rate the physical appearance of the ad model now:
+    ''',
+    "Nestle": '''<image>
+    You MUST ONLY output a JSON object with exactly two keys: "score" and "reason".
+    - "score" must be a number between 0 and 1 with three decimal places (e.g., 0.234, 0.567, 0.891).
+    - "reason" must be a brief explanation (one or two sentences) describing the evaluation of the overall appearance suitability based on Nestlé’s ad model criteria.
+
+    Rules:
+    1. Output format: A single JSON object like {"score": 0.XXX, "reason": "Your explanation here"}.
+    2. Do not include any additional keys or text outside the JSON object.
+    3. Ensure the "score" is exactly formatted as a float with three decimals.
+
+    Scoring reference:
+    1.000: Exceptionally suitable – embodies a wholesome, nurturing, and trustworthy image that aligns perfectly with Nestlé’s brand values.
+    0.800: Very suitable – displays a friendly, approachable appearance with a healthy and natural look.
+    0.500: Moderately suitable – meets basic appearance standards but lacks standout qualities for Nestlé’s advertising.
+    0.200: Below average – does not strongly convey the reliable and comforting image associated with Nestlé.
+    0.000: Not suitable – falls significantly short of representing the warm, dependable, and family-oriented values of Nestlé.
+
+    Consider:
+    1. A healthy and natural appearance that inspires trust.
+    2. Warmth, friendliness, and approachability.
+    3. A clean, wholesome look that reflects reliability.
+    4. Overall facial features and presence that align with a nurturing brand image.
+
+    Rate the overall suitability of the ad model now:
+    ''',
+    "Lululemon": '''<image>
+    You MUST ONLY output a JSON object with exactly two keys: "score" and "reason".
+    - "score" must be a number between 0 and 1 with three decimal places (e.g., 0.234, 0.567, 0.891).
+    - "reason" must be a brief explanation (one or two sentences) describing the evaluation of the overall appearance suitability based on lululemon’s ad model criteria.
+
+    Rules:
+    1. Output format: A single JSON object like {"score": 0.XXX, "reason": "Your explanation here"}.
+    2. Do not include any additional keys or text outside the JSON object.
+    3. Ensure the "score" is exactly formatted as a float with three decimals.
+
+    Scoring reference:
+    1.000: Exceptionally suited – embodies peak athleticism, a balanced, mindful presence, and a modern, active aesthetic perfectly aligned with lululemon's brand values.
+    0.800: Very well-suited – displays a strong athletic and flexible appearance with an energetic yet calm demeanor.
+    0.500: Moderately suited – meets basic active lifestyle standards but lacks distinctive features that resonate with the lululemon brand.
+    0.200: Below average – falls short in conveying the active, mindful, and healthy lifestyle associated with lululemon.
+    0.000: Not suited – does not meet the brand’s expectations for an inspiring, athletic, and wellness-focused image.
+
+    Consider:
+    1. Athletic physique and flexibility
+    2. A calm, mindful, and energetic demeanor
+    3. Overall appearance that conveys health, balance, and active lifestyle
+    4. A modern and approachable look that fits the lululemon ethos
+
+    Rate the overall suitability of the ad model now:
+    ''',
+}
+
+# --- preprocessing (numpy port of build_transform / dynamic_preprocess / load_image) ---
+def find_closest_aspect_ratio(aspect_ratio, target_ratios, width, height, image_size):
+    best_ratio_diff = float('inf')
+    best_ratio = (1, 1)
+    area = width * height
+    for ratio in target_ratios:
+        target_aspect_ratio = ratio[0] / ratio[1]
+        ratio_diff = abs(aspect_ratio - target_aspect_ratio)
+        if ratio_diff < best_ratio_diff:
+            best_ratio_diff = ratio_diff
+            best_ratio = ratio
+        elif ratio_diff == best_ratio_diff:
+            if area > 0.5 * image_size * image_size * ratio[0] * ratio[1]:
+                best_ratio = ratio
+    return best_ratio
+
+
+def dynamic_preprocess(image: Image.Image, min_num: int = 1, max_num: int = MAX_NUM,
+                       image_size: int = INPUT_SIZE, use_thumbnail: bool = False) -> List[Image.Image]:
+    orig_width, orig_height = image.size
+    aspect_ratio = orig_width / orig_height
+
+    target_ratios = sorted(
+        {(i, j) for n in range(min_num, max_num + 1) for i in range(1, n + 1) for j in range(1, n + 1)
+         if min_num <= i * j <= max_num},
+        key=lambda x: x[0] * x[1])
+    target_aspect_ratio = find_closest_aspect_ratio(aspect_ratio, target_ratios, orig_width, orig_height, image_size)
+
+    target_width = image_size * target_aspect_ratio[0]
+    target_height = image_size * target_aspect_ratio[1]
+    columns = target_width // image_size
+    blocks = target_aspect_ratio[0] * target_aspect_ratio[1]
+
+    resized_img = image.resize((target_width, target_height))
+    processed_images = []
+    for i in range(blocks):
+        box = ((i % columns) * image_size, (i // columns) * image_size,
+               (i % columns + 1) * image_size, (i // columns + 1) * image_size)
+        processed_images.append(resized_img.crop(box))
+    if use_thumbnail and len(processed_images) != 1:
+        processed_images.append(image.resize((image_size, image_size)))
+    return processed_images
+
+
+def normalize(image: Image.Image, input_size: int = INPUT_SIZE) -> np.ndarray:
+    """RGB -> bicubic resize -> [0, 1] -> ImageNet mean/std, as CHW float32 (T.ToTensor + T.Normalize)."""
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    if image.size != (input_size, input_size):
+        image = image.resize((input_size, input_size), Image.BICUBIC)
+    array = np.asarray(image, dtype=np.float32) / 255.0
+    return ((array - IMAGENET_MEAN) / IMAGENET_STD).transpose(2, 0, 1)
+
+
+def load_image(image_file: str, input_size: int = INPUT_SIZE, max_num: int = MAX_NUM) -> np.ndarray:
+    """(tiles, 3, input_size, input_size) float32 pixel values of one image."""
+    image = Image.open(image_file).convert('RGB')
+    tiles = dynamic_preprocess(image, image_size=input_size, use_thumbnail=True, max_num=max_num)
+    return np.stack([normalize(tile, input_size) for tile in tiles])
+
+
+# --- pixel cache ---
+def cache_path(image_path: str, input_size: int = INPUT_SIZE, max_num: int = MAX_NUM,
+               cache_dir: str = CACHE_DIR) -> str:
+    return os.path.join(cache_dir, f"{file_digest(image_path)[:20]}_{input_size}_{max_num}.npy")
+
+
+def _preprocess_one(args: Tuple[str, str, int, int]) -> str:
+    image_path, target, input_size, max_num = args
+    pixels = load_image(image_path, input_size, max_num).astype(CACHE_DTYPE)
+    tmp = f"{target}.{os.getpid()}.tmp.npy"
+    np.save(tmp, pixels)
+    os.replace(tmp, target)
+    return image_path
+
+
+def preprocess_images(image_paths: List[str], workers: Optional[int] = None, input_size: int = INPUT_SIZE,
+                      max_num: int = MAX_NUM, cache_dir: str = CACHE_DIR) -> Dict[str, str]:
+    """
+    Cache file of every image; images not cached yet are preprocessed in a
+    process pool (workers=0 runs in this process). The pool is spawned, not
+    forked: the pipeline calls this from a worker thread while other threads
+    hold locks (sqlite, HTTP clients) that a forked child would inherit.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    targets = {path: cache_path(path, input_size, max_num, cache_dir) for path in image_paths}
+    todo = [(path, target, input_size, max_num) for path, target in targets.items() if not os.path.exists(target)]
+    if todo:
+        if workers == 0:
+            for args in todo:
+                _preprocess_one(args)
+        else:
+            with multiprocessing.get_context("spawn").Pool(workers) as pool:
+                for _ in pool.imap_unordered(_preprocess_one, todo):
+                    pass
+    return targets
+
+
+def load_pixels(path: str) -> np.ndarray:
+    return np.load(path, mmap_mode='r')
+
+
+# --- model backends ---
+def parse_json_response(response: str) -> dict:
+    # 응답 내에서 JSON 객체 부분을 찾습니다.
+    match = re.search(r'(\{.*\})', response, re.DOTALL)
+    if match:
+        json_str = match.group(1)
+        try:
+            return json.loads(json_str)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"JSON 파싱 실패: {e}")
+    else:
+        raise ValueError("응답에서 JSON 객체를 찾을 수 없습니다.")
+
+
+class StubBackend:
+    """Deterministic answers derived from the pixels and the prompt; for CPU-only runs and timing."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    def batch_score(self, pixel_values: np.ndarray, questions: List[str]) -> List[str]:
+        if self.delay:
+            time.sleep(self.delay)
+        pixel_hash = hashlib.sha1(np.ascontiguousarray(pixel_values[:, :, ::16, ::16]).tobytes()).digest()
+        responses = []
+        for question in questions:
+            digest = int(hashlib.sha1(pixel_hash + question.encode("utf-8")).hexdigest(), 16)
+            responses.append(json.dumps({"score": round((digest % 1001) / 1000, 3), "reason": "Stub evaluation."}))
+        return responses
+
+
+class InternVLBackend:
+    """InternVL2.5 chat model; one batch_chat call scores every question for an image."""
+
+    def __init__(self, path: str = "OpenGVLab/InternVL2_5-4B", device: str = "cuda:0",
+                 generation_config: Optional[dict] = None):
+        import torch  # pip install torch transformers
+        from transformers import AutoModel, AutoTokenizer
+
+        self.torch = torch
+        self.device = device
+        self.generation_config = generation_config or GENERATION_CONFIG
+        self.model = AutoModel.from_pretrained(
+            path,
+            torch_dtype=torch.bfloat16,
+            low_cpu_mem_usage=True,
+            use_flash_attn=True,
+            trust_remote_code=True).eval().to(device)
+        self.tokenizer = AutoTokenizer.from_pretrained(path, trust_remote_code=True, use_fast=False)
+
+    def batch_score(self, pixel_values: np.ndarray, questions: List[str]) -> List[str]:
+        torch = self.torch
+        pixels = torch.from_numpy(np.asarray(pixel_values, dtype=np.float32)).to(self.device, torch.bfloat16)
+        n = len(questions)
+        return self.model.batch_chat(self.tokenizer, pixels.repeat(n, 1, 1, 1),
+                                     num_patches_list=[pixels.shape[0]] * n,
+                                     questions=questions, generation_config=self.generation_config)
+
+
+BACKENDS: Dict[str, Callable[..., object]] = {"stub": StubBackend, "internvl": InternVLBackend}
+
+
+def register_backend(name: str, factory: Callable[..., object]) -> None:
+    BACKENDS[name] = factory
+
+
+def score_image(backend, pixel_values: np.ndarray, brands: Iterable[str] = BRANDS,
+                retries: int = 1) -> Dict[str, Dict[str, object]]:
+    """{brand: {"score", "reason"}} for one image; brands whose answer does not parse are asked again."""
+    results: Dict[str, Dict[str, object]] = {}
+    pending = list(brands)
+    for _ in range(retries + 1):
+        if not pending:
+            break
+        responses = backend.batch_score(pixel_values, [BRAND_PROMPTS[brand] for brand in pending])
+        failed = []
+        for brand, response in zip(pending, responses):
+            try:
+                result = parse_json_response(response)
+                results[brand] = {"score": float(result["score"]), "reason": result["reason"]}
+            except (ValueError, KeyError, TypeError) as e:
+                print(f"  {brand}: {e}")
+                failed.append(brand)
+        pending = failed
+    for brand in pending:
+        results[brand] = {"score": None, "reason": "Error during evaluation"}
+    return results
+
+
+def score_images(backend, caches: Dict[str, str], brands: Iterable[str] = BRANDS) -> Dict[str, List[list]]:
+    """{brand: [[influencer, score, reason], ...]} for every cached image."""
+    brands = list(brands)
+    rows: Dict[str, List[list]] = {brand: [] for brand in brands}
+    for image_path, cache_file in caches.items():
+        influencer = os.path.splitext(os.path.basename(image_path))[0]
+        results = score_image(backend, load_pixels(cache_file), brands)
+        for brand in brands:
+            rows[brand].append([influencer, results[brand]["score"], results[brand]["reason"]])
+    return rows
+
+
+def write_results(rows: Dict[str, List[list]], output_dir: str = ".") -> List[str]:
+    """top_100_{Brand}_appearance.csv per brand, best score first (same format as the existing files)."""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for brand, brand_rows in rows.items():
+        df = pd.DataFrame(brand_rows, columns=["influencer", "score", "reason"])
+        df = df.sort_values(by="score", ascending=False)
+        path = os.path.join(output_dir, os.path.basename(APPEARANCE_CSV.format(brand=brand)))
+        df.to_csv(path, index=False, quoting=csv.QUOTE_ALL, encoding="utf-8-sig")
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", default=IMAGE_DIR)
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="internvl")
+    parser.add_argument("--brands", nargs="+", choices=BRANDS, default=BRANDS)
+    parser.add_argument("--workers", type=int, default=None, help="preprocessing processes (0: no pool)")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--output-dir", default=None, help="where to write the CSVs (default: repository root)")
+    parser.add_argument("--limit", type=int, default=None, help="only the first N images (needs --output-dir)")
+    args = parser.parse_args()
+    if args.backend == "stub" and args.output_dir is None:
+        parser.error("the stub backend gives placeholder scores; pass --output-dir so the real CSVs are kept")
+    if args.limit is not None and args.output_dir is None:
+        parser.error("--limit scores only part of the roster; pass --output-dir so the real CSVs are kept")
+
+    image_paths = sorted(glob(os.path.join(args.images, "*.jpg")))[:args.limit]
+    if not image_paths:
+        raise SystemExit(f"No images in {args.images}")
+
+    start = time.perf_counter()
+    caches = preprocess_images(image_paths, args.workers, cache_dir=args.cache_dir)
+    elapsed = time.perf_counter() - start
+    print(f"Preprocessing: {len(image_paths)} images in {elapsed:.2f}s ({len(image_paths) / elapsed:.1f} images/s)")
+
+    backend = BACKENDS[args.backend]()
+    start = time.perf_counter()
+    rows = score_images(backend, caches, args.brands)
+    elapsed = time.perf_counter() - start
+    print(f"Scoring: {len(image_paths)} images x {len(args.brands)} brands in {elapsed:.2f}s "
+          f"({len(image_paths) / elapsed:.1f} images/s)")
+
+    for path in write_results(rows, args.output_dir or "."):
+        print(f"CSV 저장 완료: {path}")
+
+    # 실제 결과(기본 출력 위치)는 Parquet 데이터셋에도 반영
+    import dataset_store
+    if args.output_dir is None and dataset_store.exists():
+        frames = [pd.DataFrame(brand_rows, columns=["influencer", "score", "reason"]).assign(brand=brand)
+                  for brand, brand_rows in rows.items()]
+        written = dataset_store.upsert_appearance_scores(pd.concat(frames, ignore_index=True))
+        print(f"{written} rows updated in {dataset_store.store_path()}")
+
+
+if __name__ == "__main__":
+    main()
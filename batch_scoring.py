@@ -0,0 +1,366 @@
+"""
+Offline Batch API mode for the brand-suitability scoring in news_scoring.py.
+
+Batch requests cost half as much as synchronous calls and do not count
+against the interactive rate limits. The workflow has four steps, and
+"run" does all of them:
+
+    python batch_scoring.py prepare   # influencer x brand prompts -> batch_requests.jsonl
+    python batch_scoring.py submit    # upload + create the batch(es), ids saved to batch_state.json
+    python batch_scoring.py status    # poll once; download the output when done
+    python batch_scoring.py ingest    # batch_output.jsonl -> ad_suitability_results.csv
+    python batch_scoring.py run       # prepare, submit, wait, ingest
+
+prepare and ingest only read and write files, so they run offline.
+Every request has a stable custom_id ("<brand>::<influencer>"), and ingest
+uses it to join the answers back. Results replace the matching
+(brand, influencer) rows in the CSV and leave every other row unchanged;
+failed requests are counted but not merged, so earlier scores stay.
+
+With a score_cache.ScoreCache, prepare leaves out pairs whose prompt is
+already cached (their cached results are merged into the CSV right away)
+and ingest stores the new results in the cache.
+
+Note: requests.jsonl at the repository root holds other data, so batch
+files default to batch_requests.jsonl / batch_output.jsonl.
+"""
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from news_scoring import (INPUT_CSV_FILE, OUTPUT_CSV_FILE, SYSTEM_PROMPT, TEMPERATURE, build_user_prompt, get_client,
+                          parse_model_response)
+from score_cache import CACHE_PATH, ScoreCache, prompt_key
+from scoring_config import BRANDS, MODEL, criteria, read_corpus, validate_result
+
+REQUESTS_FILE = "batch_requests.jsonl"
+OUTPUT_FILE = "batch_output.jsonl"
+STATE_FILE = "batch_state.json"
+
+ENDPOINT = "/v1/chat/completions"
+# Batch API limits per input file
+MAX_REQUESTS_PER_FILE = 50_000
+MAX_BYTES_PER_FILE = 190 * 1024 * 1024
+
+FINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+SEPARATOR = "::"
+
+
+def make_custom_id(brand: str, influencer: str) -> str:
+    return f"{brand}{SEPARATOR}{influencer}"
+
+
+def split_custom_id(custom_id: str) -> Tuple[str, str]:
+    brand, influencer = custom_id.split(SEPARATOR, 1)
+    return brand, influencer
+
+
+def batch_request(influencer: str, brand: str, user_prompt: str, model: str = MODEL,
+                  system_prompt: str = SYSTEM_PROMPT) -> Dict[str, Any]:
+    """One line of a batch input file, with the same request as ScoringExecutor.evaluate."""
+    return {
+        "custom_id": make_custom_id(brand, influencer),
+        "method": "POST",
+        "url": ENDPOINT,
+        "body": {
+            "model": model,
+            "messages": [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
+            "temperature": TEMPERATURE,
+        },
+    }
+
+
+def request_key(request: Dict[str, Any]) -> str:
+    """Result-cache key of a batch request (same key as a synchronous call with the same prompt)."""
+    body = request["body"]
+    messages = {message["role"]: message["content"] for message in body["messages"]}
+    return prompt_key(body["model"], messages["system"], messages["user"], body["temperature"])
+
+
+def build_batch_requests(df: pd.DataFrame, brands: Iterable[str] = BRANDS, model: str = MODEL) -> List[Dict[str, Any]]:
+    """Batch requests for every influencer x brand pair of a corpus frame."""
+    requests_ = []
+    seen = set()
+    for _, row in df.iterrows():
+        influencer = row['influencer']
+        for brand in brands:
+            custom_id = make_custom_id(brand, influencer)
+            if custom_id in seen:  # custom_ids must be unique within a batch
+                continue
+            seen.add(custom_id)
+            user_prompt = build_user_prompt(
+                influencer, row['wikipedia_corpus'], row['updates_corpus'], brand, criteria.get(brand, ""))
+            requests_.append(batch_request(influencer, brand, user_prompt, model=model))
+    return requests_
+
+
+def write_batch_files(requests_: List[Dict[str, Any]], path: str = REQUESTS_FILE) -> List[str]:
+    """
+    Write the requests as JSONL, split into several files (x.jsonl, x.1.jsonl, ...)
+    when they exceed the per-file request or size limits.
+    """
+    root, ext = os.path.splitext(path)
+    paths: List[str] = []
+    f = None
+    count = size = 0
+    for request in requests_:
+        line = json.dumps(request, ensure_ascii=False) + "\n"
+        n_bytes = len(line.encode("utf-8"))
+        if f is None or count >= MAX_REQUESTS_PER_FILE or size + n_bytes > MAX_BYTES_PER_FILE:
+            if f is not None:
+                f.close()
+            paths.append(path if not paths else f"{root}.{len(paths)}{ext}")
+            f = open(paths[-1], "w", encoding="utf-8")
+            count = size = 0
+        f.write(line)
+        count += 1
+        size += n_bytes
+    if f is not None:
+        f.close()
+    return paths
+
+
+def request_paths(path: str = REQUESTS_FILE) -> List[str]:
+    """The input files written by write_batch_files for `path`."""
+    root, ext = os.path.splitext(path)
+    paths = [path]
+    while os.path.exists(f"{root}.{len(paths)}{ext}"):
+        paths.append(f"{root}.{len(paths)}{ext}")
+    return paths
+
+
+def prepare(input_csv: str = INPUT_CSV_FILE, path: str = REQUESTS_FILE,
+            brands: Iterable[str] = BRANDS, model: str = MODEL,
+            cache: Optional[ScoreCache] = None, refresh: bool = False,
+            output_csv: str = OUTPUT_CSV_FILE, shortlist: Optional[int] = None) -> List[str]:
+    df = read_corpus(input_csv)
+    requests_ = build_batch_requests(df, brands, model=model)
+    if shortlist is not None:
+        # only the top `shortlist` influencers per brand by embedding similarity
+        from embedding_index import shortlist_pairs
+        shortlisted = shortlist_pairs(df, brands, shortlist)
+        requests_ = [request for request in requests_ if split_custom_id(request["custom_id"]) in shortlisted]
+        print(f"Shortlist: {len(requests_)} pairs")
+    if cache is not None and not refresh:
+        cached_rows, pending = [], []
+        for request in requests_:
+            result = cache.get(request_key(request))
+            if result is None:
+                pending.append(request)
+            else:
+                brand, influencer = split_custom_id(request["custom_id"])
+                cached_rows.append({"brand": brand, "influencer": influencer, **result})
+        if cached_rows:
+            merge_results(cached_rows, output_csv)
+        print(f"{len(cached_rows)} cached results merged into {output_csv}")
+        requests_ = pending
+    # Remove split files left over from an earlier, larger batch
+    for stale in request_paths(path):
+        if os.path.exists(stale):
+            os.remove(stale)
+    if not requests_:
+        print("Nothing to score")
+        return []
+    paths = write_batch_files(requests_, path)
+    print(f"{len(requests_)} requests written to {', '.join(paths)}")
+    return paths
+
+
+# --- Batch API ---
+def submit(paths: List[str], client=None, state_file: str = STATE_FILE) -> List[str]:
+    """Upload the input files and create one batch per file; ids are saved to `state_file`."""
+    client = client or get_client()
+    batch_ids = []
+    for path in paths:
+        with open(path, "rb") as f:
+            uploaded = client.files.create(file=f, purpose="batch")
+        batch = client.batches.create(input_file_id=uploaded.id, endpoint=ENDPOINT, completion_window="24h",
+                                      metadata={"source": os.path.basename(path)})
+        print(f"Submitted {path} as batch {batch.id}")
+        batch_ids.append(batch.id)
+    with open(state_file, "w", encoding="utf-8") as f:
+        json.dump({"batch_ids": batch_ids, "submitted_at": time.time()}, f)
+    return batch_ids
+
+
+def load_batch_ids(state_file: str = STATE_FILE) -> List[str]:
+    with open(state_file, encoding="utf-8") as f:
+        return json.load(f)["batch_ids"]
+
+
+def check(batch_ids: List[str], client=None, output_path: str = OUTPUT_FILE) -> Optional[bool]:
+    """
+    Poll the batches once. None while any of them is still running; once all
+    are finished, write their output (and error) lines to `output_path` and
+    return True if every batch completed, or False if some ended failed,
+    expired or cancelled (their errors are printed, and whatever output they
+    produced is still written).
+    """
+    client = client or get_client()
+    batches = [client.batches.retrieve(batch_id) for batch_id in batch_ids]
+    for batch in batches:
+        counts = batch.request_counts
+        progress = f"{counts.completed}/{counts.total} done, {counts.failed} failed" if counts else ""
+        print(f"Batch {batch.id}: {batch.status} {progress}")
+    if not all(batch.status in FINAL_STATUSES for batch in batches):
+        return None
+
+    for batch in batches:
+        if batch.status != "completed":
+            for error in (batch.errors.data or []) if batch.errors else []:
+                line = f" (line {error.line})" if error.line else ""
+                print(f"  Batch {batch.id} error{line}: {error.code}: {error.message}")
+    with open(output_path, "w", encoding="utf-8") as out:
+        for batch in batches:
+            for file_id in (batch.output_file_id, batch.error_file_id):
+                if file_id:
+                    text = client.files.content(file_id).text
+                    out.write(text if text.endswith("\n") or not text else text + "\n")
+    print(f"Batch output saved to {output_path}")
+    return all(batch.status == "completed" for batch in batches)
+
+
+def wait(batch_ids: List[str], client=None, output_path: str = OUTPUT_FILE, interval: float = 60.0) -> bool:
+    """Poll until every batch is finished; same result as check."""
+    while True:
+        completed = check(batch_ids, client, output_path)
+        if completed is not None:
+            return completed
+        time.sleep(interval)
+
+
+# --- Ingestion ---
+def iter_output(lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Rows ({brand, influencer, score, reason}) from batch output/error JSONL
+    lines; errors and answers that fail validate_result get score None.
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        brand, influencer = split_custom_id(record["custom_id"])
+        response = record.get("response") or {}
+        if response.get("status_code") == 200:
+            content = response["body"]["choices"][0]["message"]["content"]
+            result = validate_result(parse_model_response(content))
+            if result is None:
+                print(f"Invalid answer for influencer {influencer} for brand {brand}: {content}")
+                result = {"score": None, "reason": "Error during evaluation"}
+        else:
+            error = record.get("error") or (response.get("body") or {}).get("error") or {}
+            print(f"Error processing influencer {influencer} for brand {brand}: {error.get('message', error)}")
+            result = {"score": None, "reason": "Error during evaluation"}
+        yield {"brand": brand, "influencer": influencer,
+               "score": result["score"], "reason": result["reason"]}
+
+
+def merge_results(rows: List[Dict[str, Any]], output_csv: str = OUTPUT_CSV_FILE) -> pd.DataFrame:
+    """
+    Replace the (brand, influencer) rows of `output_csv` that appear in `rows`
+    (brand names compared case-insensitively) and keep all other rows. The
+    Parquet dataset (dataset_store.py) is updated too when it exists.
+
+    Failed results (score None) are left out, so an earlier score for the same
+    pair is kept.
+    """
+    new = pd.DataFrame([row for row in rows if row["score"] is not None],
+                       columns=["brand", "influencer", "score", "reason"])
+    if os.path.exists(output_csv):
+        old = pd.read_csv(output_csv)
+        new_keys = set(zip(new["brand"].str.lower(), new["influencer"]))
+        keep = [(brand.lower(), influencer) not in new_keys
+                for brand, influencer in zip(old["brand"].astype(str), old["influencer"])]
+        merged = pd.concat([old[keep], new], ignore_index=True)
+    else:
+        merged = new
+    merged.to_csv(output_csv, index=False, encoding='utf-8')
+
+    import dataset_store
+    if dataset_store.exists() and len(new):
+        dataset_store.upsert_culture_scores(new)
+    return merged
+
+
+def ingest(output_path: str = OUTPUT_FILE, output_csv: str = OUTPUT_CSV_FILE,
+           cache: Optional[ScoreCache] = None, requests_path: str = REQUESTS_FILE) -> List[Dict[str, Any]]:
+    with open(output_path, encoding="utf-8") as f:
+        rows = list(iter_output(f))
+    merge_results(rows, output_csv)
+    failed = sum(row["score"] is None for row in rows)
+    print(f"{len(rows) - failed} results merged into {output_csv}, {failed} failed (not merged)")
+
+    if cache is not None:
+        # The cache key needs the prompts, which only the input files have
+        keys = {}
+        for path in request_paths(requests_path):
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    for line in f:
+                        request = json.loads(line)
+                        keys[request["custom_id"]] = (request_key(request), request["body"]["model"])
+        stored = 0
+        for row in rows:
+            key, model = keys.get(make_custom_id(row["brand"], row["influencer"]), (None, None))
+            if key is not None:
+                stored += cache.put(key, row, model, row["brand"], row["influencer"])
+        print(f"{stored} results added to the score cache")
+    return rows
+
+
+def run(input_csv: str = INPUT_CSV_FILE, requests_path: str = REQUESTS_FILE, output_path: str = OUTPUT_FILE,
+        output_csv: str = OUTPUT_CSV_FILE, interval: float = 60.0, client=None,
+        brands: Iterable[str] = BRANDS, cache: Optional[ScoreCache] = None,
+        refresh: bool = False, shortlist: Optional[int] = None) -> List[Dict[str, Any]]:
+    """prepare -> submit -> wait -> ingest."""
+    paths = prepare(input_csv, requests_path, brands=brands, cache=cache, refresh=refresh, output_csv=output_csv,
+                    shortlist=shortlist)
+    if not paths:
+        return []
+    batch_ids = submit(paths, client)
+    if not wait(batch_ids, client, output_path, interval=interval):
+        if os.path.getsize(output_path) == 0:
+            raise RuntimeError(f"No batch completed and {output_path} is empty; see the batch errors above")
+        print("Not every batch completed; merging the results they produced")
+    return ingest(output_path, output_csv, cache=cache, requests_path=requests_path)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["prepare", "submit", "status", "ingest", "run"])
+    parser.add_argument("--input", default=INPUT_CSV_FILE, help="corpus CSV (influencer, wikipedia_corpus, updates_corpus)")
+    parser.add_argument("--requests", default=REQUESTS_FILE, help="batch input JSONL")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="downloaded batch output JSONL")
+    parser.add_argument("--results", default=OUTPUT_CSV_FILE, help="results CSV to merge into")
+    parser.add_argument("--interval", type=float, default=60.0, help="seconds between status polls")
+    parser.add_argument("--cache", default=CACHE_PATH, help="result cache (skip cached pairs, store new results)")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the result cache")
+    parser.add_argument("--refresh", action="store_true", help="re-score every pair (the cache is still updated)")
+    parser.add_argument("--shortlist", type=int, default=None, metavar="K",
+                        help="only score the K influencers per brand closest to the brand criteria")
+    args = parser.parse_args(argv)
+    cache = None if args.no_cache else ScoreCache(args.cache)
+
+    if args.command == "prepare":
+        prepare(args.input, args.requests, cache=cache, refresh=args.refresh, output_csv=args.results,
+                shortlist=args.shortlist)
+    elif args.command == "submit":
+        submit([path for path in request_paths(args.requests) if os.path.exists(path)])
+    elif args.command == "status":
+        check(load_batch_ids(), output_path=args.output)
+    elif args.command == "ingest":
+        ingest(args.output, args.results, cache=cache, requests_path=args.requests)
+    else:
+        run(args.input, args.requests, args.output, args.results, args.interval, cache=cache, refresh=args.refresh,
+            shortlist=args.shortlist)
+    if cache is not None:
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
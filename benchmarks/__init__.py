@@ -0,0 +1,9 @@
+"""
+Reproducible benchmarks (python -m benchmarks.<name> --help):
+
+- bench_app: app.py load -> merge -> score -> render on synthetic rosters
+- bench_extract: HTML-to-text extraction backends
+- bench_fetch: fetch_page_text against a local page server
+- bench_scoring: response parsing and scoring throughput against the mock OpenAI server
+- synthetic: 1k / 10k / 100k influencer datasets with fake photos
+"""
@@ -0,0 +1,149 @@
+"""
+The app.py path on synthetic rosters: load -> merge -> score -> filter ->
+sort -> render, per stage and roster size.
+
+    python -m benchmarks.bench_app                          # 1k and 10k influencers
+    python -m benchmarks.bench_app --sizes 1000 10000 100000 --no-images
+    python -m benchmarks.bench_app --store                  # also the Parquet dataset store
+    python -m benchmarks.bench_app --apptest                # also full Streamlit reruns (AppTest)
+
+Stages are timed the way the app runs them: "load (cold)" builds the
+influencer x brand table from the CSVs (read + merge), "load (warm)" is a
+rerun that hits the in-process cache. "render" turns one page into HTML,
+the first time creating the thumbnails ("render (cold)").
+Datasets are generated once under bench_data/ (benchmarks/synthetic.py).
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence
+
+import data_layer
+from benchmarks.synthetic import DATA_ROOT, ensure_dataset
+from ranking import weighted_score
+from results_table import SORT_COLUMNS, filter_rows, order_rows, to_html_table
+
+BRAND = "Lyft"
+PAGE_SIZE = 25
+WEIGHTS = {"appearance_score": 0.2, "culture_fit_score": 0.8}
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+@contextmanager
+def working_dir(path: str):
+    # The app and the thumbnail cache use paths relative to the working directory
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def measure(func: Callable[[], object], repeat: int, setup: Optional[Callable[[], None]] = None) -> float:
+    """Median seconds of `repeat` calls (setup runs untimed before each)."""
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def clear_caches() -> None:
+    data_layer._build_table.cache_clear()
+    data_layer._read_store_view.cache_clear()
+
+
+def bench_pipeline(data_dir: str, repeat: int, store: bool = False) -> Dict[str, float]:
+    """Seconds per app stage for the dataset in `data_dir`."""
+    import shutil
+
+    import dataset_store
+
+    results = {}
+    with working_dir(data_dir):
+        # data_layer reads the store whenever it exists
+        shutil.rmtree(dataset_store.store_path("."), ignore_errors=True)
+        if store:
+            dataset_store.convert(".")
+        label = "store" if store else "csv"
+        load = lambda: data_layer.load_brand_view(BRAND, ".")
+        results[f"load (cold, {label})"] = measure(load, repeat, setup=clear_caches)
+        results[f"load (warm, {label})"] = measure(load, repeat)
+
+        df = load()
+        results["score"] = measure(lambda: weighted_score(df, WEIGHTS), repeat)
+        df["total_score"] = weighted_score(df, WEIGHTS)
+        results["filter"] = measure(lambda: filter_rows(df, "an", []), repeat)
+        column = SORT_COLUMNS["Total Score"]
+        results["sort (page 1)"] = measure(lambda: order_rows(df, column, ascending=False, k=PAGE_SIZE), repeat)
+        results["sort (full)"] = measure(lambda: order_rows(df, column, ascending=False), repeat)
+
+        page = order_rows(df, column, ascending=False, k=PAGE_SIZE).iloc[:PAGE_SIZE]
+        shutil.rmtree("static", ignore_errors=True)
+        results["render (cold)"] = measure(lambda: to_html_table(page, image_dir="./top_100_images"), 1)
+        results["render"] = measure(lambda: to_html_table(page, image_dir="./top_100_images"), repeat)
+        if store:
+            shutil.rmtree(dataset_store.store_path("."), ignore_errors=True)
+    return results
+
+
+def bench_apptest(data_dir: str, repeat: int) -> Dict[str, float]:
+    """Full script runs: the first one in a fresh process state, then widget-triggered reruns."""
+    from streamlit.testing.v1 import AppTest
+
+    with working_dir(data_dir):
+        clear_caches()
+        app = AppTest.from_file(APP_PATH, default_timeout=600)
+        start = time.perf_counter()
+        app.run()
+        first = time.perf_counter() - start
+        if app.exception:
+            raise RuntimeError(app.exception)
+        slider = app.slider[0]
+
+        def rerun():
+            slider.set_value(0.3 if slider.value != 0.3 else 0.4).run()
+
+        return {"app run (first)": first, "app rerun (slider)": measure(rerun, repeat)}
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--root", default=DATA_ROOT, help="where the synthetic datasets are kept")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-images", action="store_true", help="generate the datasets without photos")
+    parser.add_argument("--store", action="store_true", help="also load from the Parquet dataset store")
+    parser.add_argument("--apptest", action="store_true", help="also time whole Streamlit runs with AppTest")
+    parser.add_argument("--json", help="write the results to this file (for comparing runs)")
+    args = parser.parse_args(argv)
+
+    results: Dict[int, Dict[str, float]] = {}
+    for n in args.sizes:
+        data_dir = os.path.abspath(ensure_dataset(n, args.root, images=not args.no_images))
+        results[n] = bench_pipeline(data_dir, args.repeat)
+        if args.store:
+            results[n].update({k: v for k, v in bench_pipeline(data_dir, args.repeat, store=True).items()
+                               if k.startswith("load")})
+        if args.apptest:
+            results[n].update(bench_apptest(data_dir, args.repeat))
+
+    stages: List[str] = list(dict.fromkeys(stage for r in results.values() for stage in r))
+    print(f"{'stage (ms)':<24}" + "".join(f"{n:>12,}" for n in args.sizes))
+    for stage in stages:
+        print(f"{stage:<24}" + "".join(
+            f"{1000 * results[n][stage]:>12.1f}" if stage in results[n] else f"{'-':>12}" for n in args.sizes))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"benchmark": "app", "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Parse time and output size of the extraction backends vs. the original
+fetch_page_text parsing (BeautifulSoup html.parser, whole document, commas
+removed).
+
+    python -m benchmarks.bench_extract                      # generated fixtures
+    python -m benchmarks.bench_extract --pages-dir saved/   # *.html files
+    python -m benchmarks.bench_extract --cache crawl_cache.sqlite
+"""
+import argparse
+import glob
+import os
+import time
+from typing import Callable, Dict
+
+from bs4 import BeautifulSoup
+
+from benchmarks.fixtures import fixture_pages
+from extract import EXTRACTORS, extract_text
+
+
+def legacy_html_to_text(html: str) -> str:
+    """The parsing done by crawl.fetch_page_text before the extract module."""
+    soup = BeautifulSoup(html, 'html.parser')
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    text = soup.get_text(separator=" ", strip=True)
+    return text.replace(",", "")
+
+
+def load_pages(pages_dir: str = None, cache_path: str = None, n_influencers: int = 10) -> Dict[str, str]:
+    if pages_dir:
+        pages = {}
+        for path in sorted(glob.glob(os.path.join(pages_dir, "*.htm*"))):
+            with open(path, encoding="utf-8", errors="replace") as f:
+                pages[os.path.basename(path)] = f.read()
+        return pages
+    if cache_path:
+        from fetch_cache import FetchCache
+        cache = FetchCache(cache_path)
+        pages = dict(cache.iter_html())
+        cache.close()
+        return pages
+    return fixture_pages(n_influencers)
+
+
+def bench(func: Callable[[str], str], pages: Dict[str, str], repeat: int = 3) -> Dict[str, float]:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        outputs = [func(html) for html in pages.values()]
+        best = min(best, time.perf_counter() - start)
+    return {
+        "seconds": best,
+        "ms_per_page": 1000 * best / len(pages),
+        "output_chars": sum(len(text) for text in outputs),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages-dir", help="directory of saved .html pages")
+    parser.add_argument("--cache", help="read pages from a crawl fetch cache")
+    parser.add_argument("--influencers", type=int, default=10, help="number of generated fixture sets")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages_dir, args.cache, args.influencers)
+    if not pages:
+        raise SystemExit("No pages found")
+    input_chars = sum(len(html) for html in pages.values())
+    print(f"{len(pages)} pages, {input_chars / 1e6:.1f}M characters of HTML")
+
+    candidates = {"legacy (bs4 html.parser)": legacy_html_to_text}
+    for name in EXTRACTORS:
+        candidates[name] = lambda html, name=name: extract_text(html, backend=name)
+
+    baseline = None
+    print(f"{'extractor':<26}{'ms/page':>10}{'speedup':>10}{'output chars':>15}{'size':>8}")
+    for label, func in candidates.items():
+        result = bench(func, pages, args.repeat)
+        baseline = baseline or result
+        print(f"{label:<26}{result['ms_per_page']:>10.2f}"
+              f"{baseline['seconds'] / result['seconds']:>9.1f}x"
+              f"{result['output_chars']:>15,}"
+              f"{result['output_chars'] / baseline['output_chars']:>8.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+fetch_page_text against a local page server (mock_servers.PageServer):
+the requests fetch crawl.py used before CrawlEngine (one page at a time)
+and CrawlEngine.fetch_page_text (aiohttp, concurrent), split into time
+spent on the network and time spent parsing the HTML.
+
+    python -m benchmarks.bench_fetch
+    python -m benchmarks.bench_fetch --pages 500 --latency 0.05 --paragraphs 80
+
+Parsing is measured separately on the same HTML (extract.extract_text), so
+"network" is total minus parse. The server runs in a background thread with
+its own event loop.
+"""
+import argparse
+import asyncio
+import json
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
+
+import requests
+
+from crawl_engine import HEADERS, CrawlEngine
+from extract import extract_text
+from mock_servers import PageServer
+
+
+class ThreadedPageServer:
+    """PageServer in a background thread, so the synchronous baseline can use it."""
+
+    def __init__(self, **kwargs):
+        self.server = PageServer(**kwargs)
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+
+    def __enter__(self) -> PageServer:
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.server.__aenter__(), self._loop).result()
+        return self.server
+
+    def __exit__(self, *exc) -> None:
+        asyncio.run_coroutine_threadsafe(self.server.__aexit__(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+
+def page_urls(server: PageServer, n: int) -> List[str]:
+    return [f"{server.base_url}/news/{i % 10}/influencer-{i}" for i in range(n)]
+
+
+def fetch_page_text(url: str) -> str:
+    """The per-page fetch crawl.py did before CrawlEngine (kept as the baseline)."""
+    try:
+        response = requests.get(url, headers=HEADERS, timeout=10)
+        if response.status_code == 200:
+            return extract_text(response.text)
+    except Exception as e:
+        print(f"Error fetching {url}: {e}")
+    return ""
+
+
+def bench_sync(urls: List[str]) -> Dict[str, float]:
+    start = time.perf_counter()
+    texts = [fetch_page_text(url) for url in urls]
+    total = time.perf_counter() - start
+    return {"seconds": total, "chars": sum(map(len, texts))}
+
+
+def bench_async(urls: List[str], concurrency: int) -> Dict[str, float]:
+    async def run():
+        engine = CrawlEngine(concurrency=concurrency, per_host_connections=concurrency, domain_interval=0)
+        async with engine:
+            return await asyncio.gather(*(engine.fetch_page_text(url) for url in urls))
+
+    start = time.perf_counter()
+    texts = asyncio.run(run())
+    total = time.perf_counter() - start
+    return {"seconds": total, "chars": sum(map(len, texts))}
+
+
+def bench_parse(htmls: List[str]) -> float:
+    start = time.perf_counter()
+    for html in htmls:
+        extract_text(html)
+    return time.perf_counter() - start
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated server latency (seconds)")
+    parser.add_argument("--paragraphs", type=int, default=20, help="article paragraphs per page")
+    parser.add_argument("--concurrency", type=int, default=16, help="CrawlEngine concurrency")
+    parser.add_argument("--json", help="write the results to this file (for comparing runs)")
+    args = parser.parse_args(argv)
+
+    with ThreadedPageServer(latency=args.latency, paragraphs=args.paragraphs) as server:
+        urls = page_urls(server, args.pages)
+        htmls = [requests.get(url, headers=HEADERS, timeout=10).text for url in urls]
+        parse = bench_parse(htmls)
+        results = {
+            "requests (sequential)": bench_sync(urls),
+            f"CrawlEngine (x{args.concurrency})": bench_async(urls, args.concurrency),
+        }
+
+    print(f"{args.pages} pages, {sum(map(len, htmls)) / 1e6:.1f}M characters of HTML, "
+          f"parse {1000 * parse / args.pages:.2f} ms/page")
+    print(f"{'fetcher':<26}{'pages/s':>10}{'ms/page':>10}{'parse':>8}{'network':>9}")
+    for label, result in results.items():
+        seconds = result["seconds"]
+        # parsing is CPU-bound (CrawlEngine threads share the GIL), so it costs the same time in both
+        print(f"{label:<26}{args.pages / seconds:>10.1f}{1000 * seconds / args.pages:>10.2f}"
+              f"{parse / seconds:>8.0%}{max(0.0, 1 - parse / seconds):>9.0%}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"benchmark": "fetch", "pages": args.pages, "parse_seconds": parse, "results": results}, f,
+                      indent=2)
+
+
+if __name__ == "__main__":
+    main()
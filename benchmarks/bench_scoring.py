@@ -0,0 +1,136 @@
+"""
+Response parsing and scoring throughput against the mock OpenAI server.
+
+- parse: parse_model_response / parse_multi_brand_response on deterministic
+  responses (plain JSON, ```json fenced, and malformed ones)
+- scoring: ScoringExecutor over synthetic influencers against
+  mock_servers.MockOpenAIServer, one request per pair and one per
+  influencer (--multi-brand style)
+
+    python -m benchmarks.bench_scoring
+    python -m benchmarks.bench_scoring --influencers 200 --latency 0.2 --workers 16
+"""
+import argparse
+import contextlib
+import io
+import json
+import random
+import time
+from typing import Dict, List, Optional, Sequence
+
+from openai import OpenAI
+
+from benchmarks.fixtures import _paragraph
+from mock_servers import MockOpenAIServer, mock_evaluation
+from news_scoring import build_user_prompt, parse_model_response, parse_multi_brand_response
+from scoring_config import BRANDS, criteria
+from scoring_executor import MultiBrandJob, ScoringExecutor, ScoringJob
+
+
+def sample_responses(n: int, seed: int = 0) -> List[str]:
+    """Single-brand responses; about a tenth fenced and a twentieth malformed, like real model output."""
+    rng = random.Random(seed)
+    responses = []
+    for i in range(n):
+        content = json.dumps(mock_evaluation(str(i)) | {"reason": _paragraph(rng, f"Person {i}", 2)})
+        roll = rng.random()
+        if roll < 0.1:
+            content = f"```json\n{content}\n```"
+        elif roll < 0.15:
+            content = content[:-5]
+        responses.append(content)
+    return responses
+
+
+def sample_multi_responses(n: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    return [json.dumps({"brands": {brand: mock_evaluation(f"{brand}{i}") | {"reason": _paragraph(rng, brand, 1)}
+                                   for brand in BRANDS}})
+            for i in range(n)]
+
+
+def bench_parse(n: int, repeat: int = 3) -> Dict[str, float]:
+    """Microseconds per call."""
+    single, multi = sample_responses(n), sample_multi_responses(n)
+    results = {}
+    for label, func, inputs in (("parse_model_response", parse_model_response, single),
+                                ("parse_multi_brand_response",
+                                 lambda content: parse_multi_brand_response(content, BRANDS), multi)):
+        best = float("inf")
+        for _ in range(repeat):
+            # malformed responses are reported with print(); keep them off the terminal
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                for content in inputs:
+                    func(content)
+                best = min(best, time.perf_counter() - start)
+        results[label] = 1e6 * best / n
+    return results
+
+
+def synthetic_corpus(n: int, seed: int = 0, paragraphs: int = 8) -> List[Dict[str, str]]:
+    rng = random.Random(seed)
+    return [{"influencer": f"Influencer {i}",
+             "wikipedia_corpus": "\n\n".join(_paragraph(rng, f"Influencer {i}") for _ in range(paragraphs)),
+             "updates_corpus": "\n\n".join(_paragraph(rng, f"Influencer {i}") for _ in range(paragraphs // 2))}
+            for i in range(n)]
+
+
+def bench_scoring(n_influencers: int, latency: float, workers: int, multi_brand: bool) -> Dict[str, float]:
+    corpus = synthetic_corpus(n_influencers)
+    if multi_brand:
+        jobs = [MultiBrandJob(row["influencer"], list(BRANDS), row["wikipedia_corpus"], row["updates_corpus"])
+                for row in corpus]
+    else:
+        jobs = [ScoringJob(row["influencer"], brand,
+                           build_user_prompt(row["influencer"], row["wikipedia_corpus"], row["updates_corpus"],
+                                             brand, criteria.get(brand, "")))
+                for row in corpus for brand in BRANDS]
+    with MockOpenAIServer(latency=latency) as server:
+        client = OpenAI(api_key="mock", base_url=server.base_url)
+        # rate limits far above what the mock can serve, so only latency and overhead are measured
+        executor = ScoringExecutor(client=client, max_workers=workers, rpm=1e9, tpm=1e12)
+        start = time.perf_counter()
+        results = executor.run(jobs)
+        seconds = time.perf_counter() - start
+    rows = [row for result in results for row in (result if isinstance(result, list) else [result])]
+    return {
+        "requests": executor.stats["requests"],
+        "pairs": len(rows),
+        "failed": sum(row["score"] is None for row in rows),
+        "seconds": seconds,
+        "pairs_per_s": len(rows) / seconds,
+        "requests_per_s": executor.stats["requests"] / seconds,
+        "prompt_tokens": server.stats["prompt_tokens"],
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--responses", type=int, default=10_000, help="responses to parse")
+    parser.add_argument("--influencers", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated model latency (seconds)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--json", help="write the results to this file (for comparing runs)")
+    args = parser.parse_args(argv)
+
+    parse = bench_parse(args.responses)
+    print(f"{'parser':<28}{'us/call':>10}")
+    for label, micros in parse.items():
+        print(f"{label:<28}{micros:>10.1f}")
+
+    scoring = {mode: bench_scoring(args.influencers, args.latency, args.workers, mode == "multi-brand")
+               for mode in ("per pair", "multi-brand")}
+    print(f"\n{args.influencers} influencers x {len(BRANDS)} brands, {args.latency * 1000:.0f} ms latency, "
+          f"{args.workers} workers")
+    print(f"{'mode':<14}{'requests':>10}{'seconds':>10}{'pairs/s':>10}{'req/s':>8}{'prompt tokens':>15}{'failed':>8}")
+    for mode, r in scoring.items():
+        print(f"{mode:<14}{r['requests']:>10}{r['seconds']:>10.2f}{r['pairs_per_s']:>10.1f}"
+              f"{r['requests_per_s']:>8.1f}{r['prompt_tokens']:>15,}{r['failed']:>8}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"benchmark": "scoring", "parse_us": parse, "scoring": scoring}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
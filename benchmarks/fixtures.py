@@ -0,0 +1,108 @@
+"""
+Deterministic HTML fixtures shaped like the pages crawl.py downloads.
+
+The fixtures reproduce the structure that matters for extraction cost and
+output size: a Wikipedia article (infobox, table of contents, edit links,
+references, navboxes), a news/magazine article (header, nav, sidebar,
+footer, scripts) and a page of nested <div>s without semantic tags.
+"""
+import random
+from typing import Dict, List
+
+WORDS = (
+    "actor producer singer album tour film series award nominated festival brand campaign "
+    "fitness family community charity launched released starred interview premiere record "
+    "streaming audience followers collaboration fashion beauty wellness sports energy season "
+    "director studio network critics acclaimed debut sustainable cooking travel podcast"
+).split()
+
+
+def _sentence(rng: random.Random, name: str) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 22))]
+    words.insert(rng.randint(0, len(words)), name)
+    sentence = " ".join(words)
+    return sentence[0].upper() + sentence[1:] + rng.choice([".", ".", ".", "!", "?"])
+
+
+def _paragraph(rng: random.Random, name: str, n: int = 5) -> str:
+    return " ".join(_sentence(rng, name) for _ in range(n))
+
+
+def _links(rng: random.Random, n: int) -> str:
+    return "".join(f'<li><a href="/wiki/Link_{rng.randint(0, 10**6)}">{rng.choice(WORDS).title()}</a></li>'
+                   for _ in range(n))
+
+
+def _script(rng: random.Random, kb: int) -> str:
+    return "<script>" + "var x%d = %d;" % (rng.randint(0, 999), rng.randint(0, 999)) * (kb * 60) + "</script>"
+
+
+def wikipedia_page(name: str, seed: int = 0, sections: int = 12) -> str:
+    rng = random.Random(seed)
+    body = []
+    for s in range(sections):
+        body.append(f'<h2>Section {s}<span class="mw-editsection">[<a href="#">edit</a>]</span></h2>')
+        for _ in range(rng.randint(2, 5)):
+            refs = "".join(f'<sup class="reference"><a href="#cite-{rng.randint(1, 300)}">[{rng.randint(1, 300)}]</a></sup>'
+                           for _ in range(rng.randint(0, 3)))
+            body.append(f"<p>{_paragraph(rng, name)}{refs}</p>")
+    infobox = "".join(f"<tr><th>{rng.choice(WORDS).title()}</th><td>{_sentence(rng, name)}</td></tr>" for _ in range(12))
+    references = "".join(f'<li id="cite-{i}">{_sentence(rng, name)} Retrieved 2024.</li>' for i in range(200))
+    navboxes = "".join(f'<div class="navbox"><table><tr><td><ul>{_links(rng, 80)}</ul></td></tr></table></div>'
+                       for _ in range(4))
+    return (
+        f"<!DOCTYPE html><html><head><title>{name} - Wikipedia</title>{_script(rng, 40)}"
+        f"<style>{'.c{color:red}' * 2000}</style></head><body>"
+        f'<a class="mw-jump-link" href="#content">Jump to content</a>'
+        f'<header><nav><ul>{_links(rng, 60)}</ul></nav></header>'
+        f'<div id="content"><h1>{name}</h1><div id="mw-content-text">'
+        f'<div class="hatnote">For other uses, see {name} (disambiguation).</div>'
+        f'<table class="infobox">{infobox}</table>'
+        f'<div id="toc" class="toc"><ul>{_links(rng, sections)}</ul></div>'
+        f'{"".join(body)}'
+        f'<div class="reflist"><ol class="references">{references}</ol></div>'
+        f'{navboxes}</div>'
+        f'<div class="catlinks">Categories: {" | ".join(rng.choice(WORDS) for _ in range(30))}</div></div>'
+        f'<footer>{_links(rng, 40)} Text is available under the Creative Commons license.</footer>'
+        f"</body></html>"
+    )
+
+
+def news_page(name: str, seed: int = 0, paragraphs: int = 10) -> str:
+    rng = random.Random(seed)
+    article = "".join(f"<p>{_paragraph(rng, name)}</p>" for _ in range(paragraphs))
+    teasers = "".join(f'<div class="teaser"><a href="#">{_sentence(rng, "Celebrity")}</a></div>' for _ in range(40))
+    return (
+        f"<html><head><title>{name} news</title>{_script(rng, 120)}</head><body>"
+        f'<header><nav><ul>{_links(rng, 120)}</ul></nav><form><input name="q"><button>Search</button></form></header>'
+        f'<main><article><h1>{_sentence(rng, name)}</h1>{article}</article></main>'
+        f"<aside>{teasers}</aside>"
+        f'<div class="newsletter">Sign up for our newsletter, and never miss a story!</div>'
+        f"<footer>{_links(rng, 80)} Privacy policy, terms of use, cookie settings.</footer>"
+        f"{_script(rng, 60)}</body></html>"
+    )
+
+
+def div_soup_page(name: str, seed: int = 0, paragraphs: int = 8) -> str:
+    rng = random.Random(seed)
+    menu = "".join(f'<div class="menu-item"><a href="#">{rng.choice(WORDS)}</a></div>' for _ in range(150))
+    story = "".join(f"<p>{_paragraph(rng, name)}</p>" for _ in range(paragraphs))
+    related = "".join(f"<div><p>{_sentence(rng, 'Someone')}</p></div>" for _ in range(20))
+    return (
+        f"<html><head>{_script(rng, 80)}</head><body>"
+        f'<div class="top"><div class="menu">{menu}</div></div>'
+        f'<div class="wrap"><div class="col"><div class="story">{story}</div></div>'
+        f'<div class="col2">{related}</div></div>'
+        f'<div class="bottom">{_links(rng, 60)}</div></body></html>'
+    )
+
+
+def fixture_pages(n_influencers: int = 10) -> Dict[str, str]:
+    """{fixture name: html}; one page of each kind per influencer, like one crawl."""
+    pages: Dict[str, str] = {}
+    names: List[str] = [f"Influencer {i}" for i in range(n_influencers)]
+    for i, name in enumerate(names):
+        pages[f"wiki-{i}"] = wikipedia_page(name, seed=i)
+        pages[f"news-{i}"] = news_page(name, seed=i)
+        pages[f"divs-{i}"] = div_soup_page(name, seed=i)
+    return pages
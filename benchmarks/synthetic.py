@@ -0,0 +1,180 @@
+"""
+Synthetic influencer rosters shaped like the dashboard data, for benchmarks.
+
+For n influencers, writes into one directory:
+- top_100.csv (same columns; a few rows without Instagram link or followers,
+  which the dashboard drops)
+- top_100_{Brand}_appearance.csv for every brand (about 95% of the roster)
+- ad_suitability_results.csv (every influencer x brand pair, mixed brand case)
+- top_100_images/<influencer>.jpg (small distinct JPEGs)
+
+Output is deterministic for a given (n, seed), and a directory that was
+already generated with the same parameters is reused.
+
+    python -m benchmarks.synthetic --sizes 1000 10000 100000
+    python -m benchmarks.synthetic --sizes 100000 --no-images
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+from data_layer import APPEARANCE_CSV, BRANDS, CULTURE_CSV, META_CSV
+
+DATA_ROOT = "bench_data"
+IMAGE_DIR = "top_100_images"
+IMAGE_SIZE = (120, 180)  # width, height; the real photos are 600x900
+PARAMS_FILE = "synthetic.json"
+
+FIRST_NAMES = (
+    "Aaron Alex Alicia Andre Ariana Ben Bianca Carlos Chloe Chris Dana David Elena Emma Ethan Gina Grace Hana "
+    "Isaac Jada Jake James Jenna Jordan Kai Kendall Kevin Lana Leo Lily Lucas Maya Mia Nate Nina Noah Olivia "
+    "Omar Paige Priya Quinn Rafael Rosa Ryan Sara Sofia Theo Tyler Vanessa Victor Yara Zach Zoe"
+).split()
+LAST_NAMES = (
+    "Adams Baker Brooks Campbell Carter Chen Cruz Davis Diaz Edwards Evans Fischer Garcia Gomez Gray Hall "
+    "Harris Hughes Jackson Johnson Kim Lee Lopez Martin Miller Moore Morgan Murphy Nguyen Ortiz Park Patel "
+    "Perez Reed Rivera Roberts Rossi Sanchez Scott Silva Smith Stewart Taylor Thomas Turner Walker Ward "
+    "White Williams Wilson Wood Young"
+).split()
+CATEGORIES = ["Actor", "Music Artist", "Content Creator", "Personality", "Stand-Up Comedian", "Athlete",
+              "Rapper", "Singer", "Fashion Model", "Director"]
+# Roughly the category mix of top_100.csv
+CATEGORY_WEIGHTS = [0.45, 0.2, 0.08, 0.06, 0.05, 0.05, 0.03, 0.03, 0.03, 0.02]
+WORDS = (
+    "the individual has a friendly approachable modern polished look with warm smile confident posture "
+    "casual athletic style that aligns well with brand values energy wellness community lifestyle "
+    "audience authentic engaging trustworthy professional premium vibrant clean aesthetic presence"
+).split()
+
+
+def influencer_names(n: int) -> list:
+    """n unique, deterministic "First Last" names (a number is added once the combinations run out)."""
+    names = []
+    combos = len(FIRST_NAMES) * len(LAST_NAMES)
+    for i in range(n):
+        name = f"{FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]}"
+        names.append(name if i < combos else f"{name} {i // combos + 1}")
+    return names
+
+
+def _sentences(rng: np.random.Generator, n: int, words: int) -> list:
+    picks = rng.integers(0, len(WORDS), size=(n, words))
+    vocabulary = np.array(WORDS)
+    return [" ".join(row).capitalize() + "." for row in vocabulary[picks]]
+
+
+def meta_frame(names: Sequence[str], rng: np.random.Generator) -> pd.DataFrame:
+    n = len(names)
+    accounts = [name.lower().replace(" ", "") for name in names]
+    followers = (10 ** rng.uniform(4, 8.5, n)).astype(np.int64).astype(str).astype(object)
+    instagram = np.array([f"https://instagram.com/{a}" for a in accounts], dtype=object)
+    # a few rows without link / followers, as in the crawled data
+    instagram[rng.random(n) < 0.02] = ""
+    followers[rng.random(n) < 0.02] = ""
+    days = rng.integers(0, 400, n)
+    return pd.DataFrame({
+        "url": [f"https://example.com/images/{i:07d}.jpg" for i in range(n)],
+        "influencer": names,
+        "category": rng.choice(CATEGORIES, n, p=CATEGORY_WEIGHTS),
+        "description": [f"{name} is an entertainer and public figure. {s}"[:103] + "..."
+                        for name, s in zip(names, _sentences(rng, n, 12))],
+        "instagram": instagram,
+        "account": accounts,
+        "instagram_account": accounts,
+        "last_timestamp": (np.datetime64("2025-02-01") - days.astype("timedelta64[D]")).astype(str),
+        "last_followers": followers,
+        "last_following": rng.integers(0, 5000, n),
+        "last_media": rng.integers(0, 8000, n),
+    })
+
+
+def score_frame(names: Sequence[str], rng: np.random.Generator, words: int) -> pd.DataFrame:
+    return pd.DataFrame({
+        "influencer": names,
+        # scores are coarse, like the model's (0.6, 0.75, 0.85, ...)
+        "score": np.round(rng.beta(5, 2, len(names)) * 20) / 20,
+        "reason": _sentences(rng, len(names), words),
+    })
+
+
+def write_images(names: Sequence[str], image_dir: str, rng: np.random.Generator,
+                 size: Tuple[int, int] = IMAGE_SIZE) -> None:
+    """A distinct JPEG per influencer: an upscaled grid of random colour blocks."""
+    os.makedirs(image_dir, exist_ok=True)
+    for name in names:
+        blocks = rng.integers(0, 256, size=(6, 4, 3), dtype=np.uint8)
+        Image.fromarray(blocks).resize(size, Image.BILINEAR).save(
+            os.path.join(image_dir, f"{name}.jpg"), "JPEG", quality=70)
+
+
+def generate(out_dir: str, n: int, seed: int = 0, images: bool = True,
+             image_size: Tuple[int, int] = IMAGE_SIZE) -> Dict[str, float]:
+    """Write a synthetic dataset of `n` influencers to `out_dir`; returns generation timings."""
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    timings = {}
+    start = time.perf_counter()
+    names = influencer_names(n)
+    meta_frame(names, rng).to_csv(os.path.join(out_dir, META_CSV), index=False, encoding="utf-8-sig",
+                                  quoting=csv.QUOTE_ALL)
+
+    culture = []
+    for brand in BRANDS:
+        appearance = score_frame(names, rng, 35)
+        appearance = appearance[rng.random(n) < 0.95].sort_values("score", ascending=False)
+        appearance.to_csv(os.path.join(out_dir, APPEARANCE_CSV.format(brand=brand)), index=False,
+                          encoding="utf-8-sig", quoting=csv.QUOTE_ALL)
+        fit = score_frame(names, rng, 40)
+        # ad_suitability_results.csv has been written with both "Lyft" and "lyft"
+        fit.insert(0, "brand", np.where(rng.random(n) < 0.1, brand.lower(), brand))
+        culture.append(fit)
+    pd.concat(culture, ignore_index=True).to_csv(os.path.join(out_dir, CULTURE_CSV), index=False,
+                                                 encoding="utf-8")
+    timings["csv_seconds"] = time.perf_counter() - start
+
+    if images:
+        start = time.perf_counter()
+        write_images(names, os.path.join(out_dir, IMAGE_DIR), rng, image_size)
+        timings["image_seconds"] = time.perf_counter() - start
+    return timings
+
+
+def ensure_dataset(n: int, root: str = DATA_ROOT, seed: int = 0, images: bool = True,
+                   image_size: Tuple[int, int] = IMAGE_SIZE) -> str:
+    """Directory with the dataset for `n` influencers, generated unless it already exists."""
+    out_dir = os.path.join(root, f"n{n}")
+    params = {"n": n, "seed": seed, "images": images, "image_size": list(image_size)}
+    params_path = os.path.join(out_dir, PARAMS_FILE)
+    if os.path.exists(params_path):
+        with open(params_path, encoding="utf-8") as f:
+            if json.load(f) == params:
+                return out_dir
+    timings = generate(out_dir, n, seed, images, image_size)
+    with open(params_path, "w", encoding="utf-8") as f:
+        json.dump(params, f)
+    print(f"Generated {n:,} influencers in {out_dir} "
+          f"({', '.join(f'{k} {v:.1f}' for k, v in timings.items())})")
+    return out_dir
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--root", default=DATA_ROOT)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-images", action="store_true", help="only write the CSVs")
+    parser.add_argument("--image-size", type=int, nargs=2, default=IMAGE_SIZE, metavar=("W", "H"))
+    args = parser.parse_args(argv)
+    for n in args.sizes:
+        print(ensure_dataset(n, args.root, args.seed, not args.no_images, tuple(args.image_size)))
+
+
+if __name__ == "__main__":
+    main()
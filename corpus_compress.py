@@ -0,0 +1,299 @@
+"""
+Token-budgeted compression of the crawled corpus before LLM scoring.
+
+crawl.py stores whole pages; this stage keeps, per influencer, only the
+sentences that matter for the brand criteria, up to a token budget:
+
+1. Split wikipedia_corpus / updates_corpus into sentences (long run-on
+   "sentences" such as tables are cut into chunks)
+2. Drop exact and near-duplicate sentences across all sources
+   (word 3-gram shingles, Jaccard similarity)
+3. Always keep the first sentences of the Wikipedia article (the lead)
+4. Rank the rest with BM25 against each brand's criteria and pick them
+   round-robin over the brands, so every brand gets its best evidence
+5. Re-assemble the kept sentences in their original order
+
+Runs offline on CPU. Tokens are counted with tiktoken when it is installed
+(pip install tiktoken), otherwise approximated (about 4 characters per token).
+Per-influencer token counts and compression ratios are written to a stats CSV.
+
+    python corpus_compress.py --input influencer_corpus.csv --output compressed_corpus.csv --budget 2000
+    python news_scoring.py --input compressed_corpus.csv
+
+To check that scores stay stable, score both corpora and compare:
+
+    python corpus_compress.py --compare ad_suitability_results.csv compressed_results.csv
+"""
+import argparse
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from scoring_config import BRANDS, MODEL, criteria, read_corpus
+
+DEFAULT_BUDGET = 2000
+LEAD_SENTENCES = 3
+MAX_SENTENCE_WORDS = 80
+DUPLICATE_THRESHOLD = 0.8
+SHINGLE_SIZE = 3
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+STATS_FILE = "corpus_compression_stats.csv"
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])[\"')\]]*\s+(?=[\"'(\[]?[A-Z0-9])|\n+")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the their them they this to "
+    "was were will with who which while should must been being into more most such than then there these "
+    "those through up down out over under very can may also not no so if but all any each other our your "
+    "s t ensuring ensure".split()
+)
+
+# --- token counting ---
+_encoder = None
+
+
+def count_tokens(text: str) -> int:
+    """Tokens of `text` for MODEL (tiktoken), or an approximation when tiktoken is unavailable."""
+    global _encoder
+    if _encoder is None:
+        try:
+            import tiktoken  # pip install tiktoken
+            try:
+                _encoder = tiktoken.encoding_for_model(MODEL)
+            except KeyError:
+                _encoder = tiktoken.get_encoding("o200k_base")
+        except Exception:  # not installed, or the encoding could not be downloaded
+            _encoder = False
+    if _encoder:
+        return len(_encoder.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+# --- sentences ---
+@dataclass
+class Sentence:
+    source: str  # "wikipedia" or "updates"
+    block: int   # page/paragraph index within the source, to keep page breaks
+    text: str
+    tokens: int = 0
+
+
+def split_sentences(text: str, max_words: int = MAX_SENTENCE_WORDS) -> List[Tuple[int, str]]:
+    """(block index, sentence) pairs; blocks are separated by blank lines."""
+    sentences = []
+    if not isinstance(text, str):
+        return sentences
+    for block, chunk in enumerate(re.split(r"\n\s*\n", text)):
+        for sentence in _SENTENCE_RE.split(chunk):
+            words = sentence.split()
+            for start in range(0, len(words), max_words):
+                piece = " ".join(words[start:start + max_words])
+                if len(piece) > 1:
+                    sentences.append((block, piece))
+    return sentences
+
+
+def terms(text: str) -> List[str]:
+    return [word for word in _WORD_RE.findall(text.lower()) if word not in STOPWORDS]
+
+
+def _shingles(words: List[str], size: int = SHINGLE_SIZE) -> frozenset:
+    if len(words) < size:
+        return frozenset([" ".join(words)]) if words else frozenset()
+    return frozenset(" ".join(words[i:i + size]) for i in range(len(words) - size + 1))
+
+
+def deduplicate(sentences: List[Sentence], threshold: float = DUPLICATE_THRESHOLD) -> Tuple[List[Sentence], int]:
+    """
+    Drop sentences whose shingle set is at least `threshold` similar (Jaccard)
+    to an earlier one. Only sentences that share a shingle are compared.
+    """
+    kept: List[Sentence] = []
+    kept_shingles: List[frozenset] = []
+    index: Dict[str, List[int]] = {}
+    seen_exact = set()
+    dropped = 0
+    for sentence in sentences:
+        words = _WORD_RE.findall(sentence.text.lower())
+        exact = " ".join(words)
+        if exact in seen_exact:
+            dropped += 1
+            continue
+        shingles = _shingles(words)
+        candidates = Counter(i for shingle in shingles for i in index.get(shingle, ()))
+        duplicate = False
+        for i, shared in candidates.items():
+            union = len(shingles) + len(kept_shingles[i]) - shared
+            if union and shared / union >= threshold:
+                duplicate = True
+                break
+        if duplicate:
+            dropped += 1
+            continue
+        seen_exact.add(exact)
+        for shingle in shingles:
+            index.setdefault(shingle, []).append(len(kept))
+        kept.append(sentence)
+        kept_shingles.append(shingles)
+    return kept, dropped
+
+
+# --- ranking ---
+def bm25_scores(documents: List[List[str]], query: Iterable[str], k1: float = K1, b: float = B) -> List[float]:
+    """BM25 score of each tokenized document for the query terms."""
+    n = len(documents)
+    if n == 0:
+        return []
+    avg_len = sum(len(doc) for doc in documents) / n or 1.0
+    df = Counter(term for doc in documents for term in set(doc))
+    query = Counter(query)
+    idf = {term: math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5)) for term in query if df[term]}
+    scores = []
+    for doc in documents:
+        tf = Counter(doc)
+        norm = k1 * (1 - b + b * len(doc) / avg_len)
+        scores.append(sum(weight * idf[term] * tf[term] * (k1 + 1) / (tf[term] + norm)
+                          for term, weight in query.items() if term in idf and tf[term]))
+    return scores
+
+
+def brand_queries(brands: Iterable[str] = BRANDS) -> Dict[str, List[str]]:
+    return {brand: terms(f"{brand} {criteria.get(brand, '')}") for brand in brands}
+
+
+def select_sentences(sentences: List[Sentence], budget: int, queries: Dict[str, List[str]],
+                     lead: int = LEAD_SENTENCES) -> List[Sentence]:
+    """Lead sentences first, then the best BM25 sentence of each brand in turn, then original order."""
+    selected = set()
+    used = 0
+
+    def take(i: int) -> None:
+        nonlocal used
+        if i not in selected and used + sentences[i].tokens <= budget:
+            selected.add(i)
+            used += sentences[i].tokens
+
+    for i in [i for i, s in enumerate(sentences) if s.source == "wikipedia"][:lead]:
+        take(i)
+
+    documents = [terms(s.text) for s in sentences]
+    rankings = []
+    for query in queries.values():
+        scores = bm25_scores(documents, query)
+        rankings.append([i for i in sorted(range(len(sentences)), key=lambda i: -scores[i]) if scores[i] > 0])
+    cursors = [0] * len(rankings)
+    while any(cursor < len(ranking) for cursor, ranking in zip(cursors, rankings)):
+        if used >= budget:
+            break
+        for r, ranking in enumerate(rankings):
+            # next sentence of this brand that is not picked yet
+            while cursors[r] < len(ranking) and ranking[cursors[r]] in selected:
+                cursors[r] += 1
+            if cursors[r] < len(ranking):
+                take(ranking[cursors[r]])
+                cursors[r] += 1
+
+    for i in range(len(sentences)):
+        if used >= budget:
+            break
+        take(i)
+    return [sentences[i] for i in sorted(selected)]
+
+
+def _join(sentences: List[Sentence], source: str) -> str:
+    blocks: Dict[int, List[str]] = {}
+    for sentence in sentences:
+        if sentence.source == source:
+            blocks.setdefault(sentence.block, []).append(sentence.text)
+    return "\n\n".join(" ".join(texts) for _, texts in sorted(blocks.items()))
+
+
+def compress_influencer(wikipedia_corpus: str, updates_corpus: str, budget: int = DEFAULT_BUDGET,
+                        queries: Optional[Dict[str, List[str]]] = None) -> Tuple[str, str, Dict[str, float]]:
+    """Compressed (wikipedia_corpus, updates_corpus) and their stats."""
+    queries = queries if queries is not None else brand_queries()
+    sentences = []
+    for source, text in (("wikipedia", wikipedia_corpus), ("updates", updates_corpus)):
+        for block, sentence in split_sentences(text):
+            sentences.append(Sentence(source, block, sentence, count_tokens(sentence)))
+    original_tokens = sum(count_tokens(text) for text in (wikipedia_corpus, updates_corpus) if isinstance(text, str))
+
+    unique, duplicates = deduplicate(sentences)
+    selected = select_sentences(unique, budget, queries)
+    wikipedia, updates = _join(selected, "wikipedia"), _join(selected, "updates")
+    compressed_tokens = count_tokens(wikipedia) + count_tokens(updates)
+    return wikipedia, updates, {
+        "original_tokens": original_tokens,
+        "compressed_tokens": compressed_tokens,
+        "ratio": compressed_tokens / original_tokens if original_tokens else 1.0,
+        "sentences": len(sentences),
+        "duplicates": duplicates,
+        "selected": len(selected),
+    }
+
+
+def compress_corpus(df: pd.DataFrame, budget: int = DEFAULT_BUDGET,
+                    brands: Iterable[str] = BRANDS) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """(compressed corpus with influencer/wikipedia_corpus/updates_corpus, per-influencer stats)."""
+    queries = brand_queries(brands)
+    rows, stats = [], []
+    for row in df.itertuples(index=False):
+        wikipedia, updates, info = compress_influencer(row.wikipedia_corpus, row.updates_corpus, budget, queries)
+        rows.append({"influencer": row.influencer, "wikipedia_corpus": wikipedia, "updates_corpus": updates})
+        stats.append({"influencer": row.influencer, **info})
+    return pd.DataFrame(rows), pd.DataFrame(stats)
+
+
+def compare_scores(before_csv: str, after_csv: str) -> pd.DataFrame:
+    """Per-brand score drift between two ad_suitability_results.csv files."""
+    before = pd.read_csv(before_csv)
+    after = pd.read_csv(after_csv)
+    for df in (before, after):
+        df["brand"] = df["brand"].astype(str).str.lower()
+    merged = before.merge(after, on=["brand", "influencer"], suffixes=("_before", "_after")).dropna(
+        subset=["score_before", "score_after"])
+    rows = []
+    for brand, group in merged.groupby("brand"):
+        diff = (group["score_after"] - group["score_before"]).abs()
+        rows.append({
+            "brand": brand,
+            "pairs": len(group),
+            "mean_abs_diff": diff.mean(),
+            "max_abs_diff": diff.max(),
+            "spearman": group["score_before"].rank().corr(group["score_after"].rank()),
+        })
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default="influencer_corpus.csv", help="corpus CSV (name or influencer column)")
+    parser.add_argument("--output", default="compressed_corpus.csv")
+    parser.add_argument("--budget", type=int, default=DEFAULT_BUDGET, help="tokens per influencer")
+    parser.add_argument("--stats", default=STATS_FILE, help="per-influencer compression stats CSV")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="compare two results CSVs instead of compressing")
+    args = parser.parse_args()
+
+    if args.compare:
+        print(compare_scores(*args.compare).to_string(index=False))
+        return
+
+    compressed, stats = compress_corpus(read_corpus(args.input), args.budget)
+    compressed.to_csv(args.output, index=False, encoding="utf-8")
+    stats.to_csv(args.stats, index=False, encoding="utf-8")
+    original, kept = stats["original_tokens"].sum(), stats["compressed_tokens"].sum()
+    print(f"{len(stats)} influencers: {original:,} -> {kept:,} tokens "
+          f"({kept / original if original else 1:.1%}), {stats['duplicates'].sum():,} duplicate sentences dropped")
+    print(f"Saved {args.output} and {args.stats}")
+
+
+if __name__ == "__main__":
+    main()
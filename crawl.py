@@ -1,95 +1,47 @@
 import pandas as pd
-import requests
-from bs4 import BeautifulSoup
-from googlesearch import search  # pip install googlesearch-python
-import time
+import argparse
+import asyncio
 import csv
 
-def fetch_page_text(url):
-    """URL에 접근하여 페이지의 텍스트를 추출하고, 콤마를 제거."""
-    try:
-        headers = {
-            "User-Agent": (
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/90.0.4430.93 Safari/537.36"
-            )
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            # 스크립트, 스타일, noscript 태그 제거
-            for tag in soup(["script", "style", "noscript"]):
-                tag.decompose()
-            text = soup.get_text(separator=" ", strip=True)
-            # 크롤링한 텍스트 내 콤마 제거
-            return text.replace(",", "")
-    except Exception as e:
-        print(f"Error fetching {url}: {e}")
-    return ""
-
-def get_wikipedia_content(query):
-    """구글 검색 결과 중 wikipedia.org 도메인이 포함된 첫번째 페이지(영문)의 내용을 반환."""
-    wiki_text = ""
-    try:
-        # 영어 페이지 검색 (lang="en")
-        for url in search(query, num_results=5, lang="en"):
-            if "wikipedia.org" in url:
-                print(f"  [WIKI] Found: {url}")
-                wiki_text = fetch_page_text(url)
-                break
-    except Exception as e:
-        print(f"Error during wikipedia search: {e}")
-    return wiki_text
-
-def get_latest_updates(query):
-    """구글 검색 결과 중 위키피디아 외 첫 3개의 결과를 가져와 콘텐츠를 반환."""
-    updates = []
-    try:
-        # 영어 결과에서 검색 (lang="en")
-        for url in search(query, num_results=10, lang="en"):
-            if "wikipedia.org" in url:
-                continue  # 위키피디아 페이지는 제외
-            print(f"  [UPDATE] Found: {url}")
-            text = fetch_page_text(url)
-            if text:
-                updates.append(text)
-            if len(updates) >= 3:
-                break
-    except Exception as e:
-        print(f"Error during updates search: {e}")
-    return "\n\n".join(updates)
+from fetch_cache import CACHE_PATH, STATUS_OK, FetchCache, has_corpus
 
 def main():
+    parser = argparse.ArgumentParser(description="Crawl Wikipedia and recent pages for each influencer.")
+    parser.add_argument("--cache", default=CACHE_PATH, help="fetch cache / progress database")
+    parser.add_argument("--max-age-days", type=float, default=7.0,
+                        help="cached pages, searches and finished influencers older than this are refreshed")
+    parser.add_argument("--full", action="store_true",
+                        help="re-crawl every influencer (pages are still revalidated with conditional GETs)")
+    args = parser.parse_args()
+
     # influencer.csv 파일 읽기 (name 컬럼 포함)
     df = pd.read_csv("top_influencer_corpus.csv")
-    results = []
+    names = list(df["influencer"])
+
+    cache = FetchCache(args.cache, max_age=args.max_age_days * 24 * 3600)
+    # 이미 크롤링이 끝났고 오래되지 않은 인플루언서는 건너뜀 (중단된 크롤링 이어하기)
+    keys = [name.replace(",", "") for name in names]
+    pending = set(cache.pending(keys)) if not args.full else set(keys)
+    todo = [name for name, key in zip(names, keys) if key in pending]
+    print(f"{len(todo)} of {len(names)} influencers to crawl")
+
+    # 인플루언서들을 동시에 크롤링 (도메인별 요청 간격은 CrawlEngine에서 조절)
+    # 끝난 인플루언서는 바로 progress 테이블에 저장
+    from crawl_engine import crawl_all
+    asyncio.run(crawl_all(todo, cache=cache, on_result=cache.save_progress))
 
-    for idx, row in df.iterrows():
-        name = row["influencer"]
-        print(f"Processing '{name}'...")
-        
-        # 위키피디아 페이지 검색 및 크롤링 (영어)
-        wiki_query = f"{name} wikipedia"
-        wiki_content = get_wikipedia_content(wiki_query)
-        
-        # 최신 소식 검색 및 크롤링 (영어, 'latest' 키워드 사용)
-        updates_query = f"{name}"
-        updates_content = get_latest_updates(updates_query)
-        
-        results.append({
-            "name": name.replace(",", ""),  # 이름에 콤마 제거
-            "wikipedia_corpus": wiki_content,
-            "updates_corpus": updates_content
-        })
-        
-        # 구글에 과도한 요청을 방지하기 위해 sleep (필요에 따라 조정)
-        time.sleep(5)
+    progress = cache.load_progress()
+    # 크롤링에 실패해 내용이 없는 인플루언서는 빈 코퍼스로 저장하지 않음 (다음 실행에서 다시 시도)
+    results = [progress[key] for key in dict.fromkeys(keys) if key in progress and has_corpus(progress[key])]
+    failed = [key for key in dict.fromkeys(keys) if key in progress and progress[key]["status"] != STATUS_OK]
+    if failed:
+        print(f"{len(failed)} influencers failed and will be retried next run: {', '.join(failed[:10])}")
+    cache.close()
 
-    # CSV 파일 저장: csv 모듈 사용 (콤마가 이미 제거된 상태)
+    # CSV 파일 저장: 모든 필드를 큰따옴표로 감싸므로 텍스트의 콤마/따옴표는 그대로 유지
     with open("influencer_corpus.csv", mode="w", newline="", encoding="utf-8-sig") as f:
         fieldnames = ["name", "wikipedia_corpus", "updates_corpus"]
-        writer = csv.DictWriter(f, fieldnames=fieldnames, quoting=csv.QUOTE_ALL, escapechar='\\')
+        writer = csv.DictWriter(f, fieldnames=fieldnames, quoting=csv.QUOTE_ALL, extrasaction="ignore")
         writer.writeheader()
         for row in results:
             writer.writerow(row)
@@ -97,4 +49,4 @@ def main():
     print("저장 완료: influencer_corpus.csv")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,176 @@
+import os
+import threading
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+DATA_DIR = "./"  # Directory for CSV files
+
+# List of available brands
+BRANDS = ['Lyft', 'Redbull', 'Kroger', 'Sephora', 'Nestle', 'Lululemon']
+
+META_CSV = "top_100.csv"
+CULTURE_CSV = "ad_suitability_results.csv"
+APPEARANCE_CSV = "top_100_{brand}_appearance.csv"
+
+# Columns of the pre-joined influencer x brand table
+TABLE_COLUMNS = [
+    'brand', 'influencer', 'category', 'description', 'instagram', 'last_followers',
+    'appearance_score', 'appearance_reason', 'culture_fit_score', 'culture_fit_reason',
+]
+
+_lock = threading.Lock()
+
+
+def appearance_csv(brand: str) -> str:
+    return APPEARANCE_CSV.format(brand=brand)
+
+
+def source_paths(data_dir: str = DATA_DIR) -> Dict[str, str]:
+    """테이블을 만드는 데 쓰이는 CSV 파일 경로 (key -> path)."""
+    paths = {
+        "meta": os.path.join(data_dir, META_CSV),
+        "culture": os.path.join(data_dir, CULTURE_CSV),
+    }
+    for brand in BRANDS:
+        paths[brand] = os.path.join(data_dir, appearance_csv(brand))
+    return paths
+
+
+def source_signature(data_dir: str = DATA_DIR) -> Tuple[Tuple[str, int, int], ...]:
+    """
+    Fingerprint of the source CSVs as (path, mtime_ns, size) tuples.
+    A missing file is recorded with mtime/size of -1 so that creating it later
+    also invalidates the cached table.
+    """
+    signature = []
+    for path in source_paths(data_dir).values():
+        try:
+            st = os.stat(path)
+            signature.append((path, st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            signature.append((path, -1, -1))
+    return tuple(signature)
+
+
+def _read_appearance(path: str, brand: str) -> pd.DataFrame:
+    df = pd.read_csv(path, dtype={'influencer': str, 'reason': str})
+    df = df.rename(columns={'score': 'appearance_score', 'reason': 'appearance_reason'})
+    df['brand'] = brand
+    return df[['brand', 'influencer', 'appearance_score', 'appearance_reason']]
+
+
+@lru_cache(maxsize=1)
+def _build_table(data_dir: str, signature: Tuple[Tuple[str, int, int], ...]) -> pd.DataFrame:
+    # `signature` is only part of the cache key: any change in the source files
+    # produces a new key and the table is rebuilt from disk.
+    paths = source_paths(data_dir)
+    for key in ("meta", "culture"):
+        if not os.path.exists(paths[key]):
+            raise FileNotFoundError(f"File not found: {os.path.basename(paths[key])}")
+
+    df_meta = pd.read_csv(paths["meta"], dtype={'influencer': str, 'instagram': str, 'last_followers': str})
+    # Drop rows with missing Instagram link or follower information
+    df_meta = df_meta[
+        df_meta['instagram'].notna() & df_meta['instagram'].str.strip().ne("") &
+        df_meta['last_followers'].notna() & df_meta['last_followers'].str.strip().ne("")
+    ]
+    df_meta = df_meta[['influencer', 'category', 'description', 'instagram', 'last_followers']]
+
+    frames = [
+        _read_appearance(paths[brand], brand)
+        for brand in BRANDS if os.path.exists(paths[brand])
+    ]
+    if frames:
+        df_app = pd.concat(frames, ignore_index=True)
+    else:
+        df_app = pd.DataFrame(columns=['brand', 'influencer', 'appearance_score', 'appearance_reason'])
+
+    # Inner join == left join followed by the instagram/followers filter
+    df_app = pd.merge(df_app, df_meta, on="influencer", how="inner")
+
+    df_culture = pd.read_csv(paths["culture"], dtype={'brand': str, 'influencer': str, 'reason': str})
+    # The culture CSV has been written with both "Lyft" and "lyft" style brand names
+    brand_lookup = {brand.lower(): brand for brand in BRANDS}
+    df_culture['brand'] = df_culture['brand'].str.lower().map(brand_lookup)
+    df_culture = df_culture.dropna(subset=['brand'])
+    df_culture = df_culture.rename(columns={'score': 'culture_fit_score', 'reason': 'culture_fit_reason'})
+
+    df = pd.merge(
+        df_app,
+        df_culture[['brand', 'influencer', 'culture_fit_score', 'culture_fit_reason']],
+        on=["brand", "influencer"],
+        how="left",
+    )
+
+    df['appearance_score'] = pd.to_numeric(df['appearance_score'], errors='coerce').astype('float64')
+    df['culture_fit_score'] = pd.to_numeric(df['culture_fit_score'], errors='coerce').astype('float64')
+    df['last_followers'] = pd.to_numeric(df['last_followers'], errors='coerce').astype('float64')
+    df['brand'] = pd.Categorical(df['brand'], categories=BRANDS)
+    df['category'] = df['category'].astype('category')
+    return df[TABLE_COLUMNS].reset_index(drop=True)
+
+
+def load_table(data_dir: str = DATA_DIR) -> pd.DataFrame:
+    """
+    Return the normalized influencer x brand table.
+
+    The table is built once per process and shared by every session; it is
+    rebuilt only when one of the source CSVs changes (mtime or size). Callers
+    must treat the returned frame as read-only.
+    """
+    signature = source_signature(data_dir)
+    with _lock:
+        return _build_table(data_dir, signature)
+
+
+def _store_exists(data_dir: str) -> bool:
+    import dataset_store
+    return dataset_store.exists(data_dir)
+
+
+@lru_cache(maxsize=len(BRANDS))
+def _read_store_view(data_dir: str, brand: str, signature: Tuple[int, int]) -> pd.DataFrame:
+    # Only the brand's partition and the table columns are read; the row
+    # filter (same as the CSV path) is pushed down to the Parquet scan.
+    import pyarrow.dataset as ds
+    import dataset_store
+
+    df = dataset_store.read_brand(
+        brand,
+        columns=[c for c in TABLE_COLUMNS if c != 'brand'],
+        filter=(ds.field('appearance_reason').is_valid()
+                & ds.field('instagram').is_valid()
+                & ds.field('last_followers').is_valid()),
+        data_dir=data_dir,
+    )
+    df['brand'] = pd.Categorical([brand] * len(df), categories=BRANDS)
+    df['last_followers'] = df['last_followers'].astype('float64')
+    df['category'] = df['category'].astype('category')
+    return df[TABLE_COLUMNS]
+
+
+def available_brands(data_dir: str = DATA_DIR) -> List[str]:
+    """Brands with data: partitions of the dataset store if it exists, else appearance CSVs."""
+    if _store_exists(data_dir):
+        import dataset_store
+        return dataset_store.available_brands(data_dir)
+    paths = source_paths(data_dir)
+    return [brand for brand in BRANDS if os.path.exists(paths[brand])]
+
+
+def load_brand_view(brand: str, data_dir: str = DATA_DIR) -> pd.DataFrame:
+    """
+    Rows of one brand (a new frame, safe to modify). Read from the Parquet
+    store (dataset_store.py) when it exists, otherwise from the cached CSV table.
+    """
+    if brand not in available_brands(data_dir):
+        raise FileNotFoundError(f"File not found: {appearance_csv(brand)}")
+    if _store_exists(data_dir):
+        import dataset_store
+        signature = dataset_store.partition_signature(brand, data_dir)
+        with _lock:
+            return _read_store_view(data_dir, brand, signature).copy()
+    df = load_table(data_dir)
+    return df[df['brand'] == brand].reset_index(drop=True)
@@ -0,0 +1,289 @@
+"""
+Columnar store of the influencer x brand data (Parquet, partitioned by brand).
+
+One row per (brand, influencer) with the roster metadata (top_100.csv), the
+appearance score (top_100_{Brand}_appearance.csv) and the culture-fit score
+(ad_suitability_results.csv), stored with real dtypes:
+
+    dataset/brand=Lyft/part-0.parquet
+    dataset/brand=Redbull/part-0.parquet
+    ...
+
+Reading one brand view touches only that partition and only the requested
+columns (projection + predicate pushdown through pyarrow.dataset), so memory
+use does not depend on the other brands.
+
+    python dataset_store.py convert      # one-shot import of the existing CSVs
+    python dataset_store.py info
+
+The scoring scripts call upsert_appearance_scores / upsert_culture_scores
+when the store exists; data_layer reads from it when it exists and falls
+back to the CSVs otherwise. Requires pyarrow (pip install pyarrow).
+"""
+import argparse
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+import pyarrow as pa  # pip install pyarrow
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from data_layer import BRANDS, CULTURE_CSV, DATA_DIR, META_CSV, appearance_csv
+
+STORE_DIR = "dataset"
+PART_FILE = "part-0.parquet"
+
+SCHEMA = pa.schema([
+    ("influencer", pa.string()),
+    ("category", pa.dictionary(pa.int32(), pa.string())),
+    ("description", pa.string()),
+    ("instagram", pa.string()),
+    ("account", pa.string()),
+    ("instagram_account", pa.string()),
+    ("url", pa.string()),
+    ("last_timestamp", pa.date32()),
+    ("last_followers", pa.int64()),
+    ("last_following", pa.int64()),
+    ("last_media", pa.int64()),
+    ("appearance_score", pa.float64()),
+    ("appearance_reason", pa.string()),
+    ("culture_fit_score", pa.float64()),
+    ("culture_fit_reason", pa.string()),
+])
+META_COLUMNS = ['category', 'description', 'instagram', 'account', 'instagram_account', 'url',
+                'last_timestamp', 'last_followers', 'last_following', 'last_media']
+INT_COLUMNS = ['last_followers', 'last_following', 'last_media']
+
+# Upserts rewrite a partition; one writer at a time per process
+_write_lock = threading.Lock()
+
+
+def store_path(data_dir: str = DATA_DIR) -> str:
+    return os.path.join(data_dir, STORE_DIR)
+
+
+def partition_path(brand: str, data_dir: str = DATA_DIR) -> str:
+    return os.path.join(store_path(data_dir), f"brand={brand}")
+
+
+def exists(data_dir: str = DATA_DIR) -> bool:
+    return os.path.isdir(store_path(data_dir))
+
+
+def canonical_brand(name: str) -> Optional[str]:
+    """"lyft" / "Lyft" -> "Lyft"; None for unknown brands."""
+    return {brand.lower(): brand for brand in BRANDS}.get(str(name).strip().lower())
+
+
+# --- CSV parsing ---
+def parse_dates(values: pd.Series) -> pd.Series:
+    """Dates written as "2025-02-01" or "2025.1.8" -> datetime64 (NaT if unparseable)."""
+    text = values.astype("string").str.strip().str.replace(".", "-", regex=False)
+    return pd.to_datetime(text, format="%Y-%m-%d", errors="coerce")
+
+
+def parse_counts(values: pd.Series) -> pd.Series:
+    """Follower-style counts stored as text ("6545307", "6,545,307", "") -> nullable Int64."""
+    text = values.astype("string").str.strip().str.replace(",", "", regex=False)
+    return pd.to_numeric(text.replace("", pd.NA), errors="coerce").round().astype("Int64")
+
+
+def _blank_to_na(values: pd.Series) -> pd.Series:
+    text = values.astype("string").str.strip()
+    return text.mask(text == "")
+
+
+def read_meta_csv(path: str) -> pd.DataFrame:
+    df = pd.read_csv(path, dtype=str, encoding="utf-8-sig", keep_default_na=False)
+    out = pd.DataFrame({"influencer": df["influencer"].str.strip()})
+    for column in ['category', 'description', 'instagram', 'account', 'instagram_account', 'url']:
+        out[column] = _blank_to_na(df[column]) if column in df else pd.NA
+    out["last_timestamp"] = parse_dates(df["last_timestamp"]) if "last_timestamp" in df else pd.NaT
+    for column in INT_COLUMNS:
+        out[column] = parse_counts(df[column]) if column in df else pd.NA
+    return out.drop_duplicates("influencer", keep="last")
+
+
+def _read_scores(path: str, prefix: str) -> pd.DataFrame:
+    df = pd.read_csv(path, dtype={"influencer": str, "reason": str}, encoding="utf-8-sig")
+    return df.rename(columns={"score": f"{prefix}_score", "reason": f"{prefix}_reason"})
+
+
+def table_from_csvs(data_dir: str = DATA_DIR) -> pd.DataFrame:
+    """All (brand, influencer) rows of the existing CSVs, with parsed dtypes."""
+    meta = read_meta_csv(os.path.join(data_dir, META_CSV))
+
+    frames = []
+    for brand in BRANDS:
+        path = os.path.join(data_dir, appearance_csv(brand))
+        if os.path.exists(path):
+            frames.append(_read_scores(path, "appearance").assign(brand=brand))
+    appearance = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+        columns=["brand", "influencer", "appearance_score", "appearance_reason"])
+
+    culture_path = os.path.join(data_dir, CULTURE_CSV)
+    if os.path.exists(culture_path):
+        culture = _read_scores(culture_path, "culture_fit")
+        culture["brand"] = culture["brand"].map(canonical_brand)
+        culture = culture.dropna(subset=["brand"]).drop_duplicates(["brand", "influencer"], keep="last")
+    else:
+        culture = pd.DataFrame(columns=["brand", "influencer", "culture_fit_score", "culture_fit_reason"])
+
+    scores = pd.merge(appearance[["brand", "influencer", "appearance_score", "appearance_reason"]],
+                      culture[["brand", "influencer", "culture_fit_score", "culture_fit_reason"]],
+                      on=["brand", "influencer"], how="outer")
+    return pd.merge(scores, meta, on="influencer", how="left")
+
+
+# --- writing ---
+def _to_arrow(df: pd.DataFrame) -> pa.Table:
+    df = df.reindex(columns=SCHEMA.names)
+    for column in INT_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors="coerce").astype("Int64")
+    for column in ("appearance_score", "culture_fit_score"):
+        df[column] = pd.to_numeric(df[column], errors="coerce").astype("float64")
+    df["last_timestamp"] = pd.to_datetime(df["last_timestamp"], errors="coerce").dt.date
+    df = df.astype({column: "object" for column in df.columns if column not in INT_COLUMNS})
+    return pa.Table.from_pandas(df.where(df.notna(), None), schema=SCHEMA, preserve_index=False)
+
+
+def write_partition(brand: str, df: pd.DataFrame, data_dir: str = DATA_DIR) -> str:
+    """Replace the partition of `brand` with `df` (atomic rename)."""
+    directory = partition_path(brand, data_dir)
+    os.makedirs(directory, exist_ok=True)
+    table = _to_arrow(df.sort_values("influencer", kind="stable"))
+    path = os.path.join(directory, PART_FILE)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp, compression="zstd")
+    os.replace(tmp, path)
+    for name in os.listdir(directory):
+        if name.endswith(".parquet") and name != PART_FILE:
+            os.remove(os.path.join(directory, name))
+    return path
+
+
+def convert(data_dir: str = DATA_DIR) -> Dict[str, int]:
+    """Build (or rebuild) the store from the CSVs; returns rows per brand."""
+    table = table_from_csvs(data_dir)
+    counts = {}
+    with _write_lock:
+        for brand in BRANDS:
+            rows = table[table["brand"] == brand].drop(columns="brand")
+            if len(rows):
+                write_partition(brand, rows, data_dir)
+                counts[brand] = len(rows)
+    return counts
+
+
+# --- reading ---
+def _dataset(data_dir: str = DATA_DIR) -> ds.Dataset:
+    return ds.dataset(store_path(data_dir), format="parquet", partitioning="hive")
+
+
+def available_brands(data_dir: str = DATA_DIR) -> List[str]:
+    if not exists(data_dir):
+        return []
+    return [brand for brand in BRANDS if os.path.exists(os.path.join(partition_path(brand, data_dir), PART_FILE))]
+
+
+def partition_signature(brand: str, data_dir: str = DATA_DIR):
+    """(mtime_ns, size) of a brand partition, for cache invalidation."""
+    try:
+        st = os.stat(os.path.join(partition_path(brand, data_dir), PART_FILE))
+        return st.st_mtime_ns, st.st_size
+    except FileNotFoundError:
+        return -1, -1
+
+
+def read_brand(brand: str, columns: Optional[List[str]] = None, filter=None,
+               data_dir: str = DATA_DIR) -> pd.DataFrame:
+    """
+    Rows of one brand; only that partition and the given columns are read.
+    `filter` is an optional extra pyarrow.dataset expression.
+    """
+    expression = ds.field("brand") == brand
+    if filter is not None:
+        expression = expression & filter
+    table = _dataset(data_dir).to_table(columns=columns, filter=expression)
+    return table.to_pandas()
+
+
+def read_partition(brand: str, data_dir: str = DATA_DIR) -> pd.DataFrame:
+    path = os.path.join(partition_path(brand, data_dir), PART_FILE)
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=SCHEMA.names)
+    return pq.read_table(path, schema=SCHEMA).to_pandas()
+
+
+# --- upserts from the scoring scripts ---
+def _roster(influencers: Iterable[str], data_dir: str = DATA_DIR) -> pd.DataFrame:
+    """Metadata of the given influencers, taken from any partition that has them."""
+    influencers = list(dict.fromkeys(influencers))
+    if not influencers or not available_brands(data_dir):
+        return pd.DataFrame(columns=["influencer"] + META_COLUMNS)
+    table = _dataset(data_dir).to_table(columns=["influencer"] + META_COLUMNS,
+                                        filter=ds.field("influencer").isin(influencers)
+                                        & ds.field("instagram").is_valid())
+    return table.to_pandas().drop_duplicates("influencer")
+
+
+def upsert_scores(rows: pd.DataFrame, prefix: str, data_dir: str = DATA_DIR) -> int:
+    """
+    Insert or update {prefix}_score / {prefix}_reason for (brand, influencer)
+    rows with columns brand, influencer, score, reason. Other columns are kept;
+    new influencers get their metadata from the other partitions.
+    Returns the number of rows written.
+    """
+    rows = rows.copy()
+    rows["brand"] = rows["brand"].map(canonical_brand)
+    rows = rows.dropna(subset=["brand"]).drop_duplicates(["brand", "influencer"], keep="last")
+    rows = rows.rename(columns={"score": f"{prefix}_score", "reason": f"{prefix}_reason"})
+    columns = [f"{prefix}_score", f"{prefix}_reason"]
+    written = 0
+    with _write_lock:
+        for brand, new in rows.groupby("brand"):
+            current = read_partition(brand, data_dir).set_index("influencer")
+            new = new.set_index("influencer")[columns]
+            added = new.index.difference(current.index)
+            if len(added):
+                meta = _roster(added, data_dir).set_index("influencer")
+                current = pd.concat([current, meta.reindex(added).reindex(columns=current.columns)])
+            for column in columns:
+                current[column] = current[column].astype("object")
+                current.loc[new.index, column] = new[column].astype("object")
+            write_partition(brand, current.reset_index(), data_dir)
+            written += len(new)
+    return written
+
+
+def upsert_appearance_scores(rows: pd.DataFrame, data_dir: str = DATA_DIR) -> int:
+    return upsert_scores(rows, "appearance", data_dir)
+
+
+def upsert_culture_scores(rows: pd.DataFrame, data_dir: str = DATA_DIR) -> int:
+    return upsert_scores(rows, "culture_fit", data_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["convert", "info"])
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        counts = convert(args.data_dir)
+        print(f"{sum(counts.values())} rows written to {store_path(args.data_dir)}: {counts}")
+    else:
+        if not exists(args.data_dir):
+            raise SystemExit(f"No store at {store_path(args.data_dir)}; run: python dataset_store.py convert")
+        for brand in available_brands(args.data_dir):
+            path = os.path.join(partition_path(brand, args.data_dir), PART_FILE)
+            metadata = pq.read_metadata(path)
+            print(f"{brand:<10}{metadata.num_rows:>6} rows{os.path.getsize(path) / 1024:>8.1f} KB")
+        print(_dataset(args.data_dir).schema)
+
+
+if __name__ == "__main__":
+    main()
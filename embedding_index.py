@@ -0,0 +1,418 @@
+"""
+Embedding index over the influencers and the brand criteria.
+
+Every influencer is embedded from its category and description (top_100.csv)
+and, when available, its crawled corpus; every brand from its `criteria`
+text in scoring_config.py. Nearest neighbours are exact cosine similarity
+(one matrix product), which is instant at this size.
+
+Uses:
+- shortlist: the K influencers closest to each brand's criteria, so only
+  those pairs go to full LLM scoring (news_scoring.py --shortlist K)
+- similar: "find similar influencers" in the dashboard, which only loads
+  the index saved by "build" (it never builds one itself)
+- recall: how many of the LLM's top influencers per brand
+  (ad_suitability_results.csv) the shortlist keeps, to pick K
+
+Backends: a sentence-transformers model on CPU when it is installed
+(pip install sentence-transformers), otherwise TF-IDF (numpy only).
+
+    python embedding_index.py build
+    python embedding_index.py similar "Aaron Paul" -k 10
+    python embedding_index.py shortlist -k 30 --output shortlist.csv
+    python embedding_index.py recall --ks 10 20 30 50 --top-n 10
+"""
+import argparse
+import hashlib
+import math
+import os
+import threading
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from corpus_compress import terms
+from data_layer import CULTURE_CSV, DATA_DIR, META_CSV
+from scoring_config import BRANDS, criteria, read_corpus
+
+INDEX_FILE = "embedding_index.npz"
+CORPUS_CSV = "influencer_corpus.csv"
+DEFAULT_BACKEND = "auto"
+ST_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# sentence-transformers models truncate long inputs, so corpora are embedded
+# in chunks of this many words and the chunk vectors averaged
+CHUNK_WORDS = 200
+MAX_CHUNKS = 32
+MAX_FEATURES = 50_000
+
+_lock = threading.Lock()
+
+
+# --- embedders ---
+class TfidfEmbedder:
+    """Sublinear TF-IDF over corpus_compress.terms, L2-normalized (dense float32)."""
+    name = "tfidf"
+    # vectors depend on the whole collection (idf), so it is refitted on every build
+    reuses_vectors = False
+
+    def __init__(self, max_features: int = MAX_FEATURES):
+        self.max_features = max_features
+        self.vocabulary: Dict[str, int] = {}
+        self.idf = np.zeros(0, dtype=np.float32)
+
+    def fit(self, texts: Sequence[str]) -> "TfidfEmbedder":
+        df = Counter(term for text in texts for term in set(terms(text)))
+        vocab = sorted(df, key=lambda term: (-df[term], term))[:self.max_features]
+        self.vocabulary = {term: i for i, term in enumerate(sorted(vocab))}
+        n = len(texts)
+        self.idf = np.array([math.log((1 + n) / (1 + df[term])) + 1 for term in sorted(vocab)], dtype=np.float32)
+        return self
+
+    def transform(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), len(self.vocabulary)), dtype=np.float32)
+        for row, text in enumerate(texts):
+            counts = Counter(term for term in terms(text) if term in self.vocabulary)
+            if counts:
+                columns = [self.vocabulary[term] for term in counts]
+                vectors[row, columns] = 1 + np.log(np.fromiter(counts.values(), dtype=np.float32))
+        return normalize(vectors * self.idf)
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"vocabulary": np.array(sorted(self.vocabulary, key=self.vocabulary.get)), "idf": self.idf}
+
+    def load_state(self, state: Dict[str, np.ndarray]) -> None:
+        self.vocabulary = {str(term): i for i, term in enumerate(state["vocabulary"])}
+        self.idf = state["idf"].astype(np.float32)
+
+
+class SentenceTransformerEmbedder:
+    """A sentence-transformers model on CPU; long texts are averaged over word chunks."""
+    name = "sentence-transformers"
+    reuses_vectors = True
+
+    def __init__(self, model_name: str = ST_MODEL, load_model: bool = True):
+        self.model_name = model_name
+        self._model = self._load_model(model_name) if load_model else None
+
+    @staticmethod
+    def _load_model(model_name: str):
+        from sentence_transformers import SentenceTransformer  # pip install sentence-transformers
+        return SentenceTransformer(model_name, device="cpu")
+
+    @property
+    def model(self):
+        # A loaded index needs the model only to embed new texts, not for similar()
+        if self._model is None:
+            self._model = self._load_model(self.model_name)
+        return self._model
+
+    def fit(self, texts: Sequence[str]) -> "SentenceTransformerEmbedder":
+        return self
+
+    def transform(self, texts: Sequence[str]) -> np.ndarray:
+        chunks, owners = [], []
+        for row, text in enumerate(texts):
+            words = (text or "").split()
+            for start in range(0, max(len(words), 1), CHUNK_WORDS)[:MAX_CHUNKS]:
+                chunks.append(" ".join(words[start:start + CHUNK_WORDS]))
+                owners.append(row)
+        embedded = self.model.encode(chunks, batch_size=32, normalize_embeddings=True, convert_to_numpy=True)
+        vectors = np.zeros((len(texts), embedded.shape[1]), dtype=np.float32)
+        np.add.at(vectors, owners, embedded)
+        return normalize(vectors)
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"model_name": np.array(self.model_name)}
+
+    def load_state(self, state: Dict[str, np.ndarray]) -> None:
+        pass
+
+
+EMBEDDERS = {
+    TfidfEmbedder.name: TfidfEmbedder,
+    SentenceTransformerEmbedder.name: SentenceTransformerEmbedder,
+}
+
+
+def get_embedder(backend: str = DEFAULT_BACKEND):
+    """The embedder for `backend`; "auto" is sentence-transformers if installed, else TF-IDF."""
+    if backend == "auto":
+        try:
+            return SentenceTransformerEmbedder()
+        except Exception:  # not installed, or the model could not be downloaded
+            return TfidfEmbedder()
+    return EMBEDDERS[backend]()
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+# --- documents ---
+def text_digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def influencer_documents(data_dir: str = DATA_DIR, corpus: Optional[pd.DataFrame] = None,
+                         corpus_csv: str = CORPUS_CSV) -> Dict[str, str]:
+    """
+    {influencer: text} from the category and description in top_100.csv plus
+    the crawled corpus (`corpus`, or `corpus_csv` if it exists). Influencers
+    that are only in the corpus are included too.
+    """
+    documents: Dict[str, List[str]] = {}
+    meta_path = os.path.join(data_dir, META_CSV)
+    if os.path.exists(meta_path):
+        meta = pd.read_csv(meta_path, encoding="utf-8-sig", dtype=str)
+        for row in meta.drop_duplicates("influencer").itertuples(index=False):
+            documents[row.influencer] = [row.influencer] + [
+                value for value in (row.category, row.description) if isinstance(value, str)]
+    if corpus is None:
+        path = os.path.join(data_dir, corpus_csv)
+        corpus = read_corpus(path) if os.path.exists(path) else None
+    if corpus is not None:
+        for row in corpus.drop_duplicates("influencer").itertuples(index=False):
+            parts = documents.setdefault(row.influencer, [row.influencer])
+            parts += [value for value in (row.wikipedia_corpus, row.updates_corpus) if isinstance(value, str)]
+    return {name: "\n".join(parts) for name, parts in documents.items()}
+
+
+def brand_document(brand: str) -> str:
+    return f"{brand}\n{criteria.get(brand.lower(), '')}"
+
+
+# --- index ---
+class EmbeddingIndex:
+    """L2-normalized influencer vectors with exact cosine nearest-neighbour search."""
+
+    def __init__(self, embedder, names: List[str], vectors: np.ndarray, digests: Optional[List[str]] = None):
+        self.embedder = embedder
+        self.names = list(names)
+        self.vectors = vectors
+        self.digests = digests or [""] * len(names)
+        self._positions = {name: i for i, name in enumerate(self.names)}
+
+    @classmethod
+    def build(cls, documents: Dict[str, str], embedder=None,
+              previous: Optional["EmbeddingIndex"] = None) -> "EmbeddingIndex":
+        """
+        Embed `documents`. With an embedder whose vectors do not depend on the
+        collection, vectors of unchanged documents are taken from `previous`.
+        """
+        embedder = embedder or get_embedder()
+        names = list(documents)
+        texts = [documents[name] for name in names]
+        digests = [text_digest(text) for text in texts]
+        if not names:
+            return cls(embedder, [], np.zeros((0, 0), dtype=np.float32))
+        if not embedder.reuses_vectors:
+            return cls(embedder, names, embedder.fit(texts).transform(texts), digests)
+
+        reusable = {}
+        if previous is not None and previous.embedder.name == embedder.name:
+            reusable = {(name, digest): previous.vectors[i]
+                        for i, (name, digest) in enumerate(zip(previous.names, previous.digests))}
+        todo = [i for i, key in enumerate(zip(names, digests)) if key not in reusable]
+        embedded = embedder.transform([texts[i] for i in todo]) if todo else None
+        vectors = np.zeros((len(names), embedded.shape[1] if todo else previous.vectors.shape[1]), dtype=np.float32)
+        for i, key in enumerate(zip(names, digests)):
+            if key in reusable:
+                vectors[i] = reusable[key]
+        if todo:
+            vectors[todo] = embedded
+        return cls(embedder, names, vectors, digests)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._positions
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        return self.embedder.transform(texts)
+
+    def search(self, vector: np.ndarray, k: int, exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        """The `k` most similar influencers to a normalized query vector, best first."""
+        scores = self.vectors @ vector
+        for name in exclude:
+            if name in self._positions:
+                scores[self._positions[name]] = -np.inf
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.names[i], float(scores[i])) for i in top]
+
+    def query(self, text: str, k: int = 10) -> List[Tuple[str, float]]:
+        return self.search(self.embed([text])[0], k)
+
+    def similar(self, name: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Influencers closest to `name` (not including itself)."""
+        if name not in self._positions:
+            raise KeyError(name)
+        return self.search(self.vectors[self._positions[name]], k, exclude=[name])
+
+    def shortlist(self, brands: Iterable[str] = BRANDS, k: int = 20) -> Dict[str, List[Tuple[str, float]]]:
+        """{brand: the k influencers closest to the brand's criteria}."""
+        brands = list(brands)
+        queries = self.embed([brand_document(brand) for brand in brands])
+        return {brand: self.search(vector, k) for brand, vector in zip(brands, queries)}
+
+    # --- persistence ---
+    def save(self, path: str = INDEX_FILE) -> None:
+        tmp = path + ".tmp.npz"
+        np.savez(tmp, backend=np.array(self.embedder.name), names=np.array(self.names, dtype=str),
+                 digests=np.array(self.digests, dtype=str), vectors=self.vectors,
+                 **{f"embedder_{key}": value for key, value in self.embedder.state().items()})
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str = INDEX_FILE) -> "EmbeddingIndex":
+        with np.load(path) as data:
+            backend = str(data["backend"])
+            state = {key[len("embedder_"):]: data[key] for key in data.files if key.startswith("embedder_")}
+            if backend == SentenceTransformerEmbedder.name:
+                embedder = SentenceTransformerEmbedder(str(state["model_name"]), load_model=False)
+            else:
+                embedder = EMBEDDERS[backend]()
+            embedder.load_state(state)
+            return cls(embedder, [str(n) for n in data["names"]], data["vectors"],
+                       [str(d) for d in data["digests"]])
+
+
+def load_or_build(documents: Dict[str, str], path: str = INDEX_FILE, backend: str = DEFAULT_BACKEND,
+                  save: bool = True) -> EmbeddingIndex:
+    """The saved index if it was built from the same documents and backend, else a new one (saved to `path`)."""
+    previous = None
+    if path and os.path.exists(path):
+        try:
+            previous = EmbeddingIndex.load(path)
+        except Exception as e:
+            print(f"Ignoring unreadable index {path}: {e}")
+    digests = [text_digest(documents[name]) for name in documents]
+    if (previous is not None and backend in ("auto", previous.embedder.name)
+            and previous.names == list(documents) and previous.digests == digests):
+        return previous
+    index = EmbeddingIndex.build(documents, get_embedder(backend), previous)
+    if save and path:
+        index.save(path)
+    return index
+
+
+@lru_cache(maxsize=1)
+def _cached_index(path: str, mtime_ns: int, size: int) -> EmbeddingIndex:
+    return EmbeddingIndex.load(path)
+
+
+def load_index(data_dir: str = DATA_DIR) -> Optional[EmbeddingIndex]:
+    """
+    The index saved in `data_dir` by "python embedding_index.py build", or
+    None if there is none. It is never built here; the file is read once per
+    process and again only when it changes.
+    """
+    path = os.path.join(data_dir, INDEX_FILE)
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    with _lock:
+        return _cached_index(path, st.st_mtime_ns, st.st_size)
+
+
+# --- shortlisting for news_scoring / batch_scoring ---
+def shortlist_pairs(corpus: pd.DataFrame, brands: Iterable[str], k: int, backend: str = DEFAULT_BACKEND,
+                    data_dir: str = DATA_DIR) -> Set[Tuple[str, str]]:
+    """(brand, influencer) pairs to send to the LLM: the top `k` influencers of `corpus` per brand."""
+    names = set(corpus["influencer"])
+    documents = {name: text for name, text in influencer_documents(data_dir, corpus).items() if name in names}
+    index = EmbeddingIndex.build(documents, get_embedder(backend))
+    return {(brand, influencer) for brand, hits in index.shortlist(brands, k).items() for influencer, _ in hits}
+
+
+# --- recall against the LLM scores ---
+def recall_report(index: EmbeddingIndex, results_csv: str = CULTURE_CSV, ks: Sequence[int] = (10, 20, 30, 50),
+                  top_n: int = 10) -> pd.DataFrame:
+    """
+    Per brand and K: the share of the LLM's top `top_n` influencers (ties
+    included) that are in the shortlist of K, and the share of LLM calls it needs.
+    """
+    results = pd.read_csv(results_csv, dtype={"brand": str, "influencer": str})
+    results["brand"] = results["brand"].str.lower()
+    results["score"] = pd.to_numeric(results["score"], errors="coerce")
+    results = results.dropna(subset=["score"])
+    results = results[results["influencer"].isin(set(index.names))].drop_duplicates(["brand", "influencer"])
+
+    rows = []
+    for brand, group in results.groupby("brand"):
+        if brand not in BRANDS:
+            continue
+        cutoff = group["score"].nlargest(min(top_n, len(group))).min()
+        relevant = set(group.loc[group["score"] >= cutoff, "influencer"])
+        scored = set(group["influencer"])
+        candidates = len(scored)
+        # rank only the influencers the LLM scored, so K counts LLM calls
+        ranked = [name for name, _ in index.shortlist([brand], len(index))[brand] if name in scored]
+        for k in ks:
+            kept = relevant & set(ranked[:k])
+            rows.append({
+                "brand": brand,
+                "k": k,
+                "relevant": len(relevant),
+                "found": len(kept),
+                "recall": len(kept) / len(relevant),
+                "llm_calls": min(k, candidates) / candidates,
+            })
+    report = pd.DataFrame(rows)
+    if not report.empty:
+        mean = report.groupby("k", as_index=False)[["recall", "llm_calls"]].mean()
+        mean["brand"] = "(mean)"
+        report = pd.concat([report, mean], ignore_index=True)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["build", "similar", "shortlist", "recall"])
+    parser.add_argument("name", nargs="?", help="influencer for 'similar'")
+    parser.add_argument("-k", type=int, default=10, help="neighbours / influencers per brand")
+    parser.add_argument("--backend", default=DEFAULT_BACKEND, choices=["auto", *EMBEDDERS])
+    parser.add_argument("--data-dir", default=DATA_DIR)
+    parser.add_argument("--corpus", default=CORPUS_CSV, help="crawled corpus CSV (used if it exists)")
+    parser.add_argument("--index", default=INDEX_FILE, help="saved index (reused while the inputs are unchanged)")
+    parser.add_argument("--output", help="'shortlist': write the pairs to this CSV")
+    parser.add_argument("--results", default=CULTURE_CSV, help="'recall': LLM results to compare with")
+    parser.add_argument("--ks", type=int, nargs="+", default=[10, 20, 30, 50], help="'recall': shortlist sizes")
+    parser.add_argument("--top-n", type=int, default=10, help="'recall': LLM top influencers per brand")
+    args = parser.parse_args()
+
+    documents = influencer_documents(args.data_dir, corpus_csv=args.corpus)
+    index = load_or_build(documents, os.path.join(args.data_dir, args.index), args.backend)
+    print(f"{len(index)} influencers indexed ({index.embedder.name}, {index.vectors.shape[1]} dimensions)")
+
+    if args.command == "similar":
+        if not args.name:
+            parser.error("'similar' needs an influencer name")
+        for name, score in index.similar(args.name, args.k):
+            print(f"{score:.3f}  {name}")
+    elif args.command == "shortlist":
+        rows = [{"brand": brand, "rank": rank, "influencer": name, "similarity": score}
+                for brand, hits in index.shortlist(BRANDS, args.k).items()
+                for rank, (name, score) in enumerate(hits, 1)]
+        df = pd.DataFrame(rows)
+        if args.output:
+            df.to_csv(args.output, index=False, encoding="utf-8")
+            print(f"Saved {args.output}")
+        else:
+            print(df.to_string(index=False))
+    elif args.command == "recall":
+        report = recall_report(index, os.path.join(args.data_dir, args.results), args.ks, args.top_n)
+        print(report.to_string(index=False, float_format=lambda x: f"{x:.2f}"))
+
+
+if __name__ == "__main__":
+    main()
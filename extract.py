@@ -0,0 +1,178 @@
+"""
+HTML -> text extraction for crawled pages.
+
+Each backend parses the page, drops non-content elements (scripts, styles,
+navigation, headers/footers, sidebars, forms, Wikipedia edit links and
+navboxes), keeps only the main content block and normalizes whitespace.
+Punctuation is kept; CSV safety is handled by quoting when writing.
+
+Backends, fastest first: "selectolax" (pip install selectolax),
+"lxml" (pip install lxml cssselect) and "html.parser" (BeautifulSoup, always available).
+Other backends can be added with register_extractor().
+"""
+import re
+from typing import Callable, Dict, List, Optional
+
+# Maximum characters kept per page
+MAX_CHARS = 20000
+
+# Elements that never hold article text
+BOILERPLATE_TAGS = [
+    "script", "style", "noscript", "template", "svg", "iframe", "nav", "header",
+    "footer", "aside", "form", "button", "select", "input",
+]
+# Boilerplate blocks inside the main content (mostly Wikipedia chrome)
+BOILERPLATE_SELECTORS = [
+    ".mw-editsection", ".navbox", ".vertical-navbox", ".reflist", ".references",
+    ".mw-references-wrap", "sup.reference", "#toc", ".toc", ".catlinks",
+    ".mw-jump-link", ".hatnote", ".sidebar", "[role=navigation]", "[aria-hidden=true]",
+]
+# Main content containers, most specific first
+MAIN_SELECTORS = ["#mw-content-text", "article", "main", "[role=main]", "#content", ".content"]
+
+_SPACE_RE = re.compile(r"\s+")
+# get_text-style joins leave a space before punctuation that followed an inline tag
+_SPACE_BEFORE_PUNCT_RE = re.compile(r" ([,.;:!?)\]])")
+
+Extractor = Callable[[str], str]
+EXTRACTORS: Dict[str, Extractor] = {}
+
+
+def register_extractor(name: str, func: Extractor) -> None:
+    EXTRACTORS[name] = func
+
+
+def normalize_text(text: str, max_chars: Optional[int] = MAX_CHARS) -> str:
+    """Collapse whitespace and cut at the last sentence end before `max_chars`."""
+    text = _SPACE_BEFORE_PUNCT_RE.sub(r"\1", _SPACE_RE.sub(" ", text)).strip()
+    if max_chars and len(text) > max_chars:
+        cut = text[:max_chars]
+        end = cut.rfind(". ")
+        text = cut[:end + 1] if end > max_chars // 2 else cut
+    return text
+
+
+def _densest_paragraph_parent(paragraphs: List, parent_of: Callable, text_of: Callable, key_of: Callable = id):
+    """
+    The element whose direct <p> children hold the most text, if it holds
+    at least half of all paragraph text on the page.
+    """
+    totals: Dict[int, int] = {}
+    nodes = {}
+    for p in paragraphs:
+        parent = parent_of(p)
+        if parent is None:
+            continue
+        key = key_of(parent)
+        nodes[key] = parent
+        totals[key] = totals.get(key, 0) + len(text_of(p))
+    if not totals:
+        return None
+    best = max(totals, key=totals.get)
+    return nodes[best] if totals[best] * 2 >= sum(totals.values()) else None
+
+
+# --- selectolax ---
+def _selectolax_extract(html: str) -> str:
+    try:
+        from selectolax.lexbor import LexborHTMLParser as Parser
+    except ImportError:
+        from selectolax.parser import HTMLParser as Parser
+    tree = Parser(html)
+    tree.strip_tags(BOILERPLATE_TAGS)
+    for selector in BOILERPLATE_SELECTORS:
+        for node in tree.css(selector):
+            node.decompose()
+
+    root = None
+    for selector in MAIN_SELECTORS:
+        root = tree.css_first(selector)
+        if root is not None:
+            break
+    if root is None:
+        root = _densest_paragraph_parent(
+            tree.css("p"), lambda p: p.parent, lambda p: p.text(strip=True),
+            # selectolax returns a new wrapper object for every access
+            key_of=lambda node: node.mem_id)
+    if root is None:
+        root = tree.body or tree.root
+    return root.text(separator=" ", strip=True) if root is not None else ""
+
+
+# --- lxml ---
+def _lxml_extract(html: str) -> str:
+    import lxml.html
+    from lxml import etree
+    from lxml.cssselect import CSSSelector
+
+    try:
+        tree = lxml.html.document_fromstring(html)
+    except (etree.ParserError, ValueError):
+        return ""
+    etree.strip_elements(tree, *BOILERPLATE_TAGS, etree.Comment, with_tail=False)
+    for selector in BOILERPLATE_SELECTORS:
+        for node in CSSSelector(selector)(tree):
+            node.drop_tree()
+
+    root = None
+    for selector in MAIN_SELECTORS:
+        found = CSSSelector(selector)(tree)
+        if found:
+            root = found[0]
+            break
+    if root is None:
+        root = _densest_paragraph_parent(
+            tree.iter("p"), lambda p: p.getparent(), lambda p: p.text_content().strip())
+    if root is None:
+        root = tree.body if tree.find("body") is not None else tree
+    return " ".join(t.strip() for t in root.itertext() if t.strip())
+
+
+# --- BeautifulSoup (html.parser) ---
+def _bs4_extract(html: str) -> str:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(BOILERPLATE_TAGS):
+        tag.decompose()
+    for selector in BOILERPLATE_SELECTORS:
+        for node in soup.select(selector):
+            node.decompose()
+
+    root = None
+    for selector in MAIN_SELECTORS:
+        root = soup.select_one(selector)
+        if root is not None:
+            break
+    if root is None:
+        root = _densest_paragraph_parent(
+            soup.find_all("p"), lambda p: p.parent, lambda p: p.get_text(strip=True))
+    if root is None:
+        root = soup.body or soup
+    return root.get_text(separator=" ", strip=True)
+
+
+def _available(module: str) -> bool:
+    try:
+        __import__(module)
+        return True
+    except ImportError:
+        return False
+
+
+if _available("selectolax"):
+    register_extractor("selectolax", _selectolax_extract)
+if _available("lxml.cssselect"):
+    register_extractor("lxml", _lxml_extract)
+register_extractor("html.parser", _bs4_extract)
+
+# Fastest available backend
+DEFAULT_BACKEND = next(iter(EXTRACTORS))
+
+
+def extract_text(html: str, backend: Optional[str] = None, max_chars: Optional[int] = MAX_CHARS) -> str:
+    """Main-content text of an HTML page, at most `max_chars` characters."""
+    if not html:
+        return ""
+    extractor = EXTRACTORS[backend or DEFAULT_BACKEND]
+    return normalize_text(extractor(html), max_chars)
@@ -0,0 +1,166 @@
+"""
+Persistent fetch cache and crawl progress log (SQLite).
+
+- pages:    raw HTML (zlib-compressed), extracted text, ETag / Last-Modified
+            and the time the page was fetched / last revalidated
+- searches: search result URLs per query
+- progress: one row per finished influencer, written as soon as it is done,
+            so an interrupted crawl resumes where it stopped. A failed crawl
+            (search error, no page fetched) only marks the row as failed and
+            keeps the corpora of the last good crawl; it is retried next run.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+CACHE_PATH = "./crawl_cache.sqlite"
+
+STATUS_OK = "ok"
+STATUS_FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    status INTEGER,
+    etag TEXT,
+    last_modified TEXT,
+    html BLOB,
+    text TEXT,
+    fetched_at REAL,
+    checked_at REAL
+);
+CREATE TABLE IF NOT EXISTS searches (
+    query TEXT,
+    num_results INTEGER,
+    urls TEXT,
+    fetched_at REAL,
+    PRIMARY KEY (query, num_results)
+);
+CREATE TABLE IF NOT EXISTS progress (
+    name TEXT PRIMARY KEY,
+    wikipedia_corpus TEXT,
+    updates_corpus TEXT,
+    crawled_at REAL,
+    status TEXT DEFAULT 'ok'
+);
+"""
+
+
+def has_corpus(row: Dict) -> bool:
+    """True if a progress row has any crawled text."""
+    return bool(row.get("wikipedia_corpus") or row.get("updates_corpus"))
+
+
+class FetchCache:
+    """Thread-safe wrapper around the cache database; entries older than `max_age` seconds are stale."""
+
+    def __init__(self, path: str = CACHE_PATH, max_age: float = 7 * 24 * 3600):
+        self.path = path
+        self.max_age = max_age
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        # Databases created before the status column was added
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(progress)")}
+        if "status" not in columns:
+            self._conn.execute("ALTER TABLE progress ADD COLUMN status TEXT DEFAULT 'ok'")
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def is_fresh(self, timestamp: Optional[float]) -> bool:
+        return timestamp is not None and time.time() - timestamp < self.max_age
+
+    # --- pages ---
+    def get_page(self, url: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, etag, last_modified, text, fetched_at, checked_at FROM pages WHERE url = ?",
+                (url,)).fetchone()
+        if row is None:
+            return None
+        keys = ("status", "etag", "last_modified", "text", "fetched_at", "checked_at")
+        return dict(zip(keys, row))
+
+    def put_page(self, url: str, status: int, html: Optional[str], text: str,
+                 etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        now = time.time()
+        blob = zlib.compress(html.encode("utf-8")) if html is not None else None
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, status, etag, last_modified, blob, text, now, now))
+
+    def touch_page(self, url: str) -> None:
+        """Mark a page as revalidated (304 Not Modified)."""
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE pages SET checked_at = ? WHERE url = ?", (time.time(), url))
+
+    def iter_html(self) -> Iterable[tuple]:
+        """(url, html) for every cached page with a body."""
+        with self._lock:
+            rows = self._conn.execute("SELECT url, html FROM pages WHERE html IS NOT NULL").fetchall()
+        for url, blob in rows:
+            yield url, zlib.decompress(blob).decode("utf-8")
+
+    # --- searches ---
+    def get_search(self, query: str, num_results: int) -> Optional[List[str]]:
+        """Cached search results if they are still fresh."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT urls, fetched_at FROM searches WHERE query = ? AND num_results = ?",
+                (query, num_results)).fetchone()
+        if row is None or not self.is_fresh(row[1]):
+            return None
+        return json.loads(row[0])
+
+    def put_search(self, query: str, num_results: int, urls: List[str]) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO searches VALUES (?, ?, ?, ?)",
+                (query, num_results, json.dumps(urls), time.time()))
+
+    # --- progress ---
+    def save_progress(self, row: Dict[str, str]) -> None:
+        """
+        Store a crawled row. A failed row (status "failed") only sets the status,
+        so the corpora and crawled_at of an earlier good crawl are kept.
+        """
+        with self._lock, self._conn:
+            if row.get("status", STATUS_OK) == STATUS_OK:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO progress VALUES (?, ?, ?, ?, ?)",
+                    (row["name"], row["wikipedia_corpus"], row["updates_corpus"], time.time(), STATUS_OK))
+            else:
+                self._conn.execute(
+                    "INSERT INTO progress VALUES (?, '', '', ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET status = excluded.status",
+                    (row["name"], time.time(), STATUS_FAILED))
+
+    def load_progress(self) -> Dict[str, Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, wikipedia_corpus, updates_corpus, crawled_at, status FROM progress").fetchall()
+        return {
+            name: {"name": name, "wikipedia_corpus": wiki, "updates_corpus": updates, "crawled_at": crawled_at,
+                   "status": status}
+            for name, wiki, updates, crawled_at, status in rows
+        }
+
+    def pending(self, names: Iterable[str]) -> List[str]:
+        """Names that were never crawled, whose last crawl failed or found nothing, or is stale."""
+        done = self.load_progress()
+        return [name for name in names
+                if name not in done
+                or done[name]["status"] != STATUS_OK
+                or not has_corpus(done[name])
+                or not self.is_fresh(done[name]["crawled_at"])]
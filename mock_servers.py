@@ -0,0 +1,291 @@
+"""
+Local stand-in HTTP servers for offline throughput measurements.
+
+PageServer serves synthetic web pages. Its `search` method mimics
+googlesearch.search, returning URLs that point back at the server, so that
+CrawlEngine can be exercised without network access:
+
+    async with PageServer(latency=0.2, error_rate=0.05) as server:
+        engine = CrawlEngine(search_fn=server.search, domain_interval=0, search_interval=0)
+
+MockOpenAIServer is an OpenAI-compatible /v1/chat/completions endpoint with
+simulated latency, a requests-per-window limit (429 + Retry-After) and
+random 5xx errors. It also implements the files and batches endpoints used
+by batch_scoring.py. A batch completes on its second status check.
+
+The server runs in a background thread, so the synchronous OpenAI client
+can talk to it:
+
+    with MockOpenAIServer(rpm_limit=600, error_rate=0.02) as server:
+        client = OpenAI(api_key="mock", base_url=server.base_url)
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from typing import List, Optional
+
+from aiohttp import web  # pip install aiohttp
+
+LOREM = (
+    "{name} is an American entertainer known for film television and music. "
+    "Born in 1985 {name} rose to fame after a breakout role and has since worked with major brands. "
+    "In recent interviews {name} talked about fitness, family, cooking and sustainable living. "
+    "The latest project from {name} premiered this year to strong reviews from critics and fans. "
+)
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-")
+
+
+def synthetic_page(name: str, paragraphs: int = 20) -> str:
+    """An HTML page with navigation/footer boilerplate around an article about `name`."""
+    nav = "".join(f'<li><a href="/section/{i}">Section {i}</a></li>' for i in range(40))
+    body = "".join(f"<p>{LOREM.format(name=name)}</p>" for _ in range(paragraphs))
+    return (
+        f"<html><head><title>{name}</title><style>body {{margin: 0}}</style>"
+        f"<script>var tracking = {{id: 1}};</script></head><body>"
+        f"<header><nav><ul>{nav}</ul></nav></header>"
+        f"<main><article><h1>{name}</h1>{body}</article></main>"
+        f"<aside>Related: {' '.join('Story %d' % i for i in range(30))}</aside>"
+        f"<footer>Copyright, privacy policy, terms of use, cookie settings</footer>"
+        f"</body></html>"
+    )
+
+
+class PageServer:
+    """aiohttp server on 127.0.0.1 with configurable latency and error rate."""
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, paragraphs: int = 20,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.paragraphs = paragraphs
+        self.host = host
+        self.port = port
+        self.hits = Counter()
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.hits[request.path] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            return web.Response(status=503, headers={"Retry-After": "0"})
+        name = request.match_info["slug"].replace("-", " ").title()
+        body = synthetic_page(name, self.paragraphs)
+        # Pages never change, so the ETag only depends on the content
+        etag = f'"{hashlib.sha1(body.encode()).hexdigest()[:16]}"'
+        if request.headers.get("If-None-Match") == etag:
+            self.hits["not_modified"] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(text=body, content_type="text/html", headers={"ETag": etag})
+
+    def search(self, query: str, num_results: int = 10, lang: str = "en") -> List[str]:
+        slug = _slug(query.replace("wikipedia", ""))
+        urls = [f"{self.base_url}/wikipedia.org/wiki/{slug}"]
+        urls += [f"{self.base_url}/news/{i}/{slug}" for i in range(num_results - 1)]
+        return urls[:num_results]
+
+    async def __aenter__(self) -> "PageServer":
+        app = web.Application()
+        app.router.add_get("/wikipedia.org/wiki/{slug}", self._handle)
+        app.router.add_get("/news/{i}/{slug}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self._runner.cleanup()
+
+
+def mock_evaluation(prompt: str) -> dict:
+    """Deterministic {"score", "reason"} for a prompt."""
+    digest = int(hashlib.sha1(prompt.encode("utf-8")).hexdigest(), 16)
+    return {"score": round((digest % 1001) / 1000, 3), "reason": "Mock evaluation."}
+
+
+class MockOpenAIServer:
+    """OpenAI-compatible chat completions server on 127.0.0.1, run in a background thread."""
+
+    def __init__(self, latency: float = 0.05, rpm_limit: Optional[int] = None, window: float = 60.0,
+                 error_rate: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.rpm_limit = rpm_limit
+        self.window = window
+        self.error_rate = error_rate
+        self.host = host
+        self.port = port
+        self.stats = Counter()
+        self._recent = deque()
+        self._files = {}
+        self._batches = {}
+        self._runner: Optional[web.AppRunner] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def respond(self, body: dict) -> str:
+        """Assistant message content for a request body; override for other formats."""
+        prompt = body["messages"][-1]["content"]
+        if "'brands'" in body["messages"][0]["content"]:
+            # Multi-brand request: one answer per "Brand Name:" line
+            brands = re.findall(r"^Brand Name: (.+)$", prompt, re.M)
+            influencer = prompt[prompt.rfind("Influencer Information:"):]
+            return json.dumps({"brands": {brand: mock_evaluation(brand + influencer) for brand in brands}})
+        return json.dumps(mock_evaluation(prompt))
+
+    def _rate_limited(self) -> Optional[float]:
+        """Seconds until a slot frees up, or None if the request is allowed."""
+        if not self.rpm_limit:
+            return None
+        now = time.monotonic()
+        while self._recent and now - self._recent[0] >= self.window:
+            self._recent.popleft()
+        if len(self._recent) >= self.rpm_limit:
+            return self.window - (now - self._recent[0])
+        self._recent.append(now)
+        return None
+
+    async def _chat(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.stats["requests"] += 1
+        retry_after = self._rate_limited()
+        if retry_after is not None:
+            self.stats["rate_limited"] += 1
+            return web.json_response(
+                {"error": {"message": "Rate limit reached", "type": "rate_limit_error", "code": "rate_limit_exceeded"}},
+                status=429, headers={"Retry-After": f"{retry_after:.3f}"})
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return web.json_response({"error": {"message": "Internal error", "type": "server_error"}}, status=500)
+
+        content = self.respond(body)
+        prompt_tokens = sum(len(m["content"]) for m in body["messages"]) // 4
+        completion_tokens = len(content) // 4
+        self.stats["completed"] += 1
+        self.stats["prompt_tokens"] += prompt_tokens
+        return web.json_response({
+            "id": f"chatcmpl-mock-{self.stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        })
+
+    # --- files / batches ---
+    def _store_file(self, data: bytes, filename: str, purpose: str) -> dict:
+        file_id = f"file-mock-{len(self._files) + 1}"
+        self._files[file_id] = data
+        return {"id": file_id, "object": "file", "bytes": len(data), "created_at": int(time.time()),
+                "filename": filename, "purpose": purpose, "status": "processed"}
+
+    async def _create_file(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        upload = form["file"]
+        return web.json_response(self._store_file(upload.file.read(), upload.filename, form.get("purpose", "batch")))
+
+    async def _file_content(self, request: web.Request) -> web.Response:
+        data = self._files.get(request.match_info["file_id"])
+        if data is None:
+            return web.json_response({"error": {"message": "No such file"}}, status=404)
+        return web.Response(body=data, content_type="application/jsonl")
+
+    async def _create_batch(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        batch_id = f"batch-mock-{len(self._batches) + 1}"
+        lines = self._files[body["input_file_id"]].decode("utf-8").splitlines()
+        output = []
+        for i, line in enumerate(filter(None, lines)):
+            item = json.loads(line)
+            content = self.respond(item["body"])
+            output.append(json.dumps({
+                "id": f"batch_req_{i}", "custom_id": item["custom_id"], "error": None,
+                "response": {"status_code": 200, "request_id": f"req_{i}", "body": {
+                    "id": f"chatcmpl-mock-{i}", "object": "chat.completion", "model": item["body"].get("model"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                                 "finish_reason": "stop"}]}},
+            }))
+        self.stats["batch_requests"] += len(output)
+        output_file = self._store_file("\n".join(output).encode("utf-8"), f"{batch_id}_output.jsonl", "batch_output")
+        self._batches[batch_id] = {
+            "id": batch_id, "object": "batch", "endpoint": body["endpoint"], "errors": None,
+            "input_file_id": body["input_file_id"], "completion_window": body["completion_window"],
+            "status": "in_progress", "output_file_id": None, "error_file_id": None,
+            "created_at": int(time.time()), "metadata": body.get("metadata"),
+            "request_counts": {"total": len(output), "completed": 0, "failed": 0},
+            "_output_file_id": output_file["id"],
+        }
+        return web.json_response(self._public_batch(batch_id))
+
+    def _public_batch(self, batch_id: str) -> dict:
+        batch = {k: v for k, v in self._batches[batch_id].items() if not k.startswith("_")}
+        return json.loads(json.dumps(batch))  # snapshot, later updates must not leak into it
+
+    async def _retrieve_batch(self, request: web.Request) -> web.Response:
+        batch = self._batches.get(request.match_info["batch_id"])
+        if batch is None:
+            return web.json_response({"error": {"message": "No such batch"}}, status=404)
+        response = self._public_batch(batch["id"])
+        if batch["status"] == "in_progress":
+            # Report progress once, then complete
+            batch.update(status="completed", output_file_id=batch["_output_file_id"],
+                         completed_at=int(time.time()))
+            batch["request_counts"]["completed"] = batch["request_counts"]["total"]
+        return web.json_response(response)
+
+    def _app(self) -> web.Application:
+        app = web.Application(client_max_size=256 * 1024 * 1024)
+        app.router.add_post("/v1/chat/completions", self._chat)
+        app.router.add_post("/v1/files", self._create_file)
+        app.router.add_get("/v1/files/{file_id}/content", self._file_content)
+        app.router.add_post("/v1/batches", self._create_batch)
+        app.router.add_get("/v1/batches/{batch_id}", self._retrieve_batch)
+        return app
+
+    async def _start(self) -> None:
+        self._runner = web.AppRunner(self._app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    def __enter__(self) -> "MockOpenAIServer":
+        self._loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self._start())
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self._runner.cleanup())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="mock-openai", daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
@@ -1,20 +1,21 @@
 import os
+import csv
+import argparse
 import pandas as pd
 import json
 import requests
-from time import sleep
 from dotenv import load_dotenv
-from typing import Dict, Any
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from openai import OpenAI
 
+from score_cache import CACHE_PATH, ScoreCache, prompt_key, split_cached
+from scoring_config import BRANDS, MODEL, criteria, read_corpus, validate_result
+
 # Load environment variables from .env file
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-def parse_model_response(content: str) -> Dict[str, Any]:
-    """
-    모델의 응답이 코드 블록(```json ... ```) 형태일 경우 이를 제거하고 JSON 파싱을 수행합니다.
-    """
+def strip_code_fence(content: str) -> str:
     # 응답 내용이 코드 블록으로 감싸져 있다면 제거
     if content.startswith("```"):
         lines = content.splitlines()
@@ -25,7 +26,13 @@ def parse_model_response(content: str) -> Dict[str, Any]:
         if lines and lines[-1].strip().startswith("```"):
             lines = lines[:-1]
         content = "\n".join(lines)
-    
+    return content
+
+def parse_model_response(content: str) -> Dict[str, Any]:
+    """
+    모델의 응답이 코드 블록(```json ... ```) 형태일 경우 이를 제거하고 JSON 파싱을 수행합니다.
+    """
+    content = strip_code_fence(content)
     try:
         return json.loads(content)
     except json.JSONDecodeError as e:
@@ -33,71 +40,37 @@ def parse_model_response(content: str) -> Dict[str, Any]:
         print("Content received:", content)
         return {"score": None, "reason": "JSON parsing error"}
 
-# Create an instance of the OpenAI client (adjust this according to your library)
-from openai import OpenAI  # Adjust import if needed
+TEMPERATURE = 0.0  # 결정론적 출력을 위해 설정
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+_client = None
+
+def get_client() -> OpenAI:
+    """
+    Shared OpenAI client, created on first use so that importing this module
+    does not require an API key. OPENAI_BASE_URL points it at another
+    OpenAI-compatible server (e.g. mock_servers.MockOpenAIServer).
+    """
+    global _client
+    if _client is None:
+        _client = OpenAI(api_key=OPENAI_API_KEY)
+    return _client
 
-BRANDS = ['lyft', 'redbull', 'kroger', 'sephora', 'nestle', 'lululemon']
 INPUT_CSV_FILE = 'top_influencer_corpus.csv'
 OUTPUT_CSV_FILE = 'ad_suitability_results.csv'
 
-criteria = {
-    "lululemon":"""- Brand Alignment & Lifestyle: Influencers should embody an active, mindful, and balanced lifestyle that aligns with lululemon’s core values of wellness, yoga, and community engagement.
-- Authenticity & Credibility: The influencer’s content must appear genuine and relatable, with a clear focus on health, fitness, and personal growth, ensuring they truly live the lifestyle they promote.
-- High-Quality Aesthetics: Visual and content quality should reflect lululemon’s premium brand image, emphasizing clean, modern, and inspiring visuals.
-- Community Engagement: Prioritize influencers with highly engaged, loyal audiences who participate in conversations around wellness, sustainability, and active living.
-- Ethical & Sustainable Practices: Influencers should demonstrate a commitment to ethical practices and sustainability, aligning with lululemon’s emphasis on responsible living.""",
-    
-    "kroger":"""- Brand Alignment & Everyday Living: Influencers should embody reliability and approachability, resonating with Kroger’s commitment to quality, affordability, and convenience for everyday family life.
-- Authenticity & Community Connection: Content must be genuine and relatable, reflecting local community values and a strong connection to family and neighborhood life.
-- Culinary Expertise & Health Focus: Influencers should emphasize healthy eating, cooking tips, and food quality, aligning with Kroger’s focus on fresh produce and nutritional well-being.
-- Diversity & Inclusivity: The influencer must appeal to a diverse customer base, representing various lifestyles and cultural backgrounds in an authentic manner.
-- Sustainability & Local Sourcing: A commitment to sustainability, local sourcing, and eco-friendly practices is key, ensuring that the influencer’s message aligns with Kroger’s initiatives in environmental responsibility.
-""",
-    
-    "lyft": """- Urban Mobility & Connectivity: Influencers should embody a modern, tech-savvy lifestyle that reflects Lyft’s commitment to innovative and accessible urban transportation.
-- Reliability & Trustworthiness: Content must emphasize safety, dependability, and ease of use, mirroring Lyft’s reputation for reliable ride-sharing services.
-- Inclusivity & Community Focus: Influencers should appeal to a diverse urban audience, fostering a sense of community and inclusivity that resonates with Lyft’s user base.
-- Sustainability & Social Impact: Prioritize influencers who highlight eco-friendly transportation options and community-driven initiatives, aligning with Lyft’s commitment to reducing environmental impact.
-- Engagement & Storytelling: Influencers must be adept at sharing engaging, authentic narratives that connect everyday experiences with the convenience and innovation of Lyft’s services.
-""",
-    
-    "nestle":"""- Brand Alignment & Diverse Portfolio: Influencers should reflect the wide range of Nestle products—from beverages to nutritional foods—while appealing to a global audience.
-- Authenticity & Trustworthiness: Content must be genuine and resonate with values of quality, safety, and nutritional excellence that consumers associate with Nestle.
-- Health & Nutrition Focus: Influencers should emphasize balanced diets and healthy lifestyles, aligning with Nestle’s commitment to nutrition and wellness.
-- Sustainability & Ethical Practices: It is essential that influencers demonstrate a commitment to sustainability, ethical sourcing, and environmental responsibility.
-- Community Engagement & Inclusivity: Prioritize influencers who build strong, engaged communities across diverse demographics, promoting inclusivity and consumer well-being.
-""",
-    
-    "redbull":"""- Brand Alignment & Extreme Lifestyle: Influencers should embody a bold, adventurous lifestyle that aligns with Redbull’s core identity of extreme sports, high-energy activities, and pushing boundaries.
-- Authenticity & Energy: The influencer’s content must radiate genuine enthusiasm and a passion for adrenaline-fueled pursuits, resonating with Redbull’s energetic brand ethos.
-- Dynamic Visual Storytelling: Content should be visually compelling and dynamic, capturing thrilling moments and high-impact visuals that reflect the brand’s spirit of adventure.
-- Community Engagement: Prioritize influencers who actively engage with communities interested in extreme sports, innovation, and adventurous lifestyles, fostering an interactive and loyal fanbase.
-- Innovation & Trendsetting: Influencers should be recognized for their creativity and willingness to experiment, positioning themselves as trendsetters within the realms of sports, music, and culture.
-""",
-    
-    "sephora":"""- Beauty Expertise & Trendsetting: Influencers should have a strong passion for beauty, skincare, and cosmetics, consistently staying ahead of trends and experimenting with new looks.
-- Authenticity & Inclusivity: Content must be genuine and diverse, appealing to a wide audience by showcasing a range of skin tones, ages, and styles that align with Sephora’s inclusive brand ethos.
-- High-Quality Visual Content: The influencer’s imagery should be polished and visually compelling, reflecting Sephora’s premium, high-fashion aesthetic.
-- Engagement & Community Building: Prioritize influencers who actively engage with their audience through tutorials, reviews, and interactive content that fosters a community centered around beauty innovation.
-- Innovation & Product Knowledge: Influencers should demonstrate deep product knowledge and a willingness to experiment with new beauty trends, positioning themselves as trusted advisors in the beauty space.
-"""
-}
-
-def evaluate_influencer_for_brand(influencer_name: str,
-                                  wikipedia_corpus: str,
-                                  updates_corpus: str,
-                                  brand_name: str,
-                                  brand_criteria: str) -> Dict[str, Any]:
-    system_prompt = (
-        "You are an AI agent specialized in determining advertising suitability. "
-        "You have in-depth knowledge of influencer marketing and brand advertising criteria. "
-        "Given details about an influencer and a brand, you must evaluate how suitable the influencer is for advertising that brand. "
-        "Your response must be strictly formatted as JSON with exactly two keys: 'score' and 'reason'."
-    )
-
-    user_prompt = f"""
+SYSTEM_PROMPT = (
+    "You are an AI agent specialized in determining advertising suitability. "
+    "You have in-depth knowledge of influencer marketing and brand advertising criteria. "
+    "Given details about an influencer and a brand, you must evaluate how suitable the influencer is for advertising that brand. "
+    "Your response must be strictly formatted as JSON with exactly two keys: 'score' and 'reason'."
+)
+
+def build_user_prompt(influencer_name: str,
+                      wikipedia_corpus: str,
+                      updates_corpus: str,
+                      brand_name: str,
+                      brand_criteria: str) -> str:
+    return f"""
 Influencer Information:
 Name of Influencer: {influencer_name}
 Wikipedia of Influencer: {wikipedia_corpus}
@@ -120,58 +93,245 @@ Instructions:
 5. Do not include any additional text, commentary, or formatting outside of the JSON object.
     """
 
-    
+# --- 여러 브랜드를 한 번에 평가 ---
+# 인플루언서 코퍼스(입력의 대부분)를 브랜드마다 다시 보내지 않고 한 번만 보냄.
+# 지시문과 브랜드 기준을 앞에, 인플루언서 정보를 뒤에 두어 프롬프트 앞부분이
+# 모든 인플루언서에 대해 같도록 함 (provider prompt caching 적중).
+
+MULTI_BRAND_SYSTEM_PROMPT = (
+    "You are an AI agent specialized in determining advertising suitability. "
+    "You have in-depth knowledge of influencer marketing and brand advertising criteria. "
+    "Given details about an influencer and several brands, you must evaluate how suitable the influencer is for advertising each brand. "
+    "Your response must be strictly formatted as JSON with a single key 'brands' that maps every brand name "
+    "to an object with exactly two keys: 'score' and 'reason'."
+)
+
+def build_multi_brand_prompt(influencer_name: str,
+                             wikipedia_corpus: str,
+                             updates_corpus: str,
+                             brands: List[str]) -> str:
+    example = ",\n".join(f'           "{brand}": {{"score": 0.XXX, "reason": "Your brief explanation here."}}'
+                         for brand in brands)
+    brand_info = "\n".join(f"Brand Name: {brand}\nBrand Criteria for Ad Model: {criteria.get(brand, '')}"
+                           for brand in brands)
+    return f"""
+Instructions:
+1. Assess the influencer's overall suitability for each brand listed below, based on the information provided.
+2. For every brand, provide a "score" between 0.000 and 1.000 (inclusive), formatted as a float with exactly three decimal places.
+   A score of 1.000 indicates exceptional suitability, while 0.000 indicates unsuitability.
+3. For every brand, provide a brief explanation (one or two sentences) as "reason", highlighting key points that influenced your evaluation.
+4. Output your response strictly as a JSON object, exactly in the following format, with every brand name exactly as given:
+   {{
+       "brands": {{
+{example}
+       }}
+   }}
+5. Do not include any additional text, commentary, or formatting outside of the JSON object.
+---
+Brand Information:
+{brand_info}
+---
+Influencer Information:
+Name of Influencer: {influencer_name}
+Wikipedia of Influencer: {wikipedia_corpus}
+Other Updates of Influencer: {updates_corpus}
+    """
+
+def multi_brand_cache_key(influencer_name: str, wikipedia_corpus: str, updates_corpus: str, brand: str) -> str:
+    """
+    Result-cache key of one brand in multi-brand mode. It depends only on the
+    influencer and that brand's criteria, so editing one brand's criteria
+    re-scores only that brand.
+    """
+    user_prompt = build_multi_brand_prompt(influencer_name, wikipedia_corpus, updates_corpus, [brand])
+    return prompt_key(MODEL, MULTI_BRAND_SYSTEM_PROMPT, user_prompt, TEMPERATURE, extra=brand)
+
+def parse_multi_brand_response(content: str, brands: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Valid per-brand results from a multi-brand answer. Brands that are
+    missing or malformed are left out, so the caller can retry just those.
+    """
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",  # 모델 이름이 올바른지 확인하세요.
-            messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
-            temperature=0.0  # 결정론적 출력을 위해 설정
-        )
-        content = response.choices[0].message.content
-        print(content)
-        result = parse_model_response(content)
-        return result
-    except Exception as e:
-        print(f"Error processing influencer {influencer_name} for brand {brand_name}: {e}")
-        return {"score": None, "reason": "Error during evaluation"}
+        data = json.loads(strip_code_fence(content.strip()))
+    except json.JSONDecodeError as e:
+        print("JSON parsing error:", e)
+        print("Content received:", content)
+        return {}
+    answers = data.get("brands", data) if isinstance(data, dict) else {}
+    if not isinstance(answers, dict):
+        return {}
+    # 브랜드 이름은 대소문자 구분 없이 매칭
+    answers = {str(name).strip().lower(): value for name, value in answers.items()}
+    results = {}
+    for brand in brands:
+        result = validate_result(answers.get(brand.lower()))
+        if result is not None:
+            results[brand] = result
+    return results
+
+def score_pairs(df: pd.DataFrame,
+                brands_for: Callable[[str], List[str]],
+                executor,
+                cache: Optional[ScoreCache] = None,
+                multi_brand: bool = False,
+                refresh: bool = False,
+                on_row: Optional[Callable[[Dict[str, Any]], None]] = None
+                ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Score the (brand, influencer) pairs of a corpus (influencer,
+    wikipedia_corpus, updates_corpus columns); `brands_for(influencer)` gives
+    the brands of each row. Pairs found in `cache` are not sent again, and new
+    results are stored in it. `on_row` gets every row, the cached ones first
+    and the others as they finish. Returns (cached_rows, new_rows).
+    """
+    from scoring_executor import MultiBrandJob, ScoringJob
+
+    cached_rows, jobs = [], []
+    if multi_brand:
+        # 인플루언서마다 캐시에 없는 브랜드만 모아 한 번의 요청으로 평가
+        for row in df.itertuples(index=False):
+            keys = {}
+            for brand in brands_for(row.influencer):
+                key = multi_brand_cache_key(row.influencer, row.wikipedia_corpus, row.updates_corpus, brand)
+                result = cache.get(key) if cache is not None and not refresh else None
+                if result is None:
+                    keys[brand] = key
+                else:
+                    cached_rows.append({"brand": brand, "influencer": row.influencer, **result})
+            if keys:
+                jobs.append(MultiBrandJob(row.influencer, list(keys), row.wikipedia_corpus, row.updates_corpus,
+                                          meta={"cache_keys": keys}))
+        n_pending = sum(len(job.brands) for job in jobs)
+    else:
+        # 각 인플루언서와 브랜드 조합에 대한 요청 생성
+        for row in df.itertuples(index=False):
+            for brand in brands_for(row.influencer):
+                user_prompt = build_user_prompt(row.influencer, row.wikipedia_corpus, row.updates_corpus,
+                                                brand, criteria.get(brand, ""))
+                jobs.append(ScoringJob(row.influencer, brand, user_prompt))
+        # 캐시에 있는 조합(입력이 바뀌지 않은 조합)은 다시 보내지 않음
+        if cache is not None:
+            cached_rows, jobs = split_cached(jobs, cache, MODEL, TEMPERATURE, refresh=refresh)
+        n_pending = len(jobs)
+    print(f"{len(cached_rows) + n_pending} pairs: {len(cached_rows)} cached, "
+          f"{n_pending} to score in {len(jobs)} requests")
+
+    if on_row is not None:
+        for row in cached_rows:
+            on_row(row)
+    new_rows = []
+
+    def on_result(job, result):
+        for row in result if isinstance(result, list) else [result]:
+            new_rows.append(row)
+            if cache is not None:
+                cache.put(job.meta["cache_keys"][row["brand"]], row, MODEL, row["brand"], row["influencer"])
+            if on_row is not None:
+                on_row(row)
+
+    executor.run(jobs, on_result=on_result)
+    return cached_rows, new_rows
 
 def main():
+    parser = argparse.ArgumentParser(description="Score every influencer x brand pair with the LLM.")
+    parser.add_argument("--input", default=INPUT_CSV_FILE,
+                        help="corpus CSV, e.g. the output of corpus_compress.py (influencer or name column)")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent requests")
+    parser.add_argument("--rpm", type=float, default=500, help="requests-per-minute budget")
+    parser.add_argument("--tpm", type=float, default=200_000, help="tokens-per-minute budget")
+    parser.add_argument("--batch", action="store_true",
+                        help="use the Batch API (half price, no rate limits; see batch_scoring.py)")
+    parser.add_argument("--brands", nargs="+", choices=BRANDS, default=BRANDS, help="brands to score")
+    parser.add_argument("--multi-brand", action="store_true",
+                        help="score all brands of an influencer in one request (corpus sent once per influencer)")
+    parser.add_argument("--cache", default=CACHE_PATH,
+                        help="result cache; pairs whose prompt did not change are not sent again")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the result cache")
+    parser.add_argument("--refresh", action="store_true", help="re-score every pair (the cache is still updated)")
+    parser.add_argument("--cache-ttl-days", type=float, default=None, help="ignore cached results older than this")
+    parser.add_argument("--cache-max-entries", type=int, default=None,
+                        help="keep at most this many cached results (least recently used are dropped)")
+    parser.add_argument("--shortlist", type=int, default=None, metavar="K",
+                        help="only score the K influencers per brand closest to the brand criteria "
+                             "(embedding_index.py); other pairs keep their previous results")
+    args = parser.parse_args()
+    if args.batch and args.multi_brand:
+        parser.error("--multi-brand is not supported with --batch")
+
+    cache = None
+    if not args.no_cache:
+        ttl = args.cache_ttl_days * 86400 if args.cache_ttl_days is not None else None
+        cache = ScoreCache(args.cache, ttl=ttl, max_entries=args.cache_max_entries)
+
+    if args.batch:
+        from batch_scoring import run
+        run(args.input, cache=cache, refresh=args.refresh, brands=args.brands, shortlist=args.shortlist)
+        if cache is not None:
+            cache.close()
+        return
+
+    from scoring_executor import ScoringExecutor
+
     # pandas를 사용하여 CSV 읽기
-    df = pd.read_csv(INPUT_CSV_FILE)
-    
-    # 결과를 저장할 리스트 초기화
-    results = []
-    
-    # 각 인플루언서와 브랜드에 대해 평가 진행
-    for idx, row in df.iterrows():
-        influencer = row['influencer']
-        wikipedia_corpus = row['wikipedia_corpus']
-        updates_corpus = row['updates_corpus']
-        
-        for brand in BRANDS:
-            print(f"Evaluating {influencer} for {brand}...")
-            brand_criteria = criteria.get(brand, "")
-            evaluation = evaluate_influencer_for_brand(
-                influencer,
-                wikipedia_corpus,
-                updates_corpus,
-                brand,
-                brand_criteria
-            )
-            results.append({
-                "brand": brand,
-                "influencer": influencer,
-                "score": evaluation.get("score"),
-                "reason": evaluation.get("reason")
-            })
-            
-            # 속도 제한을 위해 잠시 대기
-            sleep(1)
-    
-    # 결과 리스트를 pandas DataFrame으로 변환
-    results_df = pd.DataFrame(results)
-    results_df.to_csv(OUTPUT_CSV_FILE, index=False, encoding='utf-8')
+    df = read_corpus(args.input)
+    brands = args.brands
+
+    # 임베딩 유사도로 브랜드마다 상위 K명만 골라 LLM에 보냄
+    shortlisted = None
+    if args.shortlist is not None:
+        from embedding_index import shortlist_pairs
+        shortlisted = shortlist_pairs(df, brands, args.shortlist)
+        print(f"Shortlist: {len(shortlisted)} of {len(df) * len(brands)} pairs")
+
+    def brands_for(influencer):
+        return [brand for brand in brands if shortlisted is None or (brand, influencer) in shortlisted]
+
+    pairs = [(brand, influencer) for influencer in df['influencer'] for brand in brands_for(influencer)]
+
+    # 이번에 평가하지 않는 브랜드(또는 shortlist에 들지 않은 조합)의 기존 결과는 그대로 유지
+    kept_rows = []
+    if (set(brands) != set(BRANDS) or shortlisted is not None) and os.path.exists(OUTPUT_CSV_FILE):
+        old = pd.read_csv(OUTPUT_CSV_FILE)
+        scored = set(pairs)
+        keep = [(brand, influencer) not in scored
+                for brand, influencer in zip(old['brand'].astype(str).str.lower(), old['influencer'])]
+        kept_rows = old[keep].to_dict('records')
+
+    # 동시에 평가하고, 끝나는 대로 결과를 바로 임시 파일에 기록 (중간에 멈춰도 결과가 남음).
+    # 기존 결과 CSV는 모든 평가가 끝난 뒤에만 교체됨
+    partial_path = OUTPUT_CSV_FILE + ".partial"
+    executor = ScoringExecutor(max_workers=args.workers, rpm=args.rpm, tpm=args.tpm)
+    with open(partial_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["brand", "influencer", "score", "reason"])
+        writer.writeheader()
+        writer.writerows(kept_rows)
+        f.flush()
+
+        def on_row(row):
+            print(f"Evaluated {row['influencer']} for {row['brand']}: {row['score']}")
+            writer.writerow(row)
+            f.flush()
+
+        cached_rows, new_rows = score_pairs(df, brands_for, executor, cache, multi_brand=args.multi_brand,
+                                            refresh=args.refresh, on_row=on_row)
+    print(f"Executor stats: {executor.stats}")
+    if cache is not None:
+        cache.close()
+
+    # 입력 순서대로 다시 저장
+    by_pair = {(row['brand'], row['influencer']): row for row in cached_rows + new_rows}
+    results_df = pd.DataFrame(kept_rows + [by_pair[pair] for pair in pairs],
+                              columns=["brand", "influencer", "score", "reason"])
+    results_df.to_csv(partial_path, index=False, encoding='utf-8')
+    os.replace(partial_path, OUTPUT_CSV_FILE)
     print(f"Results saved to {OUTPUT_CSV_FILE}")
 
+    # Parquet 데이터셋이 있으면 함께 갱신 (실패한 조합은 기존 점수를 덮어쓰지 않도록 제외)
+    import dataset_store
+    scored_rows = [row for row in cached_rows + new_rows if row['score'] is not None]
+    if dataset_store.exists() and scored_rows:
+        written = dataset_store.upsert_culture_scores(pd.DataFrame(scored_rows))
+        print(f"{written} rows updated in {dataset_store.store_path()}")
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
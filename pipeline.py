@@ -0,0 +1,386 @@
+"""
+Incremental pipeline: crawl -> dedup -> compress -> news scoring, and
+images -> appearance scoring, then publish the dashboard data.
+
+    python pipeline.py                 # run everything that is out of date
+    python pipeline.py --list          # show the stages and their inputs / outputs
+    python pipeline.py --no-crawl      # use the crawl progress already in the fetch cache
+    UTA_TIMING=1 python pipeline.py    # log per-stage wall time and peak memory (timing.py)
+
+Every influencer's inputs are fingerprinted per stage (corpus text, image
+bytes, brand criteria, prompts, model and stage parameters) and the
+fingerprints are kept in pipeline_state.json. A stage only processes the
+influencers whose fingerprint changed, so adding a few influencers only
+crawls, compresses and scores those. The text branch and the appearance
+branch do not depend on each other and run in parallel.
+
+The fingerprints are committed only after "publish" has written
+ad_suitability_results.csv, the appearance CSVs and the Parquet dataset,
+so an interrupted run redoes the unpublished rows next time.
+"""
+import argparse
+import asyncio
+import contextvars
+import csv
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set
+
+import pandas as pd
+
+import timing
+from data_layer import APPEARANCE_CSV, BRANDS, META_CSV
+
+STATE_FILE = "pipeline_state.json"
+CORPUS_CSV = "influencer_corpus.csv"
+COMPRESSED_CSV = "compressed_corpus.csv"
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable hash of JSON-serializable parts."""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PipelineState:
+    """Per-stage {key: fingerprint} maps, saved as JSON."""
+
+    def __init__(self, path: str = STATE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self.fingerprints: Dict[str, Dict[str, str]] = {}
+        self._pending: Dict[str, Dict[str, str]] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.fingerprints = json.load(f).get("fingerprints", {})
+
+    def changed(self, stage: str, key: str, value: str) -> bool:
+        with self._lock:
+            return self.fingerprints.get(stage, {}).get(key) != value
+
+    def mark(self, stage: str, key: str, value: str) -> None:
+        """Record a fingerprint; it is only kept once commit() runs."""
+        with self._lock:
+            self._pending.setdefault(stage, {})[key] = value
+
+    def commit(self) -> None:
+        with self._lock:
+            for stage, values in self._pending.items():
+                self.fingerprints.setdefault(stage, {}).update(values)
+            self._pending = {}
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"fingerprints": self.fingerprints, "updated_at": time.time()}, f)
+            os.replace(tmp, self.path)
+
+
+@dataclass
+class Context:
+    options: argparse.Namespace
+    state: PipelineState
+    # Artifacts handed from one stage to the next
+    data: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Stage:
+    name: str
+    run: Callable[[Context], None]
+    inputs: List[str]
+    outputs: List[str]
+    after: List[str] = field(default_factory=list)
+
+
+# --- stages ---
+def roster(ctx: Context) -> List[str]:
+    df = pd.read_csv(ctx.options.roster, encoding="utf-8-sig")
+    column = "influencer" if "influencer" in df.columns else "name"
+    return list(dict.fromkeys(df[column].dropna().astype(str).str.strip()))
+
+
+def run_crawl(ctx: Context) -> None:
+    from fetch_cache import FetchCache
+
+    names = roster(ctx)
+    ctx.data["roster"] = names
+    cache = FetchCache(ctx.options.cache, max_age=ctx.options.max_age_days * 24 * 3600)
+    # crawl.py와 같은 키 (이름의 콤마 제거)
+    keys = [name.replace(",", "") for name in names]
+    todo = [] if ctx.options.no_crawl else cache.pending(keys)
+    print(f"[crawl] {len(todo)} of {len(names)} influencers to crawl")
+    if todo:
+        from crawl_engine import crawl_all
+        asyncio.run(crawl_all(todo, cache=cache, on_result=cache.save_progress))
+    ctx.data["progress"] = cache.load_progress()
+    cache.close()
+
+
+def run_dedup(ctx: Context) -> None:
+    from fetch_cache import has_corpus
+
+    # test.ipynb의 중복 제거: 이름 기준으로 첫 번째 결과만 유지
+    progress = ctx.data["progress"]
+    rows = []
+    for name in ctx.data["roster"]:
+        row = progress.get(name.replace(",", ""))
+        # 실패해서 내용이 없는 크롤링 결과는 제외 (다음 실행에서 다시 크롤링)
+        if row is not None and has_corpus(row):
+            rows.append({"name": name, "wikipedia_corpus": row["wikipedia_corpus"],
+                         "updates_corpus": row["updates_corpus"]})
+    corpus = pd.DataFrame(rows, columns=["name", "wikipedia_corpus", "updates_corpus"])
+    corpus = corpus.drop_duplicates(subset=["name"], keep="first")
+    corpus.to_csv(CORPUS_CSV, index=False, encoding="utf-8-sig", quoting=csv.QUOTE_ALL)
+    ctx.data["corpus"] = corpus.rename(columns={"name": "influencer"})
+    print(f"[dedup] {len(corpus)} influencers with a corpus")
+
+
+def run_compress(ctx: Context) -> None:
+    from corpus_compress import brand_queries, compress_influencer
+    from scoring_config import criteria
+
+    budget = ctx.options.budget
+    queries = brand_queries()
+    previous = {}
+    if os.path.exists(COMPRESSED_CSV):
+        old = pd.read_csv(COMPRESSED_CSV, keep_default_na=False)
+        previous = {row.influencer: row for row in old.itertuples(index=False)}
+
+    rows, changed = [], 0
+    for row in ctx.data["corpus"].itertuples(index=False):
+        key = fingerprint(row.wikipedia_corpus, row.updates_corpus, budget, criteria)
+        if ctx.state.changed("compress", row.influencer, key) or row.influencer not in previous:
+            wikipedia, updates, _ = compress_influencer(row.wikipedia_corpus, row.updates_corpus, budget, queries)
+            changed += 1
+        else:
+            wikipedia, updates = previous[row.influencer].wikipedia_corpus, previous[row.influencer].updates_corpus
+        rows.append({"influencer": row.influencer, "wikipedia_corpus": wikipedia, "updates_corpus": updates})
+        ctx.state.mark("compress", row.influencer, key)
+    compressed = pd.DataFrame(rows, columns=["influencer", "wikipedia_corpus", "updates_corpus"])
+    compressed.to_csv(COMPRESSED_CSV, index=False, encoding="utf-8")
+    ctx.data["compressed"] = compressed
+    print(f"[compress] {changed} of {len(compressed)} influencers recompressed")
+
+
+def run_news(ctx: Context) -> None:
+    from news_scoring import (MULTI_BRAND_SYSTEM_PROMPT, SYSTEM_PROMPT, TEMPERATURE, build_multi_brand_prompt,
+                              build_user_prompt, score_pairs)
+    from score_cache import ScoreCache
+    from scoring_config import MODEL, criteria
+    from scoring_executor import ScoringExecutor
+
+    brands = [brand.lower() for brand in BRANDS]
+    options = ctx.options
+    mode = "multi" if options.multi_brand else "single"
+    # 프롬프트 문구가 바뀌어도 다시 평가되도록 빈 값으로 만든 템플릿을 지문에 포함
+    if options.multi_brand:
+        prompt = (MULTI_BRAND_SYSTEM_PROMPT, build_multi_brand_prompt("", "", "", []))
+    else:
+        prompt = (SYSTEM_PROMPT, build_user_prompt("", "", "", "", ""))
+    shortlisted = None
+    if options.shortlist is not None:
+        # 브랜드마다 임베딩 유사도 상위 K명만 평가; 인플루언서가 든 shortlist 브랜드도 지문에 포함
+        from embedding_index import shortlist_pairs
+        shortlisted = shortlist_pairs(ctx.data["compressed"], brands, options.shortlist)
+    keys, todo_brands = {}, {}
+    for row in ctx.data["compressed"].itertuples(index=False):
+        row_brands = [b for b in brands if shortlisted is None or (b, row.influencer) in shortlisted]
+        key = fingerprint(row.wikipedia_corpus, row.updates_corpus, {b: criteria.get(b, "") for b in brands},
+                          prompt, MODEL, TEMPERATURE, mode, row_brands)
+        if not ctx.state.changed("news", row.influencer, key):
+            continue
+        if row_brands:
+            keys[row.influencer] = key
+            todo_brands[row.influencer] = row_brands
+        else:
+            ctx.state.mark("news", row.influencer, key)
+    print(f"[news] {len(todo_brands)} influencers to score")
+    ctx.data["culture_rows"] = []
+    if not todo_brands:
+        return
+
+    cache = ScoreCache(options.score_cache)
+    executor = ScoringExecutor(max_workers=options.workers, rpm=options.rpm, tpm=options.tpm)
+    corpus = ctx.data["compressed"]
+    cached_rows, new_rows = score_pairs(corpus[corpus["influencer"].isin(todo_brands)], todo_brands.__getitem__,
+                                        executor, cache, multi_brand=options.multi_brand)
+    cache.close()
+
+    rows = cached_rows + new_rows
+    failed = {row["influencer"] for row in rows if row["score"] is None}
+    for influencer, key in keys.items():
+        if influencer not in failed:
+            ctx.state.mark("news", influencer, key)
+    ctx.data["culture_rows"] = rows
+    print(f"[news] {len(rows)} pairs ({len(cached_rows)} from the score cache, {len(failed)} influencers failed)")
+
+
+def run_appearance(ctx: Context) -> None:
+    from glob import glob
+
+    from appearance_scoring import BACKENDS, BRAND_PROMPTS, preprocess_images, score_images
+    from thumbnails import file_digest
+
+    options = ctx.options
+    ctx.data["appearance_rows"] = {}
+    images = sorted(glob(os.path.join(options.images, "*.jpg")))
+    prompts = {brand: BRAND_PROMPTS[brand] for brand in BRANDS}
+    todo, keys = [], {}
+    for path in images:
+        influencer = os.path.splitext(os.path.basename(path))[0]
+        key = fingerprint(file_digest(path), prompts, options.appearance_backend)
+        if ctx.state.changed("appearance", influencer, key):
+            todo.append(path)
+            keys[influencer] = key
+    print(f"[appearance] {len(todo)} of {len(images)} images to score")
+    if not todo:
+        return
+
+    caches = preprocess_images(todo, options.preprocess_workers)
+    rows = score_images(BACKENDS[options.appearance_backend](), caches, BRANDS)
+    failed = {row[0] for brand_rows in rows.values() for row in brand_rows if row[1] is None}
+    for influencer, key in keys.items():
+        if influencer not in failed:
+            ctx.state.mark("appearance", influencer, key)
+    ctx.data["appearance_rows"] = rows
+
+
+def _merge_appearance_csv(brand: str, rows: List[list]) -> None:
+    path = APPEARANCE_CSV.format(brand=brand)
+    new = pd.DataFrame(rows, columns=["influencer", "score", "reason"])
+    if os.path.exists(path):
+        old = pd.read_csv(path, encoding="utf-8-sig")
+        new = pd.concat([old[~old["influencer"].isin(new["influencer"])], new], ignore_index=True)
+    new = new.sort_values(by="score", ascending=False)
+    new.to_csv(path, index=False, quoting=csv.QUOTE_ALL, encoding="utf-8-sig")
+
+
+def run_publish(ctx: Context) -> None:
+    import dataset_store
+    from batch_scoring import merge_results
+    from thumbnails import file_digest
+
+    culture_rows = ctx.data.get("culture_rows", [])
+    appearance_rows = ctx.data.get("appearance_rows", {})
+    meta_key = file_digest(ctx.options.roster)
+    rebuild = not dataset_store.exists() or ctx.state.changed("publish", "roster", meta_key)
+
+    # CSV 갱신 (merge_results는 데이터셋이 있으면 데이터셋도 갱신)
+    if culture_rows:
+        merge_results(culture_rows)
+    for brand, rows in appearance_rows.items():
+        if rows:
+            _merge_appearance_csv(brand, rows)
+    if rebuild:
+        # 새 데이터셋이거나 로스터(메타데이터)가 바뀌면 전체를 다시 만듦
+        counts = dataset_store.convert()
+        print(f"[publish] dataset rebuilt: {sum(counts.values())} rows")
+    elif appearance_rows:
+        frames = [pd.DataFrame(rows, columns=["influencer", "score", "reason"]).assign(brand=brand)
+                  for brand, rows in appearance_rows.items() if rows]
+        if frames:
+            dataset_store.upsert_appearance_scores(pd.concat(frames, ignore_index=True))
+    ctx.state.mark("publish", "roster", meta_key)
+    print(f"[publish] {len(culture_rows)} culture-fit and "
+          f"{sum(len(rows) for rows in appearance_rows.values())} appearance rows published")
+
+
+STAGES = [
+    Stage("crawl", run_crawl, inputs=[META_CSV, "web"], outputs=["crawl_cache.sqlite"]),
+    Stage("dedup", run_dedup, inputs=["crawl_cache.sqlite"], outputs=[CORPUS_CSV], after=["crawl"]),
+    Stage("compress", run_compress, inputs=[CORPUS_CSV, "brand criteria"], outputs=[COMPRESSED_CSV],
+          after=["dedup"]),
+    Stage("news", run_news, inputs=[COMPRESSED_CSV, "brand criteria", "prompts"], outputs=["culture-fit scores"],
+          after=["compress"]),
+    Stage("appearance", run_appearance, inputs=["top_100_images/*.jpg", "appearance prompts"],
+          outputs=["appearance scores"]),
+    Stage("publish", run_publish, inputs=["culture-fit scores", "appearance scores", META_CSV],
+          outputs=["ad_suitability_results.csv", APPEARANCE_CSV.format(brand="{Brand}"), "dataset/"],
+          after=["news", "appearance"]),
+]
+
+
+def run_pipeline(ctx: Context, stages: List[Stage] = STAGES, skip: Set[str] = frozenset(),
+                 max_parallel: int = 2) -> None:
+    """Run the stages in dependency order; stages whose dependencies are done run in parallel."""
+    pending = {stage.name: stage for stage in stages}
+    done: Set[str] = set()
+    with ThreadPoolExecutor(max_workers=max_parallel) as pool:
+        running = {}
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if all(dep in done for dep in stage.after):
+                    del pending[name]
+                    if name in skip:
+                        print(f"[{name}] skipped")
+                        done.add(name)
+                        continue
+                    # the stage joins this thread's timing run (timing.py)
+                    running[pool.submit(contextvars.copy_context().run, _timed, stage, ctx)] = name
+            if not running:
+                if pending:
+                    raise RuntimeError(f"Unsatisfiable stage dependencies: {sorted(pending)}")
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                future.result()  # a failing stage stops the run; nothing is committed
+                done.add(running.pop(future))
+    ctx.state.commit()
+
+
+def _timed(stage: Stage, ctx: Context) -> None:
+    start = time.perf_counter()
+    with timing.stage(stage.name):
+        stage.run(ctx)
+    print(f"[{stage.name}] done in {time.perf_counter() - start:.1f}s")
+
+
+def main(argv: Optional[List[str]] = None):
+    from fetch_cache import CACHE_PATH
+    from score_cache import CACHE_PATH as SCORE_CACHE_PATH
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--list", action="store_true", help="print the stages and exit")
+    parser.add_argument("--skip", nargs="+", default=[], choices=["news", "appearance"],
+                        help="stages to leave out (e.g. appearance on a machine without a GPU)")
+    parser.add_argument("--state", default=STATE_FILE)
+    parser.add_argument("--roster", default=META_CSV, help="CSV with the influencer names")
+    parser.add_argument("--cache", default=CACHE_PATH, help="crawl fetch cache")
+    parser.add_argument("--max-age-days", type=float, default=7.0, help="re-crawl influencers older than this")
+    parser.add_argument("--no-crawl", action="store_true", help="only use what is already in the fetch cache")
+    parser.add_argument("--budget", type=int, default=2000, help="compressed corpus tokens per influencer")
+    parser.add_argument("--multi-brand", action="store_true", help="score all brands in one request per influencer")
+    parser.add_argument("--shortlist", type=int, default=None, metavar="K",
+                        help="only score the K influencers per brand closest to the brand criteria")
+    parser.add_argument("--score-cache", default=SCORE_CACHE_PATH)
+    parser.add_argument("--workers", type=int, default=8, help="concurrent scoring requests")
+    parser.add_argument("--rpm", type=float, default=500)
+    parser.add_argument("--tpm", type=float, default=200_000)
+    parser.add_argument("--images", default="./top_100_images")
+    parser.add_argument("--appearance-backend", default="internvl", help="appearance_scoring backend")
+    parser.add_argument("--allow-stub-scores", action="store_true",
+                        help="allow the stub appearance backend to write placeholder scores")
+    parser.add_argument("--preprocess-workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for stage in STAGES:
+            after = f" (after {', '.join(stage.after)})" if stage.after else ""
+            print(f"{stage.name:<11}{', '.join(stage.inputs)} -> {', '.join(stage.outputs)}{after}")
+        return
+    if args.appearance_backend == "stub" and "appearance" not in args.skip and not args.allow_stub_scores:
+        parser.error("the stub backend writes placeholder appearance scores; add --allow-stub-scores")
+
+    ctx = Context(options=args, state=PipelineState(args.state))
+    start = time.perf_counter()
+    with timing.run("pipeline", skip=args.skip, multi_brand=args.multi_brand, shortlist=args.shortlist):
+        run_pipeline(ctx, skip=set(args.skip))
+    print(f"Pipeline finished in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
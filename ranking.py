@@ -0,0 +1,61 @@
+from typing import Iterable, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def weighted_score(df: pd.DataFrame, weights: Mapping[str, float]) -> np.ndarray:
+    """
+    Weighted sum of any number of score columns: sum(weight * df[column]).
+
+    All components are float columns, so this is a single vectorized pass.
+    A row with a missing (NaN) component gets a NaN total, like the old
+    row-wise lambda that returned None when either score was missing.
+    """
+    if not weights:
+        raise ValueError("At least one weighted component is required")
+    columns = list(weights)
+    values = df[columns].to_numpy(dtype='float64', na_value=np.nan)
+    w = np.fromiter((weights[c] for c in columns), dtype='float64', count=len(columns))
+    # NaN propagates through the matrix product, so missing components stay missing
+    return values @ w
+
+
+def top_k_indices(values, k: Optional[int] = None, ascending: bool = False) -> np.ndarray:
+    """
+    Positions of the k best values in order (descending by default), NaNs last.
+
+    Uses argpartition to find the k-th value, so only the selected rows are
+    sorted. Ties are broken by position, which keeps the ordering identical
+    for every k and makes consecutive pages line up.
+    """
+    key = np.array(values, dtype='float64')
+    if not ascending:
+        key = -key
+    key[np.isnan(key)] = np.inf
+    n = len(key)
+    if k is None or k >= n:
+        return np.argsort(key, kind='stable')
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    kth = key[np.argpartition(key, k - 1)[k - 1]]
+    less = np.flatnonzero(key < kth)
+    ties = np.flatnonzero(key == kth)[:k - len(less)]
+    selected = np.concatenate([less, ties])
+    return selected[np.lexsort((selected, key[selected]))]
+
+
+def format_scores(df: pd.DataFrame, columns: Iterable[str], na: str = "N/A") -> pd.DataFrame:
+    """Format float score columns with three decimals; call only on the rows being rendered."""
+    df = df.copy()
+    for column in columns:
+        values = df[column].to_numpy(dtype='float64', na_value=np.nan)
+        df[column] = [na if np.isnan(x) else f"{x:.3f}" for x in values]
+    return df
+
+
+def format_followers(values, na: str = "N/A") -> list:
+    """Follower counts as comma-separated integers (e.g. 6,545,307)."""
+    values = np.asarray(values, dtype='float64')
+    return [na if not np.isfinite(x) else f"{int(x):,}" for x in values]
@@ -0,0 +1,96 @@
+import html
+import math
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ranking import format_followers, format_scores, top_k_indices
+from thumbnails import IMAGE_DIR, image_html
+
+SCORE_COLUMNS = ['appearance_score', 'culture_fit_score', 'total_score']
+
+# Columns the table can be sorted by (label -> column of the cached table)
+SORT_COLUMNS = {
+    'Total Score': 'total_score',
+    'Appearance Score': 'appearance_score',
+    'Brand Fit Score': 'culture_fit_score',
+    'Followers': 'last_followers',
+    'Influencer': 'influencer',
+    'Category': 'category',
+}
+
+# Final columns to display (including Category and the Reason columns)
+DISPLAY_COLUMNS = ['Photo', 'Influencer', 'category', 'Followers', 'appearance_score', 'culture_fit_score', 'total_score', 'appearance_reason', 'culture_fit_reason']
+COLUMN_LABELS = {
+    'appearance_score': 'Appearance Score',
+    'culture_fit_score': 'Brand Fit Score',
+    'total_score': 'Total Score',
+    'category': 'Category',
+    'appearance_reason': 'Appearance Reason',
+    'culture_fit_reason': 'Brand Fit Reason'
+}
+
+TABLE_CSS = """
+<style>
+    th {
+        text-align: center;
+    }
+</style>
+"""
+
+
+def filter_rows(df: pd.DataFrame, name_query: str = "", categories: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Rows whose name contains `name_query` (case-insensitive) and whose category is selected."""
+    mask = np.ones(len(df), dtype=bool)
+    name_query = name_query.strip()
+    if name_query:
+        mask &= df['influencer'].str.contains(name_query, case=False, regex=False, na=False).to_numpy()
+    categories = list(categories or [])
+    if categories:
+        mask &= df['category'].isin(categories).to_numpy()
+    return df[mask]
+
+
+def order_rows(df: pd.DataFrame, column: str, ascending: bool = False, k: Optional[int] = None) -> pd.DataFrame:
+    """
+    First `k` rows of `df` ordered by `column`, missing values last.
+    Numeric columns go through top_k_indices, so only the rows up to the
+    current page are fully sorted.
+    """
+    values = df[column]
+    if pd.api.types.is_numeric_dtype(values):
+        idx = top_k_indices(values.to_numpy(dtype='float64', na_value=np.nan), k, ascending=ascending)
+    else:
+        # Dense ranks of the lower-cased strings, negated for descending order
+        keys = values.astype(str).str.lower().to_numpy(dtype=object)
+        ranks = np.unique(keys, return_inverse=True)[1]
+        missing = values.isna().to_numpy()
+        idx = np.lexsort((ranks if ascending else -ranks, missing))[:k]
+    return df.iloc[idx]
+
+
+def page_bounds(n_rows: int, page: int, page_size: int) -> Tuple[int, int, int]:
+    """(start, end, n_pages) for a 1-based page number, clamped to the last page."""
+    n_pages = max(1, math.ceil(n_rows / page_size))
+    page = min(max(page, 1), n_pages)
+    start = (page - 1) * page_size
+    return start, min(start + page_size, n_rows), n_pages
+
+
+def to_html_table(df_page: pd.DataFrame, image_dir: str = IMAGE_DIR, static_images: bool = True) -> str:
+    """HTML table for the visible rows only, with photo thumbnails and Instagram links."""
+    df_page = format_scores(df_page, SCORE_COLUMNS)
+    df_page['Followers'] = format_followers(df_page['last_followers'])
+    df_page['Photo'] = [
+        image_html(name, width=50, static=static_images, image_dir=image_dir)
+        for name in df_page['influencer']
+    ]
+    # Add Instagram URL link to the influencer name
+    df_page['Influencer'] = [
+        f'<a href="{html.escape(str(url), quote=True)}" target="_blank">{html.escape(name)}</a>'
+        for url, name in zip(df_page['instagram'], df_page['influencer'])
+    ]
+    df_display = df_page[DISPLAY_COLUMNS].rename(columns=COLUMN_LABELS)
+    # escape=False to render the image and link HTML
+    return TABLE_CSS + df_display.to_html(escape=False, index=False)
@@ -0,0 +1,133 @@
+"""
+Persistent cache of LLM scoring results (SQLite).
+
+Entries are keyed by a hash of everything that determines the answer: model,
+system prompt, user prompt and temperature. The user prompt embeds the
+influencer corpus and the brand criteria, so a pair is scored again only when
+one of its inputs changes. Failed evaluations (score None) and answers that
+fail scoring_config.validate_result are never cached.
+
+Entries older than `ttl` seconds are ignored and evicted; with `max_entries`
+the least recently used entries are dropped first.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from scoring_config import validate_result
+
+CACHE_PATH = "./score_cache.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key TEXT PRIMARY KEY,
+    score REAL,
+    reason TEXT,
+    model TEXT,
+    brand TEXT,
+    influencer TEXT,
+    created_at REAL,
+    last_used REAL
+);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+"""
+
+
+def prompt_key(model: str, system_prompt: str, user_prompt: str, temperature: float, extra: str = "") -> str:
+    """Stable cache key of one request; `extra` distinguishes several answers from one prompt."""
+    payload = json.dumps([model, system_prompt, user_prompt, float(temperature), extra], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ScoreCache:
+    def __init__(self, path: str = CACHE_PATH, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def close(self) -> None:
+        self.evict()
+        with self._lock:
+            self._conn.close()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and now - created_at >= self.ttl
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """{"score", "reason"} for a key, or None when missing, expired or not a valid result."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT score, reason, created_at FROM results WHERE key = ?",
+                                     (key,)).fetchone()
+            result = validate_result({"score": row[0], "reason": row[1]}) if row is not None else None
+            if result is None or self._expired(row[2], now):
+                self.misses += 1
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return result
+
+    def put(self, key: str, result: Dict[str, Any], model: str = "", brand: str = "", influencer: str = "") -> bool:
+        """Store a parsed result; returns False (and stores nothing) for failed or invalid evaluations."""
+        result = validate_result(result)
+        if result is None:
+            return False
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, result["score"], result["reason"], model, brand, influencer, now, now))
+        return True
+
+    def evict(self) -> int:
+        """Delete expired entries and trim to `max_entries`; returns the number removed."""
+        removed = 0
+        with self._lock, self._conn:
+            if self.ttl is not None:
+                removed += self._conn.execute("DELETE FROM results WHERE created_at <= ?",
+                                              (time.time() - self.ttl,)).rowcount
+            if self.max_entries is not None:
+                removed += self._conn.execute(
+                    "DELETE FROM results WHERE key IN "
+                    "(SELECT key FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)).rowcount
+        return removed
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+
+def split_cached(jobs: Iterable, cache: ScoreCache, model: str, temperature: float,
+                 refresh: bool = False) -> Tuple[List[Dict[str, Any]], List]:
+    """
+    Split scoring jobs (anything with influencer, brand, system_prompt,
+    user_prompt and a `meta` dict) into result rows found in the cache and
+    jobs that still need an API call. Each pending job gets its cache key in
+    job.meta["cache_keys"] ({brand: key}, as for multi-brand jobs); with
+    `refresh` every job is pending.
+    """
+    cached_rows, pending = [], []
+    for job in jobs:
+        key = prompt_key(model, job.system_prompt, job.user_prompt, temperature)
+        result = None if refresh else cache.get(key)
+        if result is None:
+            job.meta["cache_keys"] = {job.brand: key}
+            pending.append(job)
+        else:
+            cached_rows.append({"brand": job.brand, "influencer": job.influencer,
+                                "score": result["score"], "reason": result["reason"]})
+    return cached_rows, pending
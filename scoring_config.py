@@ -0,0 +1,77 @@
+"""
+Brand criteria, the scoring model name, the corpus reader and the check of a
+scoring result, shared by the scoring scripts (news_scoring, batch_scoring,
+score_cache, corpus_compress, embedding_index). Nothing here needs the OpenAI client or .env, so the
+dashboard and the offline tools can import it cheaply.
+"""
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+MODEL = "gpt-4o-mini"  # 모델 이름이 올바른지 확인하세요.
+BRANDS = ['lyft', 'redbull', 'kroger', 'sephora', 'nestle', 'lululemon']
+
+
+def read_corpus(path: str) -> pd.DataFrame:
+    """Corpus CSV from crawl.py ("name" column) or with an "influencer" column."""
+    df = pd.read_csv(path, encoding="utf-8-sig")
+    if "influencer" not in df.columns and "name" in df.columns:
+        df = df.rename(columns={"name": "influencer"})
+    return df
+
+
+def validate_result(result: Any) -> Optional[Dict[str, Any]]:
+    """{"score": float in [0, 1], "reason": str}, or None if the answer does not have that shape."""
+    if not isinstance(result, dict) or not isinstance(result.get("reason"), str):
+        return None
+    try:
+        score = float(result.get("score"))
+    except (TypeError, ValueError):
+        return None
+    if not 0.0 <= score <= 1.0:
+        return None
+    return {"score": score, "reason": result["reason"]}
+
+
+criteria = {
+    "lululemon":"""- Brand Alignment & Lifestyle: Influencers should embody an active, mindful, and balanced lifestyle that aligns with lululemon’s core values of wellness, yoga, and community engagement.
+- Authenticity & Credibility: The influencer’s content must appear genuine and relatable, with a clear focus on health, fitness, and personal growth, ensuring they truly live the lifestyle they promote.
+- High-Quality Aesthetics: Visual and content quality should reflect lululemon’s premium brand image, emphasizing clean, modern, and inspiring visuals.
+- Community Engagement: Prioritize influencers with highly engaged, loyal audiences who participate in conversations around wellness, sustainability, and active living.
+- Ethical & Sustainable Practices: Influencers should demonstrate a commitment to ethical practices and sustainability, aligning with lululemon’s emphasis on responsible living.""",
+    
+    "kroger":"""- Brand Alignment & Everyday Living: Influencers should embody reliability and approachability, resonating with Kroger’s commitment to quality, affordability, and convenience for everyday family life.
+- Authenticity & Community Connection: Content must be genuine and relatable, reflecting local community values and a strong connection to family and neighborhood life.
+- Culinary Expertise & Health Focus: Influencers should emphasize healthy eating, cooking tips, and food quality, aligning with Kroger’s focus on fresh produce and nutritional well-being.
+- Diversity & Inclusivity: The influencer must appeal to a diverse customer base, representing various lifestyles and cultural backgrounds in an authentic manner.
+- Sustainability & Local Sourcing: A commitment to sustainability, local sourcing, and eco-friendly practices is key, ensuring that the influencer’s message aligns with Kroger’s initiatives in environmental responsibility.
+""",
+    
+    "lyft": """- Urban Mobility & Connectivity: Influencers should embody a modern, tech-savvy lifestyle that reflects Lyft’s commitment to innovative and accessible urban transportation.
+- Reliability & Trustworthiness: Content must emphasize safety, dependability, and ease of use, mirroring Lyft’s reputation for reliable ride-sharing services.
+- Inclusivity & Community Focus: Influencers should appeal to a diverse urban audience, fostering a sense of community and inclusivity that resonates with Lyft’s user base.
+- Sustainability & Social Impact: Prioritize influencers who highlight eco-friendly transportation options and community-driven initiatives, aligning with Lyft’s commitment to reducing environmental impact.
+- Engagement & Storytelling: Influencers must be adept at sharing engaging, authentic narratives that connect everyday experiences with the convenience and innovation of Lyft’s services.
+""",
+    
+    "nestle":"""- Brand Alignment & Diverse Portfolio: Influencers should reflect the wide range of Nestle products—from beverages to nutritional foods—while appealing to a global audience.
+- Authenticity & Trustworthiness: Content must be genuine and resonate with values of quality, safety, and nutritional excellence that consumers associate with Nestle.
+- Health & Nutrition Focus: Influencers should emphasize balanced diets and healthy lifestyles, aligning with Nestle’s commitment to nutrition and wellness.
+- Sustainability & Ethical Practices: It is essential that influencers demonstrate a commitment to sustainability, ethical sourcing, and environmental responsibility.
+- Community Engagement & Inclusivity: Prioritize influencers who build strong, engaged communities across diverse demographics, promoting inclusivity and consumer well-being.
+""",
+    
+    "redbull":"""- Brand Alignment & Extreme Lifestyle: Influencers should embody a bold, adventurous lifestyle that aligns with Redbull’s core identity of extreme sports, high-energy activities, and pushing boundaries.
+- Authenticity & Energy: The influencer’s content must radiate genuine enthusiasm and a passion for adrenaline-fueled pursuits, resonating with Redbull’s energetic brand ethos.
+- Dynamic Visual Storytelling: Content should be visually compelling and dynamic, capturing thrilling moments and high-impact visuals that reflect the brand’s spirit of adventure.
+- Community Engagement: Prioritize influencers who actively engage with communities interested in extreme sports, innovation, and adventurous lifestyles, fostering an interactive and loyal fanbase.
+- Innovation & Trendsetting: Influencers should be recognized for their creativity and willingness to experiment, positioning themselves as trendsetters within the realms of sports, music, and culture.
+""",
+    
+    "sephora":"""- Beauty Expertise & Trendsetting: Influencers should have a strong passion for beauty, skincare, and cosmetics, consistently staying ahead of trends and experimenting with new looks.
+- Authenticity & Inclusivity: Content must be genuine and diverse, appealing to a wide audience by showcasing a range of skin tones, ages, and styles that align with Sephora’s inclusive brand ethos.
+- High-Quality Visual Content: The influencer’s imagery should be polished and visually compelling, reflecting Sephora’s premium, high-fashion aesthetic.
+- Engagement & Community Building: Prioritize influencers who actively engage with their audience through tutorials, reviews, and interactive content that fosters a community centered around beauty innovation.
+- Innovation & Product Knowledge: Influencers should demonstrate deep product knowledge and a willingness to experiment with new beauty trends, positioning themselves as trusted advisors in the beauty space.
+"""
+}
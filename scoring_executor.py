@@ -0,0 +1,289 @@
+"""
+Concurrent, rate-limit-aware executor for the brand-suitability LLM calls.
+
+- A thread pool sends requests in parallel instead of one at a time + sleep(1)
+- RateLimiter keeps both requests-per-minute and tokens-per-minute budgets
+  (token buckets); a 429 pauses every worker for the Retry-After interval
+- 429 / 5xx / connection errors / timeouts are retried with jittered
+  exponential backoff
+- Results are handed back as they complete so they can be written right away
+- MultiBrandJob scores several brands for one influencer in one request;
+  brands missing from the answer are retried one by one
+
+Throughput and rate-limit behavior can be checked offline against
+mock_servers.MockOpenAIServer:
+
+    python scoring_executor.py --bench --pairs 600 --rpm 1200
+"""
+import argparse
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+import openai
+
+from news_scoring import (MULTI_BRAND_SYSTEM_PROMPT, SYSTEM_PROMPT, TEMPERATURE, build_multi_brand_prompt,
+                          build_user_prompt, get_client, parse_model_response, parse_multi_brand_response)
+from scoring_config import MODEL, criteria, validate_result
+
+# Tokens reserved for the model's answer ({"score": ..., "reason": ...})
+COMPLETION_TOKENS = 150
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Rough token count (about 4 characters per token for English text)."""
+    return sum(len(text) for text in texts) // 4 + 8 * len(texts)
+
+
+@dataclass
+class ScoringJob:
+    influencer: str
+    brand: str
+    user_prompt: str
+    system_prompt: str = SYSTEM_PROMPT
+    # Extra values handed back with the result (e.g. cache keys)
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.system_prompt, self.user_prompt) + COMPLETION_TOKENS
+
+
+@dataclass
+class MultiBrandJob:
+    """All (or some) brands for one influencer, sent as one request."""
+    influencer: str
+    brands: List[str]
+    wikipedia_corpus: str
+    updates_corpus: str
+    system_prompt: str = MULTI_BRAND_SYSTEM_PROMPT
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def user_prompt(self) -> str:
+        return build_multi_brand_prompt(self.influencer, self.wikipedia_corpus, self.updates_corpus, self.brands)
+
+    @property
+    def tokens(self) -> int:
+        return estimate_tokens(self.system_prompt, self.user_prompt) + COMPLETION_TOKENS * len(self.brands)
+
+    def brand_job(self, brand: str) -> ScoringJob:
+        """Single-brand job used as the fallback for `brand`."""
+        user_prompt = build_user_prompt(self.influencer, self.wikipedia_corpus, self.updates_corpus,
+                                        brand, criteria.get(brand, ""))
+        return ScoringJob(self.influencer, brand, user_prompt)
+
+
+class RateLimiter:
+    """
+    Token buckets for requests and tokens per minute, shared by all workers.
+    acquire() blocks until both budgets allow the request.
+    """
+
+    def __init__(self, rpm: float, tpm: float):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+
+    def acquire(self, tokens: int) -> None:
+        tokens = min(tokens, self.tpm)  # a single huge request must still be able to go through
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._paused_until - now
+                if wait <= 0:
+                    missing_requests = 1 - self._requests
+                    missing_tokens = tokens - self._tokens
+                    if missing_requests <= 0 and missing_tokens <= 0:
+                        self._requests -= 1
+                        self._tokens -= tokens
+                        return
+                    wait = max(missing_requests * 60 / self.rpm, missing_tokens * 60 / self.tpm)
+                self._cond.wait(wait)
+
+    def settle(self, estimated: int, actual: int) -> None:
+        """Correct the token budget once the real usage of a request is known."""
+        with self._cond:
+            self._tokens = min(self.tpm, self._tokens + estimated - actual)
+            self._cond.notify_all()
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out requests for `seconds` (server said we are over the limit)."""
+        with self._cond:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._requests = 0.0
+
+
+class ScoringExecutor:
+    def __init__(self,
+                 client: Optional[openai.OpenAI] = None,
+                 model: str = MODEL,
+                 temperature: float = TEMPERATURE,
+                 max_workers: int = 8,
+                 rpm: float = 500,
+                 tpm: float = 200_000,
+                 max_retries: int = 6,
+                 backoff: float = 1.0,
+                 max_backoff: float = 60.0,
+                 timeout: float = 60.0):
+        # Retries are done here (with the shared rate limiter), not inside the client
+        self.client = (client or get_client()).with_options(max_retries=0, timeout=timeout)
+        self.model = model
+        self.temperature = temperature
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(rpm, tpm)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stats: Dict[str, int] = {}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + n
+
+    def _delay(self, attempt: int, error: Exception) -> float:
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after) + random.uniform(0, self.backoff)
+            except ValueError:
+                pass
+        # Full jitter
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def complete(self, job: Union[ScoringJob, MultiBrandJob]) -> str:
+        """Send one chat completion, retrying transient failures; returns the message content."""
+        user_prompt = job.user_prompt
+        estimated = job.tokens
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(estimated)
+            self._count("requests")
+            try:
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "system", "content": job.system_prompt},
+                              {"role": "user", "content": user_prompt}],
+                    temperature=self.temperature,
+                )
+            except openai.RateLimitError as e:
+                self._count("rate_limited")
+                delay = self._delay(attempt, e)
+                self.limiter.pause(delay)
+            except openai.APIStatusError as e:
+                if e.status_code < 500:
+                    raise
+                self._count("server_errors")
+                delay = self._delay(attempt, e)
+            except (openai.APIConnectionError, openai.APITimeoutError) as e:
+                self._count("connection_errors")
+                delay = self._delay(attempt, e)
+            else:
+                if response.usage is not None:
+                    self.limiter.settle(estimated, response.usage.total_tokens)
+                    self._count("tokens", response.usage.total_tokens)
+                return response.choices[0].message.content
+            if attempt == self.max_retries:
+                break
+            self._count("retries")
+            time.sleep(delay)
+        raise RuntimeError(f"Giving up after {self.max_retries + 1} attempts")
+
+    def evaluate(self, job: ScoringJob) -> Dict[str, Any]:
+        try:
+            result = validate_result(parse_model_response(self.complete(job)))
+            if result is None:
+                raise ValueError("the answer is not {score in [0, 1], reason}")
+        except Exception as e:
+            print(f"Error processing influencer {job.influencer} for brand {job.brand}: {e}")
+            self._count("failed")
+            result = {"score": None, "reason": "Error during evaluation"}
+        return {
+            "brand": job.brand,
+            "influencer": job.influencer,
+            "score": result["score"],
+            "reason": result["reason"],
+        }
+
+    def evaluate_brands(self, job: MultiBrandJob) -> List[Dict[str, Any]]:
+        """One row per brand of a multi-brand job, in job.brands order."""
+        try:
+            results = parse_multi_brand_response(self.complete(job), job.brands)
+        except Exception as e:
+            print(f"Error processing influencer {job.influencer} for brands {', '.join(job.brands)}: {e}")
+            results = {}
+        rows = []
+        for brand in job.brands:
+            if brand in results:
+                rows.append({"brand": brand, "influencer": job.influencer, **results[brand]})
+            else:
+                self._count("fallbacks")
+                rows.append(self.evaluate(job.brand_job(brand)))
+        return rows
+
+    def run(self, jobs: Iterable[Union[ScoringJob, MultiBrandJob]],
+            on_result: Optional[Callable[[Any, Any], None]] = None) -> List[Any]:
+        """
+        Evaluate all jobs concurrently. `on_result` is called from the calling
+        thread as each job finishes; the returned results keep the job order.
+        A ScoringJob gives one row, a MultiBrandJob a list of rows.
+        """
+        jobs = list(jobs)
+        results: List[Any] = [None] * len(jobs)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {pool.submit(self.evaluate_brands if isinstance(job, MultiBrandJob) else self.evaluate, job): i
+                       for i, job in enumerate(jobs)}
+            for future in as_completed(futures):
+                i = futures[future]
+                results[i] = future.result()
+                if on_result is not None:
+                    on_result(jobs[i], results[i])
+        return results
+
+
+def _bench(pairs: int, rpm: int, workers: int, latency: float, error_rate: float) -> None:
+    from mock_servers import MockOpenAIServer
+
+    # The server enforces rpm_limit per 60s; the executor keeps a slightly lower budget
+    with MockOpenAIServer(latency=latency, rpm_limit=rpm, error_rate=error_rate) as server:
+        client = openai.OpenAI(api_key="mock", base_url=server.base_url)
+        executor = ScoringExecutor(client=client, max_workers=workers, rpm=rpm * 0.95,
+                                   tpm=10_000_000, backoff=0.2)
+        jobs = [ScoringJob(f"Influencer {i}", "lyft", f"prompt {i} " * 200) for i in range(pairs)]
+        start = time.perf_counter()
+        rows = executor.run(jobs)
+        elapsed = time.perf_counter() - start
+    ok = sum(row["score"] is not None for row in rows)
+    print(f"{ok}/{len(rows)} pairs scored in {elapsed:.2f}s ({len(rows) / elapsed:.1f} pairs/s)")
+    print(f"executor: {executor.stats}")
+    print(f"server:   {dict(server.stats)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bench", action="store_true", help="score synthetic pairs against a local mock server")
+    parser.add_argument("--pairs", type=int, default=600)
+    parser.add_argument("--rpm", type=int, default=1200)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    args = parser.parse_args()
+    if args.bench:
+        _bench(args.pairs, args.rpm, args.workers, args.latency, args.error_rate)
+    else:
+        parser.print_help()
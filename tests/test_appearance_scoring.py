@@ -0,0 +1,84 @@
+"""
+appearance_scoring preprocessing cache and stub backend on generated JPEGs (CPU only).
+
+    python -m pytest tests
+"""
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import appearance_scoring
+from appearance_scoring import BACKENDS, cache_path, load_pixels, preprocess_images, score_images
+
+# small tiles keep the tests fast; a 2:1 image gives 2 tiles plus the thumbnail
+INPUT_SIZE = 32
+MAX_NUM = 2
+
+
+def make_jpeg(path, color, size=(64, 32)):
+    Image.new("RGB", size, color).save(path, "JPEG")
+    return str(path)
+
+
+@pytest.fixture
+def images(tmp_path):
+    image_dir = tmp_path / "images"
+    image_dir.mkdir()
+    return [make_jpeg(image_dir / "Aaron Paul.jpg", (200, 120, 80)),
+            make_jpeg(image_dir / "Ice Spice.jpg", (40, 90, 160))]
+
+
+def preprocess(images, cache_dir):
+    return preprocess_images(images, workers=0, input_size=INPUT_SIZE, max_num=MAX_NUM, cache_dir=str(cache_dir))
+
+
+def test_cache_path_depends_on_content_and_parameters(images, tmp_path):
+    first, second = images
+    path = cache_path(first, INPUT_SIZE, MAX_NUM, str(tmp_path))
+    assert path == cache_path(first, INPUT_SIZE, MAX_NUM, str(tmp_path))
+    assert path.endswith(f"_{INPUT_SIZE}_{MAX_NUM}.npy")
+    assert path != cache_path(second, INPUT_SIZE, MAX_NUM, str(tmp_path))
+    assert path != cache_path(first, INPUT_SIZE * 2, MAX_NUM, str(tmp_path))
+    assert path != cache_path(first, INPUT_SIZE, MAX_NUM + 1, str(tmp_path))
+
+    # the same bytes under another name share the cache file
+    copy = tmp_path / "copy.jpg"
+    copy.write_bytes(open(first, "rb").read())
+    assert cache_path(str(copy), INPUT_SIZE, MAX_NUM, str(tmp_path)) == path
+
+
+def test_preprocess_writes_pixels_once(images, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    caches = preprocess(images, cache_dir)
+    assert sorted(caches) == sorted(images)
+    for image_path, cache_file in caches.items():
+        pixels = load_pixels(cache_file)
+        assert pixels.shape == (3, 3, INPUT_SIZE, INPUT_SIZE)
+        assert pixels.dtype == appearance_scoring.CACHE_DTYPE
+        expected = appearance_scoring.load_image(image_path, INPUT_SIZE, MAX_NUM)
+        np.testing.assert_allclose(pixels, expected, atol=1e-2)
+    mtimes = {path: os.stat(path).st_mtime_ns for path in caches.values()}
+
+    # a second run finds every image cached and preprocesses nothing
+    def fail(args):
+        raise AssertionError(f"{args[0]} preprocessed again")
+    monkeypatch.setattr(appearance_scoring, "_preprocess_one", fail)
+    assert preprocess(images, cache_dir) == caches
+    assert {path: os.stat(path).st_mtime_ns for path in caches.values()} == mtimes
+    assert len(os.listdir(cache_dir)) == 2
+
+
+def test_stub_backend_scores_every_image_and_brand(images, tmp_path):
+    caches = preprocess(images, tmp_path / "cache")
+    brands = ["Lyft", "Redbull"]
+    rows = score_images(BACKENDS["stub"](), caches, brands)
+    assert sorted(rows) == brands
+    for brand in brands:
+        assert [row[0] for row in rows[brand]] == ["Aaron Paul", "Ice Spice"]
+        for influencer, score, reason in rows[brand]:
+            assert 0 <= score <= 1
+            assert reason == "Stub evaluation."
+    # deterministic for the same pixels
+    assert score_images(BACKENDS["stub"](), caches, brands) == rows
@@ -0,0 +1,128 @@
+"""
+batch_scoring ingestion against a fixture output file (no network).
+
+    python -m pytest tests
+"""
+import os
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+import batch_scoring
+import dataset_store
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "batch_output.jsonl")
+
+
+@pytest.fixture(autouse=True)
+def no_dataset_store(monkeypatch):
+    # keep the tests off the repository's Parquet dataset
+    monkeypatch.setattr(dataset_store, "exists", lambda *args, **kwargs: False)
+
+
+def read_fixture():
+    with open(FIXTURE, encoding="utf-8") as f:
+        return list(batch_scoring.iter_output(f))
+
+
+def test_iter_output_parses_answers_and_errors():
+    rows = read_fixture()
+    assert [(row["brand"], row["influencer"]) for row in rows] == [
+        ("lyft", "Aaron Paul"), ("sephora", "Aaron Paul"), ("kroger", "Aaron Paul"), ("lyft", "Ice Spice"),
+        ("nestle", "Ice Spice")]
+    assert rows[0]["score"] == 0.85
+    assert rows[1] == {"brand": "sephora", "influencer": "Aaron Paul", "score": 0.6,
+                       "reason": "Some beauty content."}  # ```json fenced answer
+    # a non-200 response, an error-file record and an out-of-range score
+    assert rows[2]["score"] is None and rows[3]["score"] is None and rows[4]["score"] is None
+
+
+def test_iter_output_skips_blank_lines():
+    assert list(batch_scoring.iter_output(["", "\n"])) == []
+
+
+def test_merge_results_replaces_pairs_and_keeps_failed_ones(tmp_path):
+    output_csv = tmp_path / "ad_suitability_results.csv"
+    pd.DataFrame([
+        {"brand": "Lyft", "influencer": "Aaron Paul", "score": 0.5, "reason": "old"},
+        {"brand": "Kroger", "influencer": "Aaron Paul", "score": 0.7, "reason": "old"},
+        {"brand": "Lyft", "influencer": "Ice Spice", "score": 0.4, "reason": "old"},
+        {"brand": "Nestle", "influencer": "Aaron Paul", "score": 0.9, "reason": "untouched"},
+    ]).to_csv(output_csv, index=False)
+
+    merged = batch_scoring.merge_results(read_fixture(), str(output_csv))
+
+    scores = {(brand.lower(), influencer): score
+              for brand, influencer, score in zip(merged["brand"], merged["influencer"], merged["score"])}
+    assert scores == {
+        ("lyft", "Aaron Paul"): 0.85,  # replaced (brand matched case-insensitively)
+        ("sephora", "Aaron Paul"): 0.6,  # new pair
+        ("kroger", "Aaron Paul"): 0.7,  # failed result, old score kept
+        ("lyft", "Ice Spice"): 0.4,  # failed result, old score kept
+        ("nestle", "Aaron Paul"): 0.9,
+    }
+    assert len(merged) == 5
+    assert pd.read_csv(output_csv)["score"].notna().all()
+
+
+def test_merge_results_without_existing_csv(tmp_path):
+    output_csv = tmp_path / "ad_suitability_results.csv"
+    merged = batch_scoring.merge_results(read_fixture(), str(output_csv))
+    assert sorted(merged["brand"]) == ["lyft", "sephora"]
+    assert output_csv.exists()
+
+
+def test_ingest_reports_failures(tmp_path, capsys):
+    output_csv = tmp_path / "ad_suitability_results.csv"
+    rows = batch_scoring.ingest(FIXTURE, str(output_csv), requests_path=str(tmp_path / "batch_requests.jsonl"))
+    assert len(rows) == 5
+    assert "2 results merged" in capsys.readouterr().out
+    assert len(pd.read_csv(output_csv)) == 2
+
+
+class FakeClient:
+    """client.batches.retrieve / client.files.content with fixed batches and file contents."""
+
+    def __init__(self, batches, files):
+        self.batches = SimpleNamespace(retrieve=lambda batch_id: batches[batch_id])
+        self.files = SimpleNamespace(content=lambda file_id: SimpleNamespace(text=files[file_id]))
+
+
+def batch(batch_id, status, output_file_id=None, errors=None):
+    return SimpleNamespace(id=batch_id, status=status, request_counts=None, output_file_id=output_file_id,
+                           error_file_id=None, errors=SimpleNamespace(data=errors) if errors else None)
+
+
+def test_check_returns_none_while_a_batch_is_running(tmp_path):
+    client = FakeClient({"b1": batch("b1", "completed", "f1"), "b2": batch("b2", "in_progress")}, {"f1": "{}\n"})
+    output_path = tmp_path / "batch_output.jsonl"
+    assert batch_scoring.check(["b1", "b2"], client, str(output_path)) is None
+    assert not output_path.exists()
+
+
+def test_check_reports_batches_that_did_not_complete(tmp_path, capsys):
+    with open(FIXTURE, encoding="utf-8") as f:
+        output = f.read()
+    error = SimpleNamespace(code="invalid_request", message="Model not found", line=3)
+    client = FakeClient({"b1": batch("b1", "completed", "f1"), "b2": batch("b2", "failed", errors=[error])},
+                        {"f1": output})
+    output_path = tmp_path / "batch_output.jsonl"
+
+    assert batch_scoring.check(["b1", "b2"], client, str(output_path)) is False
+    assert "Batch b2 error (line 3): invalid_request: Model not found" in capsys.readouterr().out
+    assert output_path.read_text(encoding="utf-8") == output
+
+    client = FakeClient({"b1": batch("b1", "completed", "f1")}, {"f1": output})
+    assert batch_scoring.check(["b1"], client, str(output_path)) is True
+
+
+def test_run_fails_when_no_batch_produced_output(tmp_path, monkeypatch):
+    monkeypatch.setattr(batch_scoring, "prepare", lambda *args, **kwargs: ["batch_requests.jsonl"])
+    monkeypatch.setattr(batch_scoring, "submit", lambda paths, client: ["b1"])
+    client = FakeClient({"b1": batch("b1", "expired")}, {})
+    output_csv = tmp_path / "ad_suitability_results.csv"
+    with pytest.raises(RuntimeError, match="No batch completed"):
+        batch_scoring.run(output_path=str(tmp_path / "batch_output.jsonl"), output_csv=str(output_csv),
+                          client=client)
+    assert not output_csv.exists()
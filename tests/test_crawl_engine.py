@@ -0,0 +1,85 @@
+"""
+CrawlEngine and FetchCache against mock_servers.PageServer (no network).
+
+    python -m pytest tests
+"""
+import asyncio
+import time
+
+from crawl_engine import CrawlEngine
+from fetch_cache import STATUS_FAILED, STATUS_OK, FetchCache
+from mock_servers import PageServer
+
+
+def with_server(func, **kwargs):
+    async def run():
+        async with PageServer(**kwargs) as server:
+            return await func(server)
+    return asyncio.run(run())
+
+
+def test_crawl_influencer_reads_wikipedia_and_updates():
+    async def run(server):
+        async with CrawlEngine(domain_interval=0, search_interval=0, search_fn=server.search) as engine:
+            return await engine.crawl_influencer("Aaron Paul"), engine.stats
+
+    row, stats = with_server(run, paragraphs=5)
+    assert row["name"] == "Aaron Paul" and row["status"] == STATUS_OK
+    assert "Aaron Paul" in row["wikipedia_corpus"]
+    assert row["updates_corpus"].count("\n\n") == 2  # three news pages
+    assert stats["pages"] == 4 and stats["searches"] == 2
+
+
+def test_requests_to_one_host_are_spaced_by_domain_interval():
+    async def run(server):
+        urls = [f"{server.base_url}/news/{i}/aaron-paul" for i in range(4)]
+        async with CrawlEngine(domain_interval=0.2, search_fn=server.search) as engine:
+            start = time.monotonic()
+            await asyncio.gather(*(engine.fetch_page_text(url) for url in urls))
+            return time.monotonic() - start
+
+    # first request right away, then one every 0.2 s
+    assert 0.55 < with_server(run) < 1.5
+
+
+def test_failed_search_is_saved_as_failed_and_keeps_the_earlier_crawl(tmp_path):
+    cache = FetchCache(str(tmp_path / "fetch_cache.sqlite"))
+
+    async def run(server):
+        async with CrawlEngine(domain_interval=0, search_interval=0, search_fn=server.search) as engine:
+            cache.save_progress(await engine.crawl_influencer("Aaron Paul"))
+
+        def failing_search(query, **kwargs):
+            raise RuntimeError("429 Too Many Requests")
+
+        async with CrawlEngine(domain_interval=0, search_interval=0, search_fn=failing_search) as engine:
+            row = await engine.crawl_influencer("Aaron Paul")
+            cache.save_progress(row)
+            fresh = await engine.crawl_influencer("Akon")
+            cache.save_progress(fresh)
+            return row, fresh, engine.stats
+
+    row, fresh, stats = with_server(run, paragraphs=5)
+    assert row["status"] == fresh["status"] == STATUS_FAILED
+    assert stats["search_errors"] == 4 and stats["failed_influencers"] == 2
+
+    progress = cache.load_progress()
+    # the failed re-crawl only flagged the row; the earlier corpus is still there
+    assert progress["Aaron Paul"]["status"] == STATUS_FAILED
+    assert "Aaron Paul" in progress["Aaron Paul"]["wikipedia_corpus"]
+    assert progress["Akon"]["wikipedia_corpus"] == ""
+    # both are crawled again on the next run
+    assert cache.pending(["Aaron Paul", "Akon", "Ice Spice"]) == ["Aaron Paul", "Akon", "Ice Spice"]
+    cache.close()
+
+
+def test_retries_server_errors_and_counts_failed_pages():
+    async def run(server):
+        url = f"{server.base_url}/news/0/aaron-paul"
+        async with CrawlEngine(domain_interval=0, retries=2, backoff=0.01, search_fn=server.search) as engine:
+            return await engine.fetch_page_text(url), engine.stats, server.hits
+
+    text, stats, hits = with_server(run, error_rate=1.0)
+    assert text == ""
+    assert hits["/news/0/aaron-paul"] == 3
+    assert stats["retries"] == 2 and stats["failed"] == 1
@@ -0,0 +1,102 @@
+"""
+ScoreCache expiry, eviction and what it refuses to store.
+
+    python -m pytest tests
+"""
+import types
+
+import pytest
+
+import score_cache
+from score_cache import ScoreCache, prompt_key
+
+GOOD = {"score": 0.75, "reason": "Good fit."}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replaces time.time inside score_cache; advance it with clock.now += seconds."""
+    fake = types.SimpleNamespace(now=1_000_000.0)
+    fake.time = lambda: fake.now
+    monkeypatch.setattr(score_cache, "time", fake)
+    return fake
+
+
+def open_cache(tmp_path, **kwargs):
+    return ScoreCache(str(tmp_path / "score_cache.sqlite"), **kwargs)
+
+
+def test_prompt_key_changes_with_every_input():
+    key = prompt_key("gpt-4o", "system", "user", 0.2)
+    assert key == prompt_key("gpt-4o", "system", "user", 0.2)
+    assert len({key, prompt_key("gpt-4o-mini", "system", "user", 0.2), prompt_key("gpt-4o", "other", "user", 0.2),
+                prompt_key("gpt-4o", "system", "other", 0.2), prompt_key("gpt-4o", "system", "user", 0.7),
+                prompt_key("gpt-4o", "system", "user", 0.2, extra="lyft")}) == 6
+
+
+def test_round_trip_and_hit_counts(tmp_path):
+    cache = open_cache(tmp_path)
+    assert cache.get("a") is None
+    assert cache.put("a", GOOD, "gpt-4o", "lyft", "Aaron Paul")
+    assert cache.get("a") == GOOD
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.close()
+
+    reopened = open_cache(tmp_path)
+    assert reopened.get("a") == GOOD
+    reopened.close()
+
+
+@pytest.mark.parametrize("result", [
+    {"score": None, "reason": "Error during evaluation"},
+    {"score": 1.5, "reason": "out of range"},
+    {"score": "high", "reason": "not a number"},
+    {"score": 0.5},
+    {"score": 0.5, "reason": ["not", "text"]},
+])
+def test_failed_and_invalid_results_are_not_stored(tmp_path, result):
+    cache = open_cache(tmp_path)
+    assert cache.put("a", result) is False
+    assert len(cache) == 0
+    assert cache.get("a") is None
+
+
+def test_put_stores_the_validated_score(tmp_path):
+    cache = open_cache(tmp_path)
+    assert cache.put("a", {"score": "0.5", "reason": "numeric string", "brand": "lyft"})
+    assert cache.get("a") == {"score": 0.5, "reason": "numeric string"}
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = open_cache(tmp_path, ttl=60)
+    cache.put("old", GOOD)
+    clock.now += 30
+    cache.put("new", GOOD)
+    assert cache.get("old") == GOOD
+
+    clock.now += 30  # "old" is now exactly ttl seconds old
+    assert cache.get("old") is None
+    assert cache.get("new") == GOOD
+    assert cache.evict() == 1
+    assert len(cache) == 1
+
+
+def test_evict_keeps_the_most_recently_used(tmp_path, clock):
+    cache = open_cache(tmp_path, max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, GOOD)
+        clock.now += 1
+    cache.get("a")  # "b" is now the least recently used
+    assert cache.evict() == 1
+    assert cache.get("b") is None
+    assert cache.get("a") == GOOD and cache.get("c") == GOOD
+
+
+def test_close_evicts(tmp_path, clock):
+    cache = open_cache(tmp_path, max_entries=1)
+    cache.put("a", GOOD)
+    clock.now += 1
+    cache.put("b", GOOD)
+    cache.close()
+    reopened = open_cache(tmp_path)
+    assert len(reopened) == 1 and reopened.get("b") == GOOD
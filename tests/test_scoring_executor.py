@@ -0,0 +1,144 @@
+"""
+ScoringExecutor and RateLimiter against mock_servers.MockOpenAIServer (no network).
+
+    python -m pytest tests
+"""
+import json
+import random
+import time
+
+import pytest
+from openai import OpenAI
+
+from mock_servers import MockOpenAIServer, mock_evaluation
+from scoring_executor import MultiBrandJob, RateLimiter, ScoringExecutor, ScoringJob
+
+
+def make_executor(server, **kwargs):
+    options = {"rpm": 1e9, "tpm": 1e12, "max_workers": 4, "backoff": 0.01}
+    options.update(kwargs)
+    return ScoringExecutor(client=OpenAI(api_key="mock", base_url=server.base_url), **options)
+
+
+def jobs(n, brand="lyft"):
+    return [ScoringJob(f"Influencer {i}", brand, f"prompt {i}") for i in range(n)]
+
+
+def elapsed(func):
+    start = time.monotonic()
+    func()
+    return time.monotonic() - start
+
+
+# --- RateLimiter ---
+def test_rate_limiter_requests_per_minute():
+    limiter = RateLimiter(rpm=120, tpm=1e9)
+    # a full bucket lets a minute's worth through at once, then 2 requests per second
+    assert elapsed(lambda: [limiter.acquire(1) for _ in range(120)]) < 0.2
+    assert 0.4 < elapsed(lambda: limiter.acquire(1)) < 1.0
+
+
+def test_rate_limiter_tokens_per_minute():
+    limiter = RateLimiter(rpm=1e9, tpm=6000)  # 100 tokens per second
+    limiter.acquire(6000)
+    assert 0.4 < elapsed(lambda: limiter.acquire(50)) < 1.0
+
+
+def test_rate_limiter_settle_returns_unused_tokens():
+    limiter = RateLimiter(rpm=1e9, tpm=6000)
+    limiter.acquire(6000)
+    limiter.settle(estimated=6000, actual=1000)
+    assert elapsed(lambda: limiter.acquire(5000)) < 0.1
+
+
+def test_rate_limiter_pause():
+    limiter = RateLimiter(rpm=1e9, tpm=1e9)
+    limiter.pause(0.3)
+    assert elapsed(lambda: limiter.acquire(1)) >= 0.29
+
+
+# --- ScoringExecutor ---
+def test_run_keeps_job_order_and_calls_on_result_once_per_job():
+    seen = []
+    with MockOpenAIServer(latency=0.01) as server:
+        executor = make_executor(server, max_workers=8)
+        batch = jobs(20)
+        results = executor.run(batch, on_result=lambda job, result: seen.append((job.influencer, result)))
+    assert [row["influencer"] for row in results] == [job.influencer for job in batch]
+    assert [row["score"] for row in results] == [mock_evaluation(job.user_prompt)["score"] for job in batch]
+    assert sorted(name for name, _ in seen) == sorted(job.influencer for job in batch)
+    assert executor.stats["requests"] == 20
+
+
+def test_retries_after_rate_limit():
+    # the server allows 3 requests per 0.5 s window and answers 429 with Retry-After
+    with MockOpenAIServer(latency=0, rpm_limit=3, window=0.5) as server:
+        executor = make_executor(server)
+        results = executor.run(jobs(8))
+    assert all(row["score"] is not None for row in results)
+    assert executor.stats["rate_limited"] > 0
+    assert executor.stats["retries"] == executor.stats["rate_limited"]
+    assert server.stats["completed"] == 8
+
+
+def test_retries_server_errors():
+    random.seed(1)
+    with MockOpenAIServer(latency=0, error_rate=0.4) as server:
+        executor = make_executor(server, max_retries=20)
+        results = executor.run(jobs(10))
+    assert all(row["score"] is not None for row in results)
+    assert executor.stats["server_errors"] == server.stats["errors"] > 0
+
+
+def test_gives_up_after_max_retries():
+    with MockOpenAIServer(latency=0, error_rate=1.0) as server:
+        executor = make_executor(server, max_retries=2)
+        (row,) = executor.run(jobs(1))
+    assert row == {"brand": "lyft", "influencer": "Influencer 0", "score": None,
+                   "reason": "Error during evaluation"}
+    assert server.stats["requests"] == 3
+    assert executor.stats["failed"] == 1
+
+
+class FixedAnswerServer(MockOpenAIServer):
+    def __init__(self, answer, **kwargs):
+        super().__init__(**kwargs)
+        self.answer = answer
+
+    def respond(self, body):
+        return self.answer
+
+
+@pytest.mark.parametrize("answer", ['[0.5, "list"]', '"text"', '{"score": 1.5, "reason": "too high"}',
+                                    '{"score": "high", "reason": "not a number"}', "not json"])
+def test_invalid_answers_become_failed_rows(answer):
+    with FixedAnswerServer(answer, latency=0) as server:
+        executor = make_executor(server)
+        (row,) = executor.run(jobs(1))
+    assert row["score"] is None
+    assert executor.stats["failed"] == 1
+
+
+class MissingBrandServer(MockOpenAIServer):
+    """Multi-brand answers leave out one brand."""
+
+    def respond(self, body):
+        content = super().respond(body)
+        if "'brands'" in body["messages"][0]["content"]:
+            answer = json.loads(content)
+            answer["brands"].pop("kroger", None)
+            content = json.dumps(answer)
+        return content
+
+
+def test_multi_brand_falls_back_to_single_brand_requests():
+    job = MultiBrandJob("Aaron Paul", ["lyft", "kroger", "sephora"], "Wikipedia text.", "News text.")
+    with MissingBrandServer(latency=0) as server:
+        executor = make_executor(server)
+        (rows,) = executor.run([job])
+    assert [row["brand"] for row in rows] == ["lyft", "kroger", "sephora"]
+    assert all(row["score"] is not None for row in rows)
+    # kroger was scored with the single-brand prompt
+    assert rows[1]["score"] == mock_evaluation(job.brand_job("kroger").user_prompt)["score"]
+    assert executor.stats["fallbacks"] == 1
+    assert server.stats["requests"] == 2
@@ -0,0 +1,110 @@
+import os
+import re
+import base64
+import hashlib
+import html
+import tempfile
+from functools import lru_cache
+from typing import Optional
+
+from PIL import Image, features
+
+IMAGE_DIR = "./top_100_images"  # Directory for full-size images
+# Streamlit serves ./static at app/static when server.enableStaticServing is on
+THUMBNAIL_DIR = "./static/thumbnails"
+THUMBNAIL_URL = "app/static/thumbnails"
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+# Thumbnails are rendered at 2x the display width for high-DPI screens
+PIXEL_RATIO = 2
+
+THUMBNAIL_FORMAT = "WEBP" if features.check("webp") else "JPEG"
+THUMBNAIL_EXT = ".webp" if THUMBNAIL_FORMAT == "WEBP" else ".jpg"
+THUMBNAIL_MIME = "image/webp" if THUMBNAIL_FORMAT == "WEBP" else "image/jpeg"
+
+
+def find_image(name: str, image_dir: str = IMAGE_DIR) -> Optional[str]:
+    """
+    Path of the photo for an influencer, or None.
+    Files were saved with non-ASCII characters replaced by "_"
+    (e.g. "Rosalía" -> "Rosal_a.jpg"), so that spelling is tried as well.
+    """
+    candidates = [name, re.sub(r"[^\x00-\x7f]", "_", name)]
+    for base in dict.fromkeys(candidates):
+        for ext in IMAGE_EXTENSIONS:
+            path = os.path.join(image_dir, base + ext)
+            if os.path.isfile(path):
+                return path
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _file_digest(path: str, mtime_ns: int, size: int) -> str:
+    # mtime/size are part of the cache key so a replaced photo is hashed again
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_digest(path: str) -> str:
+    st = os.stat(path)
+    return _file_digest(path, st.st_mtime_ns, st.st_size)
+
+
+def thumbnail_path(image_path: str, width: int, cache_dir: str = THUMBNAIL_DIR) -> str:
+    """
+    Resize `image_path` to `width` display pixels once and return the cached file.
+    The cache file name is the image hash plus the target width, so it is safe
+    to use in URLs whatever the influencer name contains.
+    """
+    pixels = width * PIXEL_RATIO
+    out_path = os.path.join(cache_dir, f"{file_digest(image_path)[:20]}_{pixels}{THUMBNAIL_EXT}")
+    if os.path.exists(out_path):
+        return out_path
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with Image.open(image_path) as img:
+        img = img.convert("RGB")
+        height = max(1, round(img.height * pixels / img.width))
+        img = img.resize((pixels, height), Image.LANCZOS) if img.width > pixels else img
+        # Write to a temporary file first so concurrent sessions never see a partial image
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=THUMBNAIL_EXT)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                img.save(f, THUMBNAIL_FORMAT, quality=80)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+@lru_cache(maxsize=4096)
+def _thumbnail_data_uri(thumb_path: str) -> str:
+    with open(thumb_path, "rb") as f:
+        encoded = base64.b64encode(f.read()).decode()
+    return f"data:{THUMBNAIL_MIME};base64,{encoded}"
+
+
+def thumbnail_src(image_path: str, width: int, static: bool = True) -> str:
+    """`src` for an <img> tag: a static file URL, or a memoized data URI."""
+    thumb = thumbnail_path(image_path, width)
+    if static:
+        return f"{THUMBNAIL_URL}/{os.path.basename(thumb)}"
+    return _thumbnail_data_uri(thumb)
+
+
+def image_html(name: str, width: int = 50, static: bool = True, image_dir: str = IMAGE_DIR) -> str:
+    """<img> tag with the influencer's thumbnail, or "No Image"."""
+    image_path = find_image(name, image_dir)
+    if image_path is None:
+        return "No Image"
+    try:
+        src = thumbnail_src(image_path, width, static=static)
+    except OSError as e:
+        print(f"Error creating thumbnail for {name}: {e}")
+        return "No Image"
+    alt = html.escape(name, quote=True)
+    return f'<img src="{src}" alt="{alt}" loading="lazy" style="width:{width}px;">'
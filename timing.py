@@ -0,0 +1,182 @@
+"""
+Opt-in stage timing for Streamlit reruns and pipeline runs.
+
+Off by default; every hook is a no-op unless UTA_TIMING is set:
+
+    UTA_TIMING=1 streamlit run app.py            # wall time + peak traced memory per stage
+    UTA_TIMING=profile python pipeline.py        # ... and a cProfile dump per run
+
+Each run (one Streamlit rerun, one pipeline run) appends one JSON line to
+UTA_TIMING_LOG (default timing_log.jsonl) with the wall time and peak
+memory of every stage. Profiles go to timing_profiles/<run>-<time>.prof
+(snakeviz / pstats). Summarize the log:
+
+    python timing.py                    # median / p95 seconds and peak MB per run and stage
+    python timing.py --last 20
+
+The current run is kept in a context variable, so every Streamlit session
+(each runs its script in its own thread) logs its own runs. Code that runs
+stages in worker threads passes the context along
+(contextvars.copy_context().run, as pipeline.py does).
+
+Peak memory comes from tracemalloc (Python allocations only, started on
+the first run). It is process-wide: stages and runs that overlap, such as
+the parallel pipeline branches or two sessions rerunning at once, each see
+the other's allocations in their peak.
+"""
+import argparse
+import contextvars
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+MODE = os.environ.get("UTA_TIMING", "").strip().lower()
+ENABLED = MODE not in ("", "0", "false", "no", "off")
+PROFILE = MODE == "profile"
+LOG_PATH = os.environ.get("UTA_TIMING_LOG", "timing_log.jsonl")
+PROFILE_DIR = "timing_profiles"
+
+_lock = threading.Lock()
+_active: List[Dict[str, Any]] = []  # stage records that have not finished, across threads
+_runs: List[Dict[str, Any]] = []  # runs that have not finished, across sessions
+_run: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar("timing_run", default=None)
+
+
+def _fold_peak() -> None:
+    # Give every running stage the peak so far, then start a new peak window;
+    # called with _lock held whenever a stage starts or ends.
+    peak = tracemalloc.get_traced_memory()[1]
+    for record in _active + _runs:
+        record["peak"] = max(record["peak"], peak)
+    tracemalloc.reset_peak()
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block as one stage of the current run (no-op when timing is off)."""
+    if not ENABLED:
+        yield
+        return
+    record = {"stage": name, "peak": 0}
+    with _lock:
+        _fold_peak()
+        _active.append(record)
+    run = _run.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        with _lock:
+            _fold_peak()
+            _active.remove(record)
+            if run is not None:
+                run["stages"].append({"stage": name, "seconds": round(seconds, 6),
+                                       "peak_mb": round(record["peak"] / 2**20, 3)})
+
+
+def start_run(name: str, **info: Any) -> None:
+    """Begin a run in this context; an unfinished previous one (e.g. a rerun stopped by st.stop) is dropped."""
+    if not ENABLED:
+        return
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    profiler = None
+    if PROFILE:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    run = {"run": name, "info": info, "started_at": time.time(), "start": time.perf_counter(),
+           "stages": [], "peak": 0, "profiler": profiler, "thread": threading.current_thread()}
+    previous = _run.get()
+    if previous is not None and previous["profiler"] is not None:
+        previous["profiler"].disable()
+    with _lock:
+        # also forget runs whose thread ended without finishing them (a stopped Streamlit rerun)
+        _runs[:] = [r for r in _runs if r is not previous and r["thread"].is_alive()]
+        _fold_peak()
+        _runs.append(run)
+    _run.set(run)
+
+
+def finish_run(**info: Any) -> Optional[Dict[str, Any]]:
+    """End this context's run and append it to the log (with `info` added); returns the logged record."""
+    if not ENABLED:
+        return None
+    run = _run.get()
+    if run is None:
+        return None
+    _run.set(None)
+    with _lock:
+        _fold_peak()
+        _runs[:] = [r for r in _runs if r is not run]
+    record = {
+        "run": run["run"],
+        "started_at": run["started_at"],
+        "seconds": round(time.perf_counter() - run["start"], 6),
+        "peak_mb": round(run["peak"] / 2**20, 3),
+        "stages": run["stages"],
+        **run["info"],
+        **info,
+    }
+    if run["profiler"] is not None:
+        run["profiler"].disable()
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        path = os.path.join(PROFILE_DIR, f"{run['run']}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+        run["profiler"].dump_stats(path)
+        record["profile"] = path
+    with _lock, open(LOG_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return record
+
+
+@contextmanager
+def run(name: str, **info: Any) -> Iterator[None]:
+    start_run(name, **info)
+    try:
+        yield
+    finally:
+        finish_run()
+
+
+# --- report ---
+def read_log(path: str = LOG_PATH) -> pd.DataFrame:
+    """One row per (run, stage), plus a "(total)" row per run."""
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            record = json.loads(line)
+            rows.append({"id": i, "run": record["run"], "stage": "(total)",
+                         "seconds": record["seconds"], "peak_mb": record["peak_mb"]})
+            rows += [{"id": i, "run": record["run"], **s} for s in record["stages"]]
+    return pd.DataFrame(rows, columns=["id", "run", "stage", "seconds", "peak_mb"])
+
+
+def summarize(df: pd.DataFrame, last: Optional[int] = None) -> pd.DataFrame:
+    if last:
+        df = df[df["id"].isin(df.drop_duplicates("id").groupby("run").tail(last)["id"])]
+    grouped = df.groupby(["run", "stage"], sort=False)
+    return pd.DataFrame({
+        "runs": grouped["id"].nunique(),
+        "median_s": grouped["seconds"].median(),
+        "p95_s": grouped["seconds"].quantile(0.95),
+        "max_peak_mb": grouped["peak_mb"].max(),
+    }).reset_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log", nargs="?", default=LOG_PATH)
+    parser.add_argument("--last", type=int, default=None, help="only the last N runs of each kind")
+    args = parser.parse_args()
+    print(summarize(read_log(args.log), args.last).to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+
+
+if __name__ == "__main__":
+    main()